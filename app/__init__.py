@@ -5,7 +5,6 @@ from flask_migrate import Migrate
 from config import config
 import os
 import logging
-import threading
 import time
 import contextlib
 
@@ -19,13 +18,19 @@ from flask_mail import Mail
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
+from app.services.cache import get_cache
+from app.services.shared_cache import configure_shared_cache
+from app.services.cache_generations import sync_generations, watch_generation
+
 login_manager = LoginManager()
 
 logger = logging.getLogger(__name__)
 
 
-_ORG_SWITCHER_CONTEXT_CACHE: dict[tuple[int, int | None], tuple[float, dict]] = {}
-_ORG_SWITCHER_CONTEXT_CACHE_LOCK = threading.Lock()
+# Keyed by (user_id, active_org_id).
+_ORG_SWITCHER_CONTEXT_CACHE = get_cache(
+    'org_switcher_context', max_entries=4096, max_bytes=16 * 1024 * 1024, shared=True
+)
 
 
 def invalidate_org_switcher_context_cache(user_id: int, org_id: int | None = None) -> None:
@@ -39,18 +44,21 @@ def invalidate_org_switcher_context_cache(user_id: int, org_id: int | None = Non
     except Exception:
         return
 
-    try:
-        org_id_int = int(org_id) if org_id is not None else None
-    except Exception:
-        org_id_int = None
+    # Clear every cached entry for this user (the given org, other orgs, None key, etc.)
+    _ORG_SWITCHER_CONTEXT_CACHE.delete_prefix((user_id_int,))
+
 
-    with _ORG_SWITCHER_CONTEXT_CACHE_LOCK:
-        if org_id_int is not None:
-            _ORG_SWITCHER_CONTEXT_CACHE.pop((user_id_int, org_id_int), None)
-        # Also clear any other cached entries for this user (multi-org, None key, etc.)
-        keys_to_delete = [k for k in _ORG_SWITCHER_CONTEXT_CACHE.keys() if k[0] == user_id_int]
-        for k in keys_to_delete:
-            _ORG_SWITCHER_CONTEXT_CACHE.pop(k, None)
+def _on_org_switcher_generation(scope_id) -> None:
+    # Role, department and org profile changes show up in the context of every member
+    # (and the cache is keyed by user), so drop all of it; these edits are rare.
+    _ORG_SWITCHER_CONTEXT_CACHE.clear()
+
+
+# Membership changes are scoped to the user they belong to.
+watch_generation('user', lambda user_id: invalidate_org_switcher_context_cache(user_id)
+                 if user_id is not None else _ORG_SWITCHER_CONTEXT_CACHE.clear())
+watch_generation('rbac', _on_org_switcher_generation)
+watch_generation('org', _on_org_switcher_generation)
 
 
 def _maybe_enable_system_cert_store() -> None:
@@ -260,6 +268,14 @@ def create_app(config_name=None):
     # Initialize rate limiter
     limiter.init_app(app)
 
+    # Cross-worker cache backend for shared cache namespaces (CACHE_URL unset = per-process only)
+    configure_shared_cache(app.config.get('CACHE_URL'))
+
+    @app.before_request
+    def _sync_cache_generations():
+        # Drop cached entries invalidated by other workers (at most one query per CACHE_GENERATION_CHECK_MS).
+        sync_generations()
+
     # Register OAuth providers (only if configured)
     google_id = app.config.get('GOOGLE_CLIENT_ID')
     google_secret = app.config.get('GOOGLE_CLIENT_SECRET')
@@ -483,13 +499,15 @@ def create_app(config_name=None):
         @app.after_request
         def add_csp_header(response):
             """Add Content Security Policy header."""
+            # Direct uploads PUT from the browser to Blob Storage.
+            connect_src = "'self' https://*.blob.core.windows.net" if app.config.get('DIRECT_UPLOAD_ENABLED') else "'self'"
             csp = (
                 "default-src 'self'; "
                 "script-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://challenges.cloudflare.com; "
                 "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net; "
                 "font-src 'self' https://cdn.jsdelivr.net; "
                 "img-src 'self' data:; "
-                "connect-src 'self'; "
+                f"connect-src {connect_src}; "
                 "frame-src https://challenges.cloudflare.com"
             )
             response.headers['Content-Security-Policy'] = csp
@@ -530,14 +548,9 @@ def create_app(config_name=None):
             # Aggressive cache: 5 minutes instead of 30 seconds
             cache_seconds = int((app.config.get('ORG_SWITCHER_CACHE_SECONDS') or 300))
             if cache_seconds > 0:
-                cache_key = (user_id, active_org_id)
-                now = time.monotonic()
-                with _ORG_SWITCHER_CONTEXT_CACHE_LOCK:
-                    cached = _ORG_SWITCHER_CONTEXT_CACHE.get(cache_key)
-                if cached:
-                    expires_at, payload = cached
-                    if now < expires_at:
-                        return payload
+                cached = _ORG_SWITCHER_CONTEXT_CACHE.get((user_id, active_org_id))
+                if cached is not None:
+                    return cached
 
             from app.models import Organization, OrganizationMembership
 
@@ -643,10 +656,7 @@ def create_app(config_name=None):
 
             if cache_seconds > 0:
                 try:
-                    cache_key = (user_id, active_org_id)
-                    expires_at = time.monotonic() + max(1, cache_seconds)
-                    with _ORG_SWITCHER_CONTEXT_CACHE_LOCK:
-                        _ORG_SWITCHER_CONTEXT_CACHE[cache_key] = (expires_at, payload)
+                    _ORG_SWITCHER_CONTEXT_CACHE.set((user_id, active_org_id), payload, ttl=max(1, cache_seconds))
                 except Exception:
                     pass
 
@@ -946,5 +956,138 @@ def create_app(config_name=None):
             raise click.ClickException(f'Failed committing purge: {e}')
 
         click.echo(f'Done. Purged users: {deleted_users}')
+
+    @app.cli.command('process-documents')
+    @click.option('--batch-size', type=int, default=None, help='Documents per batch (default: DOCUMENT_PROCESSING_BATCH_SIZE).')
+    @click.option('--workers', type=int, default=None, help='Extraction processes (default: DOCUMENT_PROCESSING_WORKERS; 0 = inline).')
+    @click.option('--backfill', is_flag=True, help='First queue active documents that were never processed.')
+    @click.option('--loop', is_flag=True, help='Keep polling for new documents instead of exiting when the queue is empty.')
+    @click.option('--interval', type=float, default=5.0, show_default=True, help='Seconds between polls with --loop.')
+    def process_documents(batch_size, workers, backfill, loop, interval):
+        """Extract text, page counts and thumbnails for uploaded documents."""
+        import time
+        from app.services.document_processing import (
+            enqueue_unprocessed_documents,
+            process_pending_documents,
+            shutdown_pool,
+        )
+
+        from app.services.upload_sessions import sweep_uploads
+
+        if backfill:
+            click.echo(f'Queued {enqueue_unprocessed_documents()} document(s).')
+
+        # The looping worker is also what cleans up abandoned uploads.
+        sweep_interval = float(app.config.get('UPLOAD_SWEEP_INTERVAL_SECONDS') or 0) if loop else 0
+        next_sweep = time.monotonic()
+        total = 0
+        try:
+            while True:
+                if sweep_interval > 0 and time.monotonic() >= next_sweep:
+                    next_sweep = time.monotonic() + sweep_interval
+                    try:
+                        sweep_uploads()
+                    except Exception as e:
+                        db.session.rollback()
+                        app.logger.warning(f'Upload sweep failed: {e}')
+                processed = process_pending_documents(batch_size=batch_size, max_workers=workers)
+                total += processed
+                if processed:
+                    continue
+                if not loop:
+                    break
+                time.sleep(max(0.5, interval))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            shutdown_pool()
+            db.session.remove()
+
+        click.echo(f'Processed {total} document(s).')
+
+    @app.cli.command('sweep-uploads')
+    @click.option('--loop', is_flag=True, help='Keep sweeping instead of exiting after one pass.')
+    @click.option('--interval', type=float, default=300.0, show_default=True, help='Seconds between passes with --loop.')
+    def sweep_uploads(loop, interval):
+        """Abort expired upload sessions and delete the blobs and staged chunks they left."""
+        import time
+        from app.services.upload_sessions import sweep_uploads
+
+        total = 0
+        try:
+            while True:
+                total += sweep_uploads()
+                if not loop:
+                    break
+                time.sleep(max(1.0, interval))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            db.session.remove()
+
+        click.echo(f'Swept {total} upload(s).')
+
+    @app.cli.command('sync-compliance-results')
+    @click.option('--months', type=int, default=None, help='Month folders to sync, newest first (default: ADLS_RESULT_SYNC_MONTHS).')
+    @click.option('--loop', is_flag=True, help='Keep syncing instead of exiting after one pass.')
+    @click.option('--interval', type=float, default=None, help='Seconds between passes with --loop (default: ADLS_RESULT_SYNC_INTERVAL_SECONDS).')
+    @click.option('--rebuild-rollups', is_flag=True, help='First recompute every monthly rollup from the indexed files.')
+    def sync_compliance_results_command(months, loop, interval, rebuild_rollups):
+        """Index ML result files from ADLS, downloading only files whose ETag changed."""
+        import time
+        from app.services.compliance_results import rebuild_all_rollups, sync_compliance_results
+
+        if rebuild_rollups:
+            try:
+                count = rebuild_all_rollups()
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                raise click.ClickException(f'Failed rebuilding rollups: {e}')
+            click.echo(f'Rebuilt {count} rollup row(s).')
+
+        interval = interval or float(app.config.get('ADLS_RESULT_SYNC_INTERVAL_SECONDS') or 300)
+        try:
+            while True:
+                try:
+                    result = sync_compliance_results(months=months)
+                except Exception as e:
+                    db.session.rollback()
+                    if not loop:
+                        raise click.ClickException(f'Failed syncing compliance results: {e}')
+                    click.echo(f'Sync failed: {e}')
+                else:
+                    if not result.get('success'):
+                        if not loop:
+                            raise click.ClickException(result.get('error') or 'Sync failed')
+                        click.echo(f"Sync skipped: {result.get('error')}")
+                    else:
+                        click.echo(
+                            f"Listed {result['listed']}, downloaded {result['downloaded']}, "
+                            f"unchanged {result['unchanged']}, removed {result['removed']}, failed {result['failed']}, "
+                            f"rollups {result['rollups']}."
+                        )
+                finally:
+                    db.session.remove()
+                if not loop:
+                    break
+                time.sleep(max(1.0, interval))
+        except KeyboardInterrupt:
+            pass
+
+    @app.cli.command('rebuild-search-index')
+    @click.option('--org-id', type=int, default=None, help='Only re-index this organization.')
+    def rebuild_search_index_command(org_id):
+        """Re-index filenames and extracted text for full-text search."""
+        from app.services.document_search import rebuild_search_index
+
+        try:
+            count = rebuild_search_index(organization_id=org_id)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise click.ClickException(f'Failed rebuilding search index: {e}')
+
+        click.echo(f'Indexed {count} document(s).')
     
     return app
\ No newline at end of file
@@ -1,11 +1,12 @@
-from flask import render_template, redirect, url_for, jsonify, request, make_response, flash, abort, current_app
+from flask import render_template, redirect, url_for, jsonify, request, make_response, flash, abort, current_app, stream_with_context
 from flask_login import login_required, current_user
 from app.main import bp
 from app.models import Document, Organization, OrganizationMembership, User
 from app import db, mail
 from app.services.azure_data_service import azure_data_service
+from app.services.cache import get_cache
+from app.services.cache_generations import watch_generation
 
-import threading
 import time
 
 from flask_mail import Message
@@ -21,8 +22,13 @@ _RESEND_ORG_INVITE_COOLDOWN_SECONDS = 60 * 5
 _ORG_INVITE_TOKEN_SALT = 'org-invite'
 
 
-_ORG_LOGO_CACHE: dict[tuple[int, str], tuple[float, bytes, str | None]] = {}
-_ORG_LOGO_CACHE_LOCK = threading.Lock()
+# (org_id, blob_name) -> (bytes, content_type); bounded by total logo bytes.
+_ORG_LOGO_CACHE = get_cache(
+    'org_logo', max_entries=512, max_bytes=32 * 1024 * 1024, sizeof=lambda value: len(value[0]) + 256,
+    shared=True,
+)
+watch_generation('org', lambda org_id: _ORG_LOGO_CACHE.clear() if org_id is None
+                 else _ORG_LOGO_CACHE.delete_prefix((org_id,)))
 
 
 def _safe_int_env(name: str, default: int) -> int:
@@ -63,27 +69,13 @@ def _etag_matches_if_none_match(if_none_match: str | None, etag: str) -> bool:
 
 
 def _get_cached_org_logo(org_id: int, blob_name: str) -> tuple[bytes, str | None] | None:
-    now = time.monotonic()
-    with _ORG_LOGO_CACHE_LOCK:
-        cached = _ORG_LOGO_CACHE.get((org_id, blob_name))
-        if not cached:
-            return None
-        expires_at, data, content_type = cached
-        if now >= expires_at:
-            try:
-                del _ORG_LOGO_CACHE[(org_id, blob_name)]
-            except KeyError:
-                pass
-            return None
-        return data, content_type
+    return _ORG_LOGO_CACHE.get((org_id, blob_name))
 
 
 def _set_cached_org_logo(org_id: int, blob_name: str, data: bytes, content_type: str | None, ttl_seconds: int) -> None:
     if ttl_seconds <= 0:
         return
-    expires_at = time.monotonic() + ttl_seconds
-    with _ORG_LOGO_CACHE_LOCK:
-        _ORG_LOGO_CACHE[(org_id, blob_name)] = (expires_at, data, content_type)
+    _ORG_LOGO_CACHE.set((org_id, blob_name), (data, content_type), ttl=ttl_seconds)
 
 
 def _org_logo_disk_cache_paths(org_id: int, blob_name: str) -> tuple[str, str]:
@@ -143,6 +135,29 @@ def _set_disk_cached_org_logo(org_id: int, blob_name: str, data: bytes, content_
         return
 
 
+def _download_org_logo(org_id: int, blob_name: str, content_type: str | None, ttl_seconds: int) -> bytes | None:
+    """Fetch a logo from asset storage into the memory and disk caches.
+
+    Concurrent misses for the same logo share one download (single-flight).
+    """
+    from app.services.singleflight import flight_group
+    from app.services.storage import get_asset_storage
+
+    def fetch():
+        # Pass org_id to ensure correct path (org_X/ prefix)
+        data = get_asset_storage().download_blob(blob_name, organization_id=org_id)
+        if data:
+            _set_cached_org_logo(org_id, blob_name, data, content_type, ttl_seconds=ttl_seconds)
+            _set_disk_cached_org_logo(org_id, blob_name, data, content_type)
+        return data
+
+    try:
+        wait_seconds = int(current_app.config.get('ORG_LOGO_FETCH_WAIT_SECONDS') or 10)
+    except Exception:
+        wait_seconds = 10
+    return flight_group('org_logo').do((org_id, blob_name), fetch, timeout=wait_seconds)
+
+
 @bp.route('/terms')
 def terms():
     return render_template('legal/terms.html', title='Terms and Conditions')
@@ -219,6 +234,28 @@ def _membership_has_permission(membership: OrganizationMembership, code: str) ->
     return False
 
 
+def _active_admin_count(org_id: int) -> int:
+    """Active memberships that can manage users (one join over the materialized grants)."""
+    from sqlalchemy import func
+    from app.services.rbac import memberships_with_permission
+
+    with_role = memberships_with_permission(int(org_id), 'users.manage').count()
+    # Legacy memberships without an RBAC role (see _membership_has_permission).
+    legacy = (
+        OrganizationMembership.query
+        .filter(
+            OrganizationMembership.organization_id == int(org_id),
+            OrganizationMembership.is_active.is_(True),
+            OrganizationMembership.role_id.is_(None),
+            func.lower(func.trim(OrganizationMembership.role)).in_(
+                ['admin', 'organisation administrator', 'organization administrator']
+            ),
+        )
+        .count()
+    )
+    return int(with_role) + int(legacy)
+
+
 def _serializer() -> URLSafeTimedSerializer:
     return URLSafeTimedSerializer(current_app.config['SECRET_KEY'])
 
@@ -286,7 +323,9 @@ def _update_organization_logo(organization: Organization, logo_file) -> tuple[bo
         Tuple of (success: bool, message: str)
     """
     import uuid
-    from app.services.azure_storage_service import azure_storage_service
+    from app.services.storage import get_asset_storage
+
+    asset_storage = get_asset_storage()
     
     if not logo_file or not getattr(logo_file, 'filename', ''):
         return False, 'No logo file selected'
@@ -307,7 +346,7 @@ def _update_organization_logo(organization: Organization, logo_file) -> tuple[bo
             # Remove org prefix if it's already in the blob name
             if old_blob.startswith('org_'):
                 old_blob = old_blob[len(f'org_{organization.id}/'):]
-            azure_storage_service.delete_blob(old_blob, organization_id=int(organization.id))
+            asset_storage.delete_blob(old_blob, organization_id=int(organization.id))
             current_app.logger.info(f'Deleted old logo: {organization.logo_blob_name}')
         except Exception as e:
             current_app.logger.warning(f'Could not delete old logo {organization.logo_blob_name}: {e}')
@@ -315,7 +354,7 @@ def _update_organization_logo(organization: Organization, logo_file) -> tuple[bo
     
     # Upload new logo
     data = logo_file.read()
-    if not azure_storage_service.upload_blob(new_blob_name, data, content_type=content_type, organization_id=int(organization.id)):
+    if not asset_storage.upload_blob(new_blob_name, data, content_type=content_type, organization_id=int(organization.id)):
         return False, 'Logo upload failed. Check Azure Storage configuration.'
     
     # Update organization record
@@ -391,7 +430,7 @@ def org_admin_dashboard():
     def _can_manage_users(m: OrganizationMembership) -> bool:
         return _membership_has_permission(m, 'users.manage')
 
-    active_admin_count = sum(1 for m in members if _can_manage_users(m))
+    active_admin_count = _active_admin_count(int(org_id))
     current_membership = next((m for m in members if int(m.user_id) == int(current_user.id)), None)
     current_is_active_admin = bool(current_membership and _can_manage_users(current_membership))
     can_current_user_leave_org = (not current_is_active_admin) or (active_admin_count > 1)
@@ -631,18 +670,14 @@ def org_admin_update_member_role():
 
     currently_admin = _membership_has_permission(membership, 'users.manage')
     try:
-        new_admin = 'users.manage' in target_role.effective_permission_codes()
+        from app.services.rbac import role_has_permission
+        new_admin = role_has_permission(int(target_role.id), 'users.manage')
     except Exception:
         new_admin = False
 
     # Guard: never demote the last active admin.
     if membership.is_active and currently_admin and not new_admin:
-        active_memberships = (
-            OrganizationMembership.query
-            .filter_by(organization_id=int(org_id), is_active=True)
-            .all()
-        )
-        active_admins = sum(1 for m in active_memberships if _membership_has_permission(m, 'users.manage'))
+        active_admins = _active_admin_count(int(org_id))
         if active_admins <= 1:
             if _wants_json():
                 return jsonify(success=False, error='Cannot change role: you would remove the last admin.'), 400
@@ -1240,12 +1275,7 @@ def org_admin_remove_member():
     # Guard: do not remove/disable the last active user-manager.
     is_admin = _membership_has_permission(membership, 'users.manage')
     if is_admin and membership.is_active:
-        active_memberships = (
-            OrganizationMembership.query
-            .filter_by(organization_id=int(org_id), is_active=True)
-            .all()
-        )
-        active_admins = sum(1 for m in active_memberships if _membership_has_permission(m, 'users.manage'))
+        active_admins = _active_admin_count(int(org_id))
         if active_admins <= 1:
             flash('Cannot remove the last admin. Promote another member to admin first.', 'error')
             return redirect(url_for('main.org_admin_dashboard'))
@@ -1253,12 +1283,7 @@ def org_admin_remove_member():
     # Allow self-removal only when there is another active admin (if the user is an admin).
     if int(membership.user_id) == int(current_user.id):
         if is_admin and membership.is_active:
-            active_memberships = (
-                OrganizationMembership.query
-                .filter_by(organization_id=int(org_id), is_active=True)
-                .all()
-            )
-            active_admins = sum(1 for m in active_memberships if _membership_has_permission(m, 'users.manage'))
+            active_admins = _active_admin_count(int(org_id))
             if active_admins <= 1:
                 flash('You are the only admin. Promote another admin before leaving the organisation.', 'error')
                 return redirect(url_for('main.org_admin_dashboard'))
@@ -1399,8 +1424,9 @@ def dashboard():
         .limit(5)
         .all()
     )
-    # Avoid full table scan for count; use an approximate or limit scope.
-    total_documents = Document.query.filter_by(organization_id=org_id, is_active=True).limit(1000).count()
+    # Cached per process for a short time (see services.pagination).
+    from app.services.pagination import document_count
+    total_documents = document_count(org_id)
     
     # ML/ADLS data is deferred by default; provide a lightweight placeholder for the template.
     if current_app.config.get('TESTING') or skip_adls:
@@ -1422,7 +1448,14 @@ def dashboard():
                          total_documents=total_documents,
                          ml_summary=ml_summary,
                          skip_adls=skip_adls,
-                         ml_enabled=ml_enabled)
+                         ml_enabled=ml_enabled,
+                         direct_upload_enabled=bool(current_app.config.get('DIRECT_UPLOAD_ENABLED')),
+                         resumable_upload_enabled=bool(current_app.config.get('RESUMABLE_UPLOAD_ENABLED')),
+                         max_upload_size=int(
+                             current_app.config.get('RESUMABLE_UPLOAD_MAX_SIZE')
+                             if current_app.config.get('RESUMABLE_UPLOAD_ENABLED')
+                             else current_app.config.get('MAX_CONTENT_LENGTH') or 16 * 1024 * 1024
+                         ))
 
 @bp.route('/upload')
 @login_required
@@ -1444,11 +1477,50 @@ def documents():
     org_id = _active_org_id()
     if not current_user.has_permission('documents.view', org_id=int(org_id)):
         abort(403)
-    query = Document.query.filter_by(organization_id=org_id, is_active=True)
-    user_documents = query.order_by(Document.uploaded_at.desc()).all()
-    return render_template('main/documents.html', 
+    listing = _document_listing_page(org_id)
+    return render_template('main/evidence_repository.html', 
                          title='My Documents',
-                         documents=user_documents)
+                         documents=listing.items,
+                         pagination=listing)
+
+def _listing_per_page(default=50):
+    per_page = request.args.get('per_page', default, type=int) or default
+    return min(max(per_page, 10), 200)  # clamp between 10-200
+
+def _document_listing_page(org_id):
+    """Cursor-paginated page of active documents for the listing views."""
+    from app.services.pagination import CursorError, paginate_documents
+
+    per_page = _listing_per_page()
+    try:
+        return paginate_documents(org_id, per_page=per_page, cursor=request.args.get('cursor'), with_total=True)
+    except CursorError:
+        # Stale or hand-edited link: start again from the newest documents.
+        return paginate_documents(org_id, per_page=per_page, with_total=True)
+
+def _search_documents_page(org_id, query, page, per_page):
+    """Run a full-text search and load the page of hits (in rank order)."""
+    from sqlalchemy.orm import joinedload
+    from app.services.document_search import search_documents
+
+    search = search_documents(org_id, query, page=page, per_page=per_page)
+    hits = search.get('results') or []
+    documents = []
+    if hits:
+        by_id = {
+            int(d.id): d
+            for d in Document.query
+            .options(joinedload(Document.uploader))
+            .filter(
+                Document.id.in_([h['document_id'] for h in hits]),
+                Document.organization_id == int(org_id),
+                Document.is_active.is_(True),
+            )
+            .all()
+        }
+        documents = [by_id[h['document_id']] for h in hits if h['document_id'] in by_id]
+    snippets = {h['document_id']: h['snippet'] for h in hits if h.get('snippet')}
+    return documents, search, snippets
 
 @bp.route('/evidence-repository')
 @login_required
@@ -1462,33 +1534,125 @@ def evidence_repository():
     if not current_user.has_permission('documents.view', org_id=int(org_id)):
         abort(403)
     
-    # Pagination to avoid loading thousands of documents at once.
-    page = request.args.get('page', 1, type=int)
-    per_page = int(request.args.get('per_page', '50') or 50)
-    per_page = min(max(per_page, 10), 200)  # clamp between 10-200
-    
-    # Use options to eager-load relationships and avoid N+1 queries
-    from sqlalchemy.orm import joinedload
-    query = (
-        Document.query
-        .options(joinedload(Document.uploader))
-        .filter_by(organization_id=org_id, is_active=True)
-    )
-    pagination = query.order_by(Document.uploaded_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
-    documents = pagination.items
+    search_query = (request.args.get('q') or '').strip()
+    if search_query:
+        page = request.args.get('page', 1, type=int)
+        documents, search, snippets = _search_documents_page(org_id, search_query, page, _listing_per_page())
+        return render_template('main/evidence_repository.html',
+                             title='Evidence Repository',
+                             documents=documents,
+                             pagination=None,
+                             search_query=search_query,
+                             search=search,
+                             snippets=snippets)
+    
+    # Keyset pagination: page N costs the same as page 1 (no OFFSET, cached total).
+    listing = _document_listing_page(org_id)
     return render_template('main/evidence_repository.html', 
                          title='Evidence Repository',
-                         documents=documents,
-                         pagination=pagination)
+                         documents=listing.items,
+                         pagination=listing)
+
+@bp.route('/api/documents')
+@login_required
+def list_documents_api():
+    """JSON listing of the active organisation's documents, newest first, by cursor."""
+    from app.services.pagination import CursorError, paginate_documents
+
+    org_id = _active_org_id()
+    if not org_id or not current_user.has_permission('documents.view', org_id=int(org_id)):
+        return jsonify({'success': False, 'error': 'Not authorized', 'error_code': 'NOT_AUTHORIZED'}), 403
+
+    try:
+        listing = paginate_documents(
+            org_id,
+            per_page=_listing_per_page(),
+            cursor=request.args.get('cursor'),
+            with_total=request.args.get('total') == '1',
+        )
+    except CursorError:
+        return jsonify({'success': False, 'error': 'Invalid cursor', 'error_code': 'INVALID_CURSOR'}), 400
+
+    return jsonify({
+        'success': True,
+        **listing.to_dict(),
+        'documents': [
+            {
+                'id': int(d.id),
+                'filename': d.filename,
+                'content_type': d.content_type,
+                'file_size': d.file_size,
+                'uploaded_at': d.uploaded_at.isoformat() if d.uploaded_at else None,
+                'uploaded_by': d.uploader.email if d.uploader else None,
+                'url': url_for('main.document_details', doc_id=d.id),
+            }
+            for d in listing.items
+        ],
+    })
+
+@bp.route('/documents/search')
+@login_required
+def search_documents_api():
+    """JSON full-text search over the active organisation's documents."""
+    org_id = _active_org_id()
+    if not org_id or not current_user.has_permission('documents.view', org_id=int(org_id)):
+        return jsonify({'success': False, 'error': 'Not authorized', 'error_code': 'NOT_AUTHORIZED'}), 403
+
+    query = (request.args.get('q') or '').strip()
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
+    documents, search, snippets = _search_documents_page(org_id, query, page, per_page)
+    if not search.get('success'):
+        return jsonify(search), 503
+
+    return jsonify({
+        'success': True,
+        'query': query,
+        'page': search['page'],
+        'per_page': search['per_page'],
+        'has_next': search['has_next'],
+        'results': [
+            {
+                'id': int(d.id),
+                'filename': d.filename,
+                'content_type': d.content_type,
+                'file_size': d.file_size,
+                'uploaded_at': d.uploaded_at.isoformat() if d.uploaded_at else None,
+                'snippet': str(snippets[int(d.id)]) if int(d.id) in snippets else None,
+                'url': url_for('main.document_details', doc_id=d.id),
+            }
+            for d in documents
+        ],
+    })
+
+def _if_range_matches(etag, last_modified):
+    """Whether the request's If-Range (if any) names the version being served.
+
+    ETags use strong comparison (weak tags never match); dates must equal the
+    Last-Modified time exactly (RFC 9110 13.1.5).
+    """
+    from werkzeug.http import unquote_etag
+
+    header = (request.headers.get('If-Range') or '').strip()
+    if not header:
+        return True
+    if_range = request.if_range
+    if if_range.etag:
+        if header.startswith('W/') or not etag:
+            return False
+        current, weak = unquote_etag(etag)
+        return not weak and current == if_range.etag
+    if if_range.date and last_modified:
+        return int(last_modified.timestamp()) == int(if_range.date.timestamp())
+    return False
+
 
 @bp.route('/document/<int:doc_id>/download')
 def download_document(doc_id):
-    """Download a document."""
-    from flask import send_file, abort
-    from app.services.azure_storage import AzureBlobStorageService
-    import io
+    """Stream a document download (supports single HTTP byte ranges and If-Range)."""
+    from flask import abort, send_file
+    from app.services.storage import get_document_storage
+    from app.services.file_validation import FileValidationService
 
     # For document downloads, do not leak existence via redirects.
     # Return 404 for any unauthenticated/unauthorized access.
@@ -1518,34 +1682,136 @@ def download_document(doc_id):
         abort(404)
     if int(document.organization_id) != int(org_id):
         abort(404)
-    
-    try:
-        storage_service = AzureBlobStorageService()
-        result = storage_service.download_file(document.blob_name)
-        if not result.get('success'):
-            if result.get('error_code') == 'FILE_NOT_FOUND':
-                abort(404)
-            abort(500)
 
-        blob_data = result.get('data')
-        if not blob_data:
-            abort(404)
-        
-        # Create file-like object
-        file_stream = io.BytesIO(blob_data)
-        file_stream.seek(0)
-        
-        # Send file to user
-        return send_file(
-            file_stream,
-            mimetype=document.content_type,
-            as_attachment=True,
-            download_name=document.filename
+    disposition = 'inline' if request.args.get('inline') == '1' else 'attachment'
+    # documents.content_type may be truncated (VARCHAR(50), e.g. DOCX); derive it from the name.
+    content_type = FileValidationService.get_content_type(document.filename) or 'application/octet-stream'
+
+    # Local backend: let send_file serve the file (sendfile + conditional/Range handling).
+    storage_service = get_document_storage()
+    get_local_path = getattr(storage_service, 'get_local_path', None)
+    local_path = get_local_path(document.blob_name) if get_local_path else None
+    if local_path:
+        resp = send_file(
+            local_path,
+            mimetype=content_type,
+            as_attachment=(disposition == 'attachment'),
+            download_name=document.filename,
+            conditional=True,
+            max_age=0,
         )
+        resp.headers['Cache-Control'] = 'private, no-cache'
+        return resp
+
+    # Resolve a single byte range against the stored size. Multi-range requests
+    # are answered with the full body (allowed by RFC 9110).
+    total_size = int(document.file_size or 0)
+    byte_range = None
+    if request.range is not None and total_size > 0 and len(request.range.ranges) == 1:
+        byte_range = request.range.range_for_length(total_size)
+        if byte_range is None:
+            resp = make_response('', 416)
+            resp.headers['Content-Range'] = f'bytes */{total_size}'
+            return resp
+
+    try:
+        if byte_range:
+            start, stop = byte_range
+            result = storage_service.open_download(
+                document.blob_name, offset=start, length=stop - start, etag=document.blob_etag
+            )
+            if result.get('success') and not _if_range_matches(result.get('etag'), result.get('last_modified')):
+                # The client holds part of another version: send the whole current file.
+                close = getattr(result['chunks'], 'close', None)
+                if close:
+                    close()
+                byte_range = None
+                result = storage_service.open_download(document.blob_name, etag=document.blob_etag)
+        else:
+            result = storage_service.open_download(document.blob_name, etag=document.blob_etag)
     except Exception as e:
-        print(f"Error downloading document: {e}")
+        current_app.logger.error(f"Error downloading document {doc_id}: {e}")
+        abort(500)
+
+    if not result.get('success'):
+        # FILE_CHANGED: the blob is no longer the version verified at upload; never serve it.
+        if result.get('error_code') in {'FILE_NOT_FOUND', 'FILE_CHANGED'}:
+            abort(404)
         abort(500)
 
+    resp = current_app.response_class(
+        result['chunks'],
+        status=206 if byte_range else 200,
+        mimetype=result.get('content_type') or content_type,
+        direct_passthrough=True,
+    )
+    resp.headers['Content-Length'] = str(int(result.get('size') or 0))
+    resp.headers['Accept-Ranges'] = 'bytes'
+    if byte_range:
+        total = int(result.get('total_size') or total_size)
+        resp.headers['Content-Range'] = f'bytes {byte_range[0]}-{byte_range[1] - 1}/{total}'
+
+    # Browsers only use range requests for inline viewing (e.g. the built-in PDF viewer).
+    resp.headers.set('Content-Disposition', disposition, filename=document.filename)
+    resp.headers['Cache-Control'] = 'private, no-cache'
+    if result.get('etag'):
+        resp.headers['ETag'] = result['etag']
+    if result.get('last_modified'):
+        resp.last_modified = result['last_modified']
+    return resp
+
+@bp.route('/document/<int:doc_id>/thumbnail')
+@login_required
+def document_thumbnail(doc_id):
+    """Serve the thumbnail generated by post-upload processing."""
+    from flask import abort
+    from app.models import DocumentDerivedData
+
+    org_id = _active_org_id()
+    if not org_id or not current_user.has_permission('documents.view', org_id=int(org_id)):
+        abort(404)
+
+    document = db.session.get(Document, int(doc_id))
+    if not document or not getattr(document, 'is_active', True) or int(document.organization_id) != int(org_id):
+        abort(404)
+
+    derived = db.session.get(DocumentDerivedData, int(doc_id))
+    if not derived or not derived.thumbnail:
+        abort(404)
+
+    resp = make_response(derived.thumbnail)
+    resp.headers['Content-Type'] = derived.thumbnail_content_type or 'image/jpeg'
+    resp.headers['Cache-Control'] = 'private, max-age=86400'
+    return resp
+
+@bp.route('/storage/local/<token>')
+def local_storage_file(token):
+    """Serve a file from the local storage backend via a signed, expiring URL."""
+    from flask import abort, send_file
+    from app.services.storage import storage_backend
+    from app.services.local_storage import LocalFileStorageService, verify_local_url
+
+    if storage_backend() != 'local':
+        abort(404)
+
+    target = verify_local_url(token)
+    if not target:
+        abort(404)
+    container_name, blob_name = target
+
+    storage_service = LocalFileStorageService(container_name=container_name)
+    local_path = storage_service.get_local_path(blob_name)
+    if not local_path:
+        abort(404)
+
+    info = storage_service.inspect_file(blob_name, header_bytes=1)
+    return send_file(
+        local_path,
+        mimetype=info.get('content_type') or 'application/octet-stream',
+        conditional=True,
+        max_age=0,
+    )
+
 @bp.route('/document/<int:doc_id>/delete', methods=['POST'])
 @login_required
 def delete_document(doc_id):
@@ -1555,7 +1821,10 @@ def delete_document(doc_id):
         return maybe
 
     from flask import flash, redirect
-    from app.services.azure_storage import AzureBlobStorageService
+    from app.services.storage import get_document_storage
+    from app.services.document_blobs import release_blob_reference
+    from app.services.document_search import remove_document
+    from app.services.pagination import invalidate_document_count
     
     org_id = _active_org_id()
     if not current_user.has_permission('documents.delete', org_id=int(org_id)):
@@ -1574,16 +1843,21 @@ def delete_document(doc_id):
     
     try:
         if getattr(document, 'blob_name', None):
-            storage_service = AzureBlobStorageService()
-            delete_result = storage_service.delete_file(document.blob_name)
-            if not delete_result.get('success'):
-                raise Exception(delete_result.get('error') or 'Delete failed')
+            # Deduplicated blobs are shared; only the last reference deletes the stored file.
+            blob_to_delete = release_blob_reference(document) if document.is_active is not False else None
+            if blob_to_delete:
+                storage_service = get_document_storage()
+                delete_result = storage_service.delete_file(blob_to_delete)
+                if not delete_result.get('success'):
+                    raise Exception(delete_result.get('error') or 'Delete failed')
         else:
             current_app.logger.warning('Document %s has no blob_name; skipping Azure deletion', document.id)
         
         # Soft delete from database
         document.is_active = False
+        remove_document(document.id)
         db.session.commit()
+        invalidate_document_count(document.organization_id)
         
         flash(f'Document "{document.filename}" deleted successfully.', 'success')
     except Exception as e:
@@ -1790,14 +2064,10 @@ def organization_logo():
             _set_cached_org_logo(int(org_id), organization.logo_blob_name, blob_data, content_type, ttl_seconds=logo_cache_seconds)
             current_app.logger.info('Org logo served from disk cache org_id=%s', org_id)
         else:
-            from app.services.azure_storage_service import azure_storage_service
-            # Pass org_id to ensure correct path (org_X/ prefix)
-            blob_data = azure_storage_service.download_blob(organization.logo_blob_name, organization_id=int(org_id))
+            content_type = organization.logo_content_type
+            blob_data = _download_org_logo(int(org_id), organization.logo_blob_name, content_type, logo_cache_seconds)
             if not blob_data:
                 abort(404)
-            content_type = organization.logo_content_type
-            _set_cached_org_logo(int(org_id), organization.logo_blob_name, blob_data, content_type, ttl_seconds=logo_cache_seconds)
-            _set_disk_cached_org_logo(int(org_id), organization.logo_blob_name, blob_data, content_type)
             elapsed = time.monotonic() - t0
             current_app.logger.warning('Org logo fetched from Azure org_id=%s took %.2fs', org_id, elapsed)
 
@@ -1869,14 +2139,10 @@ def organization_logo_by_id(org_id):
             _set_cached_org_logo(int(org_id), organization.logo_blob_name, blob_data, content_type, ttl_seconds=logo_cache_seconds)
             current_app.logger.info('Org logo(by_id) served from disk cache org_id=%s', org_id)
         else:
-            from app.services.azure_storage_service import azure_storage_service
-            # Pass org_id to ensure correct path (org_X/ prefix)
-            blob_data = azure_storage_service.download_blob(organization.logo_blob_name, organization_id=int(org_id))
+            content_type = organization.logo_content_type
+            blob_data = _download_org_logo(int(org_id), organization.logo_blob_name, content_type, logo_cache_seconds)
             if not blob_data:
                 abort(404)
-            content_type = organization.logo_content_type
-            _set_cached_org_logo(int(org_id), organization.logo_blob_name, blob_data, content_type, ttl_seconds=logo_cache_seconds)
-            _set_disk_cached_org_logo(int(org_id), organization.logo_blob_name, blob_data, content_type)
             elapsed = time.monotonic() - t0
             current_app.logger.warning('Org logo(by_id) fetched from Azure org_id=%s took %.2fs', org_id, elapsed)
 
@@ -2167,13 +2433,13 @@ def profile_update_department():
 def profile_avatar():
     """Serve the current user's avatar image."""
     from flask import abort, send_file
-    from app.services.azure_storage import AzureBlobStorageService
+    from app.services.storage import get_document_storage
     import io
 
     if not getattr(current_user, 'avatar_blob_name', None):
         abort(404)
 
-    storage_service = AzureBlobStorageService()
+    storage_service = get_document_storage()
     result = storage_service.download_file(current_user.avatar_blob_name)
     if not result.get('success'):
         abort(404)
@@ -2291,6 +2557,80 @@ def api_ml_summary():
     summary = azure_data_service.get_dashboard_summary(user_id=current_user.id, organization_id=org_id)
     return jsonify(summary)
 
+@bp.route('/api/ml-summary/stream')
+@login_required
+def api_ml_summary_stream():
+    """
+    Server-sent events version of /api/ml-summary for progressive dashboard hydration.
+
+    Emits `status` (connection status, file count), one `file` per file summary as it
+    is parsed, then `summary` (the /api/ml-summary payload) and closes. The stream is
+    bounded by the listing/file deadlines, so it never holds a worker open.
+    """
+    maybe = _require_active_org()
+    if maybe is not None:
+        return jsonify({'error': 'No active organization'}), 400
+
+    org_id = _active_org_id()
+    if not current_user.has_permission('documents.view', org_id=int(org_id)):
+        return jsonify({'error': 'Forbidden'}), 403
+
+    from app.services.azure_data_service import dashboard_summary_events
+
+    if current_app.config.get('TESTING'):
+        mock = get_mock_ml_summary()
+        events = dashboard_summary_events({**vars(mock), 'file_summaries': [vars(f) for f in mock.file_summaries]})
+    elif not current_app.config.get('ML_SUMMARY_ENABLED', False):
+        events = dashboard_summary_events({'total_files': 0, 'file_summaries': [], 'connection_status': 'Coming soon'})
+    else:
+        events = azure_data_service.iter_dashboard_summary(user_id=current_user.id, organization_id=int(org_id))
+
+    def generate():
+        # The client closes on `summary`; `retry` keeps a dropped connection from reconnecting in a tight loop.
+        yield 'retry: 60000\n\n'
+        for event, data in events:
+            yield f"event: {event}\ndata: {current_app.json.dumps(data)}\n\n"
+
+    resp = current_app.response_class(stream_with_context(generate()), mimetype='text/event-stream')
+    resp.headers['Cache-Control'] = 'no-cache'
+    # Keep reverse proxies from buffering the stream until it ends.
+    resp.headers['X-Accel-Buffering'] = 'no'
+    return resp
+
+@bp.route('/api/compliance-trends')
+@login_required
+def api_compliance_trends():
+    """Monthly compliance score/status series for the active organization (from rollups, no ADLS calls)."""
+    maybe = _require_active_org()
+    if maybe is not None:
+        return jsonify({'error': 'No active organization'}), 400
+
+    org_id = _active_org_id()
+    if not current_user.has_permission('documents.view', org_id=int(org_id)):
+        return jsonify({'error': 'Forbidden'}), 403
+
+    months = request.args.get('months', default=12, type=int)
+    from app.services.compliance_results import compliance_trends
+    return jsonify(compliance_trends(int(org_id), months=months))
+
+@bp.route('/api/cache-metrics')
+@login_required
+def api_cache_metrics():
+    """Per-process cache counters (organisation admins only)."""
+    maybe = _require_org_admin()
+    if maybe is not None:
+        return jsonify({'error': 'No active organization'}), 400
+
+    from app.services.azure_data_service import dashboard_cache_metrics
+    from app.services.cache import cache_stats
+    from app.services.singleflight import flight_stats
+    return jsonify({
+        'pid': os.getpid(),
+        'dashboard_summary': dashboard_cache_metrics(),
+        'singleflight': flight_stats(),
+        'caches': cache_stats(),
+    })
+
 @bp.route('/adls-raw-data')
 @login_required
 def adls_raw_data():
@@ -1,19 +1,21 @@
 from datetime import datetime, timezone
-import threading
-import time
 from flask import g
 from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm.attributes import set_committed_value
 from werkzeug.security import generate_password_hash, check_password_hash
 from app import db
+from app.services.cache import get_cache
+from app.services.cache_generations import track_changes, watch_generation
 
 
-_RBAC_EFFECTIVE_PERMS_CACHE: dict[int, tuple[float, set[str]]] = {}
-_RBAC_EFFECTIVE_PERMS_CACHE_LOCK = threading.Lock()
+# (organization_id, role_id) -> frozenset of effective permission codes.
+_RBAC_EFFECTIVE_PERMS_CACHE = get_cache('rbac_effective_perms', max_entries=4096, shared=True)
 
 
 def _rbac_effective_perms_cache_ttl_seconds() -> int:
-    # Keep small to reduce risk of stale permissions after edits.
-    # Roles/permissions do not change frequently in typical usage.
+    # Role edits also drop entries on every worker via the org's 'rbac' cache generation,
+    # so this only bounds staleness when the generation check itself fails.
     try:
         # Optional env override (seconds)
         import os
@@ -234,6 +236,22 @@ class User(UserMixin, db.Model):
         if not code:
             return False
 
+        # Fast path: a bit test against the principal snapshot kept in the session.
+        from app.services.rbac import PERMISSION_BITS, load_principal
+
+        bit = PERMISSION_BITS.get(code)
+        resolved_org_id = org_id if org_id is not None else self.organization_id
+        if bit is not None and resolved_org_id:
+            try:
+                principal = load_principal(self, int(resolved_org_id))
+            except Exception:
+                principal = None
+            if principal is not None:
+                return bool(principal['mask'] & bit)
+
+        return self._has_permission_uncompiled(code, org_id=org_id)
+
+    def _has_permission_uncompiled(self, code: str, org_id: int | None = None) -> bool:
         membership = self.active_membership(org_id=org_id)
         if not membership:
             return False
@@ -282,15 +300,189 @@ class Document(db.Model):
     blob_name = db.Column(db.String(255))
     file_size = db.Column(db.Integer)
     content_type = db.Column(db.String(50))
-    uploaded_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
+    # NOT NULL: it is the keyset pagination key (a NULL would never match the seek predicate).
+    uploaded_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
     is_active = db.Column(db.Boolean, default=True)
     uploaded_by = db.Column(db.Integer, db.ForeignKey('users.id'))
     organization_id = db.Column(db.Integer, db.ForeignKey('organizations.id'), nullable=True)
+    # SHA-256 of the file bytes; documents with the same digest in an org share one DocumentBlob.
+    content_sha256 = db.Column(db.String(64), nullable=True)
+    # ETag of the blob verified at upload; downloads and processing only read that version.
+    blob_etag = db.Column(db.String(128), nullable=True)
 
     uploader = db.relationship('User', foreign_keys=[uploaded_by], lazy='select')
 
     __table_args__ = (
-        db.Index('ix_documents_org_active_uploaded_at', 'organization_id', 'is_active', 'uploaded_at'),
+        # Ends in (uploaded_at, id) so keyset pagination seeks without a sort (services.pagination).
+        db.Index('ix_documents_org_active_uploaded_at', 'organization_id', 'is_active', 'uploaded_at', 'id'),
+        db.Index('ix_documents_org_content_sha256', 'organization_id', 'content_sha256'),
+    )
+
+
+# The full-text index is dialect-specific DDL (FTS5 / tsvector), so it is created and
+# dropped alongside the documents table rather than declared as a model.
+@event.listens_for(Document.__table__, 'after_create')
+def _create_document_search_index(target, connection, **kw):
+    from app.services.document_search import create_search_index
+    create_search_index(connection)
+
+
+@event.listens_for(Document.__table__, 'before_drop')
+def _drop_document_search_index(target, connection, **kw):
+    from app.services.document_search import drop_search_index
+    drop_search_index(connection)
+
+
+class DocumentBlob(db.Model):
+    """A stored file shared by all documents in an organisation with identical content.
+
+    ref_count is the number of active Document rows pointing at blob_name; the stored
+    file is only deleted when it drops to zero.
+    """
+    __tablename__ = 'document_blobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    organization_id = db.Column(db.Integer, db.ForeignKey('organizations.id', ondelete='CASCADE'), nullable=False)
+    sha256 = db.Column(db.String(64), nullable=False)
+    blob_name = db.Column(db.String(255), nullable=False)
+    file_size = db.Column(db.Integer)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('organization_id', 'sha256', name='uq_document_blobs_org_sha256'),
+    )
+
+
+class DocumentDerivedData(db.Model):
+    """Data derived from a document's content by the post-upload pipeline.
+
+    One row per document. status: pending -> processing -> done | failed
+    (failed rows are retried with backoff until attempts runs out).
+    """
+    __tablename__ = 'document_derived_data'
+
+    document_id = db.Column(db.Integer, db.ForeignKey('documents.id', ondelete='CASCADE'), primary_key=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=True)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    text_content = db.Column(db.Text, nullable=True)
+    page_count = db.Column(db.Integer, nullable=True)
+    title = db.Column(db.String(255), nullable=True)
+    author = db.Column(db.String(255), nullable=True)
+    metadata_json = db.Column(db.Text, nullable=True)
+    thumbnail = db.Column(db.LargeBinary, nullable=True)
+    thumbnail_content_type = db.Column(db.String(50), nullable=True)
+    error = db.Column(db.String(500), nullable=True)
+    processed_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
+    document = db.relationship(
+        'Document',
+        backref=db.backref('derived_data', uselist=False, lazy='select', passive_deletes=True),
+    )
+
+    __table_args__ = (
+        db.Index('ix_document_derived_data_status_next', 'status', 'next_attempt_at'),
+    )
+
+
+class UploadSession(db.Model):
+    """Server-side state of a resumable (chunked) upload.
+
+    Lives in the database so any worker can accept the next chunk or report progress.
+    """
+    __tablename__ = 'upload_sessions'
+
+    id = db.Column(db.String(36), primary_key=True)
+    organization_id = db.Column(db.Integer, db.ForeignKey('organizations.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    content_type = db.Column(db.String(255))
+    blob_name = db.Column(db.String(255), nullable=False)
+    total_size = db.Column(db.BigInteger, nullable=False)
+    chunk_size = db.Column(db.Integer, nullable=False)
+    received_bytes = db.Column(db.BigInteger, nullable=False, default=0)
+    # pending -> uploading -> finalizing -> assembled -> completed | aborted;
+    # direct uploads: direct -> completed | aborted
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    document_id = db.Column(db.Integer, db.ForeignKey('documents.id', ondelete='SET NULL'), nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_upload_sessions_user_status', 'user_id', 'status'),
+    )
+
+    @property
+    def chunk_count(self):
+        return max(1, -(-int(self.total_size) // int(self.chunk_size)))
+
+    def progress_percent(self):
+        if not self.total_size:
+            return 100 if self.status == 'completed' else 0
+        return min(100, int(int(self.received_bytes or 0) * 100 // int(self.total_size)))
+
+
+class ComplianceResultFile(db.Model):
+    """One ML compliance result file in ADLS and its parsed summary.
+
+    Written only by the result sync (app/services/compliance_results.py); dashboards
+    read from here instead of listing and downloading from ADLS. period, organization_id
+    and user_id are taken from the path (<results>/<YYYY>/<MM>/[org_<id>/]user_<id>/...).
+    """
+    __tablename__ = 'compliance_result_files'
+
+    id = db.Column(db.Integer, primary_key=True)
+    file_path = db.Column(db.String(1024), nullable=False, unique=True)
+    file_name = db.Column(db.String(255), nullable=False)
+    framework = db.Column(db.String(100), nullable=True)
+    period = db.Column(db.String(7), nullable=True)
+    organization_id = db.Column(db.Integer, nullable=True)
+    user_id = db.Column(db.Integer, nullable=True)
+    etag = db.Column(db.String(255), nullable=True)
+    last_modified = db.Column(db.DateTime, nullable=True)
+    file_size = db.Column(db.BigInteger, nullable=False, default=0)
+    total_requirements = db.Column(db.Integer, nullable=False, default=0)
+    complete_count = db.Column(db.Integer, nullable=False, default=0)
+    needs_review_count = db.Column(db.Integer, nullable=False, default=0)
+    missing_count = db.Column(db.Integer, nullable=False, default=0)
+    overall_status = db.Column(db.String(50), nullable=True)
+    compliancy_rate = db.Column(db.Float, nullable=False, default=0)
+    weighted_score = db.Column(db.Float, nullable=False, default=0)
+    frameworks_json = db.Column(db.Text, nullable=True)
+    synced_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_compliance_result_files_scope', 'organization_id', 'user_id', 'period', 'last_modified'),
+    )
+
+
+class ComplianceMonthlyRollup(db.Model):
+    """Per-organisation, per-framework, per-month aggregate of indexed result files.
+
+    Rebuilt by the result sync for every (organization, period) it touches; the
+    'Overall' row aggregates each file's overall score. Trend queries read only this table.
+    """
+    __tablename__ = 'compliance_monthly_rollups'
+
+    id = db.Column(db.Integer, primary_key=True)
+    organization_id = db.Column(db.Integer, nullable=False)
+    period = db.Column(db.String(7), nullable=False)
+    framework = db.Column(db.String(100), nullable=False)
+    sample_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+    score_avg = db.Column(db.Float, nullable=False, default=0)
+    complete_count = db.Column(db.Integer, nullable=False, default=0)
+    needs_review_count = db.Column(db.Integer, nullable=False, default=0)
+    missing_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
+    __table_args__ = (
+        # Also serves the trend query (organization_id = ? AND period >= ?).
+        db.UniqueConstraint('organization_id', 'period', 'framework', name='uq_compliance_rollups_org_period_framework'),
     )
 
 
@@ -308,6 +500,27 @@ rbac_role_inherits = db.Table(
 )
 
 
+# Materialized inheritance: one row per (role, role whose permissions it includes), with
+# depth 0 for the role itself. Rebuilt per org, together with the flattened grants below,
+# in the same transaction as any role, grant or inheritance edit (services.rbac).
+rbac_role_closure = db.Table(
+    'rbac_role_closure',
+    db.Column('role_id', db.Integer, db.ForeignKey('rbac_roles.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('ancestor_role_id', db.Integer, db.ForeignKey('rbac_roles.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('depth', db.Integer, nullable=False),
+    db.Index('ix_rbac_role_closure_ancestor', 'ancestor_role_id'),
+)
+
+
+rbac_role_effective_permissions = db.Table(
+    'rbac_role_effective_permissions',
+    db.Column('role_id', db.Integer, db.ForeignKey('rbac_roles.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('permission_id', db.Integer, db.ForeignKey('rbac_permissions.id', ondelete='CASCADE'), primary_key=True),
+    # "Who holds permission Y": permission first.
+    db.Index('ix_rbac_role_effective_permissions_permission', 'permission_id', 'role_id'),
+)
+
+
 class RBACPermission(db.Model):
     __tablename__ = 'rbac_permissions'
 
@@ -324,6 +537,9 @@ class RBACRole(db.Model):
     name = db.Column(db.String(80), nullable=False)
     description = db.Column(db.String(255))
     is_system = db.Column(db.Boolean, default=False, nullable=False)
+    # Effective permissions (direct + inherited) compiled with services.rbac.PERMISSION_BITS;
+    # recomputed with the org's role closure whenever one of its roles changes. NULL = not compiled yet.
+    permission_mask = db.Column(db.BigInteger, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
 
     # These collections can be large; selectin avoids row explosion from JOINs.
@@ -345,30 +561,53 @@ class RBACRole(db.Model):
         """Return direct + inherited permission codes (cycle-safe)."""
         try:
             rid = int(getattr(self, 'id', 0) or 0)
+            cache_key = (int(self.organization_id or 0), rid)
         except Exception:
             rid = 0
 
         ttl = _rbac_effective_perms_cache_ttl_seconds()
         if rid and ttl > 0:
-            now = time.monotonic()
-            with _RBAC_EFFECTIVE_PERMS_CACHE_LOCK:
-                cached = _RBAC_EFFECTIVE_PERMS_CACHE.get(rid)
-            if cached:
-                expires_at, codes = cached
-                if now < expires_at:
-                    # Return a copy to avoid accidental mutation of cached set.
-                    return set(codes)
-
-        seen_role_ids: set[int] = set()
+            cached = _RBAC_EFFECTIVE_PERMS_CACHE.get(cache_key)
+            if cached is not None:
+                # Return a copy to avoid accidental mutation of cached set.
+                return set(cached)
+
+        if rid:
+            codes = set(db.session.execute(
+                db.select(RBACPermission.code)
+                .join(rbac_role_effective_permissions, rbac_role_effective_permissions.c.permission_id == RBACPermission.id)
+                .where(rbac_role_effective_permissions.c.role_id == rid)
+            ).scalars())
+            if not codes and not self._is_materialized():
+                codes = self.collect_permission_codes()
+        else:
+            codes = self.collect_permission_codes()
+
+        if rid and ttl > 0:
+            try:
+                _RBAC_EFFECTIVE_PERMS_CACHE.set(cache_key, frozenset(codes), ttl=max(1, ttl))
+            except Exception:
+                pass
+        return codes
+
+    def _is_materialized(self) -> bool:
+        # Every role in a materialized org has its depth-0 closure row.
+        return db.session.execute(
+            db.select(rbac_role_closure.c.depth).where(
+                rbac_role_closure.c.role_id == self.id, rbac_role_closure.c.ancestor_role_id == self.id
+            )
+        ).first() is not None
+
+    def collect_permission_codes(self) -> set[str]:
+        """Walk direct + inherited permissions in memory (unflushed roles, unmaterialized rows)."""
+        seen_roles: set[int] = set()
         codes: set[str] = set()
 
         def walk(role: 'RBACRole') -> None:
-            if not role or not role.id:
+            # id() rather than role.id: unflushed roles have no id yet.
+            if not role or id(role) in seen_roles:
                 return
-            rid = int(role.id)
-            if rid in seen_role_ids:
-                return
-            seen_role_ids.add(rid)
+            seen_roles.add(id(role))
 
             for perm in (role.permissions or []):
                 c = (getattr(perm, 'code', None) or '').strip()
@@ -379,17 +618,34 @@ class RBACRole(db.Model):
                 walk(inherited)
 
         walk(self)
-
-        if rid and ttl > 0:
-            try:
-                expires_at = time.monotonic() + max(1, ttl)
-                with _RBAC_EFFECTIVE_PERMS_CACHE_LOCK:
-                    _RBAC_EFFECTIVE_PERMS_CACHE[rid] = (expires_at, set(codes))
-            except Exception:
-                pass
         return codes
 
 
+@event.listens_for(db.session, 'after_flush')
+def _materialize_role_permissions(session, _flush_context):
+    # A role's effective permissions include inherited roles, so an edit to any role
+    # rebuilds its whole org (closure, flattened grants and masks) in the same transaction.
+    org_ids: set[int] = set()
+    deleted_role_ids: set[int] = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, RBACRole) or not obj.organization_id:
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        org_ids.add(int(obj.organization_id))
+        if obj in session.deleted and obj.id:
+            deleted_role_ids.add(int(obj.id))
+    if not org_ids:
+        return
+
+    from app.services.rbac import materialize_role_permissions
+
+    masks = materialize_role_permissions(session.connection(), org_ids, deleted_role_ids)
+    for obj in list(session.identity_map.values()):
+        if isinstance(obj, RBACRole) and obj.id in masks:
+            set_committed_value(obj, 'permission_mask', masks[obj.id])
+
+
 class LoginEvent(db.Model):
     __tablename__ = 'login_events'
 
@@ -424,4 +680,30 @@ class SuspiciousIP(db.Model):
 
     __table_args__ = (
         db.Index('ix_suspicious_ips_blocked_until', 'blocked_until'),
-    )
\ No newline at end of file
+    )
+
+
+class CacheGeneration(db.Model):
+    """Invalidation counter for one cache scope (see services.cache_generations).
+
+    scope_id 0 is the namespace head, bumped with every scope in the namespace.
+    """
+    __tablename__ = 'cache_generations'
+
+    namespace = db.Column(db.String(64), primary_key=True)
+    scope_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    generation = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+
+# Writes that change cached permissions, org switcher context or logos on other workers.
+# 'rbac' and 'org' are scoped by organization id, 'user' by user id.
+track_changes(RBACRole, 'rbac', 'organization_id')
+track_changes(OrganizationMembership, 'user', 'user_id')
+track_changes(Organization, 'org', 'id')
+track_changes(Department, 'org', 'organization_id')
+watch_generation(
+    'rbac',
+    lambda org_id: _RBAC_EFFECTIVE_PERMS_CACHE.clear() if org_id is None
+    else _RBAC_EFFECTIVE_PERMS_CACHE.delete_prefix((org_id,)),
+)
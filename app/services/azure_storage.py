@@ -1,15 +1,97 @@
-import os
 import uuid
-from datetime import datetime, timezone
-from azure.storage.blob import BlobServiceClient, BlobClient, ContainerClient
-from azure.storage.filedatalake import DataLakeServiceClient, DataLakeFileClient
-from azure.core.exceptions import AzureError, ResourceNotFoundError
+import base64
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from azure.core import MatchConditions
+from azure.core.exceptions import AzureError, ResourceModifiedError, ResourceNotFoundError
 from flask import current_app
+from app.services.storage import DocumentStorage
+from app.services.storage_clients import (
+    container_checked,
+    get_blob_service_client,
+    get_datalake_service_client,
+    mark_container_checked,
+)
+from app.services.storage_listing import (
+    ListingTokenError,
+    decode_listing_token,
+    encode_listing_token,
+    iter_listing_pages,
+    newest_files,
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
-class AzureBlobStorageService:
+
+_DEFAULT_UPLOAD_BLOCK_SIZE = 4 * 1024 * 1024
+_DEFAULT_DOWNLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def _block_id(index):
+    """Return a fixed-width base64 block id (all ids in a blob must be the same length)."""
+    return base64.b64encode(f'{index:08d}'.encode('ascii')).decode('ascii')
+
+
+def _iter_blocks(file_stream, block_size):
+    """Yield (offset, bytes) blocks from a stream without reading it all at once."""
+    offset = 0
+    while True:
+        chunk = file_stream.read(block_size)
+        if not chunk:
+            return
+        yield offset, chunk
+        offset += len(chunk)
+
+
+def _version_condition(etag):
+    """download_blob() kwargs that fail with ResourceModifiedError unless the blob still has `etag`."""
+    if not etag:
+        return {}
+    return {'etag': etag, 'match_condition': MatchConditions.IfNotModified}
+
+
+def _run_bounded(blocks, transfer, max_concurrency):
+    """Run transfer(index, offset, chunk) for each block on a small thread pool.
+
+    At most `max_concurrency` blocks are in flight, so peak memory is roughly
+    (max_concurrency + 1) blocks regardless of the file size.
+
+    Returns:
+        tuple: (block_count, total_bytes)
+    """
+    max_concurrency = max(1, int(max_concurrency or 1))
+    count = 0
+    total = 0
+
+    if max_concurrency == 1:
+        for offset, chunk in blocks:
+            transfer(count, offset, chunk)
+            count += 1
+            total += len(chunk)
+        return count, total
+
+    with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='blob-upload') as pool:
+        in_flight = set()
+        try:
+            for offset, chunk in blocks:
+                if len(in_flight) >= max_concurrency:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        fut.result()
+                in_flight.add(pool.submit(transfer, count, offset, chunk))
+                count += 1
+                total += len(chunk)
+            for fut in in_flight:
+                fut.result()
+        except Exception:
+            for fut in in_flight:
+                fut.cancel()
+            raise
+    return count, total
+
+
+class AzureBlobStorageService(DocumentStorage):
     """Service class for Azure Data Lake Storage Gen2 operations."""
     
     def __init__(self):
@@ -18,6 +100,9 @@ class AzureBlobStorageService:
         self.blob_service_client = None
         self.datalake_service_client = None
         self._container_checked = False
+        self.upload_chunked = True
+        self.upload_block_size = _DEFAULT_UPLOAD_BLOCK_SIZE
+        self.upload_max_concurrency = 2
         self._initialize()
     
     def _initialize(self):
@@ -25,16 +110,32 @@ class AzureBlobStorageService:
         try:
             self.connection_string = current_app.config.get('AZURE_STORAGE_CONNECTION_STRING')
             self.container_name = current_app.config.get('AZURE_CONTAINER_NAME', 'compliance-documents')
+            self.upload_chunked = bool(current_app.config.get('AZURE_UPLOAD_CHUNKED', True))
+            self.upload_block_size = max(
+                64 * 1024,
+                int(current_app.config.get('AZURE_UPLOAD_BLOCK_SIZE') or _DEFAULT_UPLOAD_BLOCK_SIZE),
+            )
+            self.upload_max_concurrency = max(1, int(current_app.config.get('AZURE_UPLOAD_MAX_CONCURRENCY') or 2))
             
             if not self.connection_string:
                 logger.warning("Azure Storage connection string not configured")
                 return
             
+            # Keep the first GET small so streamed downloads start quickly regardless of file size.
+            download_chunk_size = int(
+                current_app.config.get('AZURE_DOWNLOAD_CHUNK_SIZE') or _DEFAULT_DOWNLOAD_CHUNK_SIZE
+            )
+
             # Blob client is required. ADLS Gen2 (DataLake) is optional depending on account capabilities.
-            self.blob_service_client = BlobServiceClient.from_connection_string(self.connection_string)
+            # Both come from the per-process registry so requests reuse pooled keep-alive connections.
+            self.blob_service_client = get_blob_service_client(
+                self.connection_string,
+                max_single_get_size=download_chunk_size,
+                max_chunk_get_size=download_chunk_size,
+            )
 
             try:
-                self.datalake_service_client = DataLakeServiceClient.from_connection_string(self.connection_string)
+                self.datalake_service_client = get_datalake_service_client(self.connection_string)
             except Exception as e:
                 self.datalake_service_client = None
                 logger.warning(f"DataLakeServiceClient init failed; continuing with Blob-only mode: {e}")
@@ -42,8 +143,8 @@ class AzureBlobStorageService:
             # IMPORTANT: Do NOT call Azure to check/create containers here.
             # This class is sometimes instantiated during page renders just to
             # check configuration. Network calls here can add seconds of latency.
-            # We defer container existence checks until the first upload.
-            self._container_checked = False
+            # We defer container existence checks until the first upload, once per process.
+            self._container_checked = container_checked(self.connection_string, self.container_name)
             
         except Exception as e:
             logger.error(f"Failed to initialize Azure Storage client: {e}")
@@ -93,38 +194,12 @@ class AzureBlobStorageService:
         return (self.connection_string is not None and self.blob_service_client is not None)
 
     def _ensure_container_exists_once(self):
-        """Ensure container/file system exists once per service instance."""
+        """Ensure container/file system exists once per process."""
         if self._container_checked:
             return
         self._ensure_container_exists()
         self._container_checked = True
-    
-    def generate_blob_name(self, original_filename, user_id, organization_id=None):
-        """Generate a unique file path for ADLS Gen2."""
-        # Get file extension
-        file_ext = os.path.splitext(original_filename)[1].lower()
-        
-        # Generate unique identifier
-        unique_id = str(uuid.uuid4())
-        
-        # Create timestamp
-        now = datetime.now(timezone.utc)
-        timestamp = now.strftime('%Y%m%d_%H%M%S')
-        
-        # Create organized folder structure for ADLS
-        year = now.strftime('%Y')
-        month = now.strftime('%m')
-        
-        # Combine to create unique file path with organized structure
-        if organization_id:
-            file_path = (
-                f"organizations/{organization_id}/documents/{year}/{month}/"
-                f"user_{user_id}/{timestamp}_{unique_id}{file_ext}"
-            )
-        else:
-            file_path = f"compliance-docs/{year}/{month}/user_{user_id}/{timestamp}_{unique_id}{file_ext}"
-        
-        return file_path
+        mark_container_checked(self.connection_string, self.container_name)
     
     def upload_file(self, file_stream, file_path, content_type=None, metadata=None):
         """
@@ -154,14 +229,18 @@ class AzureBlobStorageService:
             if self.datalake_service_client is not None:
                 try:
                     file_system_client = self.datalake_service_client.get_file_system_client(self.container_name)
-                    file_client = file_system_client.get_file_client(file_path)
 
-                    # Upload file data
-                    file_client.upload_data(
-                        data=file_stream.read(),
-                        overwrite=True,
-                        metadata=metadata,
-                    )
+                    if self.upload_chunked:
+                        file_client = self._upload_adls_in_blocks(
+                            file_system_client, file_path, file_stream, content_type, metadata
+                        )
+                    else:
+                        file_client = file_system_client.get_file_client(file_path)
+                        file_client.upload_data(
+                            data=file_stream.read(),
+                            overwrite=True,
+                            metadata=metadata,
+                        )
 
                     file_properties = file_client.get_file_properties()
 
@@ -188,19 +267,22 @@ class AzureBlobStorageService:
                 blob=file_path
             )
 
-            upload_params = {
-                'data': file_stream,
-                'overwrite': True
-            }
+            if self.upload_chunked:
+                self._upload_blob_in_blocks(blob_client, file_stream, content_type, metadata)
+            else:
+                upload_params = {
+                    'data': file_stream,
+                    'overwrite': True
+                }
 
-            if content_type:
-                from azure.storage.blob import ContentSettings
-                upload_params['content_settings'] = ContentSettings(content_type=content_type)
+                if content_type:
+                    from azure.storage.blob import ContentSettings
+                    upload_params['content_settings'] = ContentSettings(content_type=content_type)
 
-            if metadata:
-                upload_params['metadata'] = metadata
+                if metadata:
+                    upload_params['metadata'] = metadata
 
-            blob_client.upload_blob(**upload_params)
+                blob_client.upload_blob(**upload_params)
 
             blob_properties = blob_client.get_blob_properties()
 
@@ -229,12 +311,178 @@ class AzureBlobStorageService:
                 'error_code': 'UPLOAD_ERROR'
             }
     
-    def download_file(self, blob_name):
+    def _upload_blob_in_blocks(self, blob_client, file_stream, content_type=None, metadata=None):
+        """Stage fixed-size blocks and commit them, keeping only a few blocks in memory."""
+        from azure.storage.blob import BlobBlock, ContentSettings
+
+        def stage(index, offset, chunk):
+            blob_client.stage_block(block_id=_block_id(index), data=chunk, length=len(chunk))
+
+        count, total = _run_bounded(
+            _iter_blocks(file_stream, self.upload_block_size),
+            stage,
+            self.upload_max_concurrency,
+        )
+
+        commit_params = {
+            'block_list': [BlobBlock(block_id=_block_id(i)) for i in range(count)],
+        }
+        if content_type:
+            commit_params['content_settings'] = ContentSettings(content_type=content_type)
+        if metadata:
+            commit_params['metadata'] = metadata
+
+        blob_client.commit_block_list(**commit_params)
+        logger.info(f"Committed {count} blocks ({total} bytes) to {blob_client.blob_name}")
+        return total
+
+    def _upload_adls_in_blocks(self, file_system_client, file_path, file_stream, content_type=None, metadata=None):
+        """
+        Append fixed-size ranges to a temporary ADLS file, flush once, then rename it into place.
+        
+        `file_path` never holds an empty or partial file: a failed upload deletes the
+        temporary file and leaves any existing file at `file_path` untouched.
+        
+        Returns:
+            DataLakeFileClient: Client for the file at `file_path`
+        """
+        from azure.storage.filedatalake import ContentSettings
+
+        temp_path = f'{file_path}.uploading-{uuid.uuid4().hex}'
+        file_client = file_system_client.get_file_client(temp_path)
+
+        create_params = {}
+        if content_type:
+            create_params['content_settings'] = ContentSettings(content_type=content_type)
+        if metadata:
+            create_params['metadata'] = metadata
+        file_client.create_file(**create_params)
+
+        try:
+            def append(index, offset, chunk):
+                file_client.append_data(data=chunk, offset=offset, length=len(chunk))
+
+            _count, total = _run_bounded(
+                _iter_blocks(file_stream, self.upload_block_size),
+                append,
+                self.upload_max_concurrency,
+            )
+
+            flush_params = {}
+            if content_type:
+                flush_params['content_settings'] = ContentSettings(content_type=content_type)
+            file_client.flush_data(total, **flush_params)
+            return file_client.rename_file(f'{self.container_name}/{file_path}')
+        except Exception:
+            try:
+                file_client.delete_file()
+            except Exception as cleanup_error:
+                logger.warning(f"Could not delete partial upload {temp_path}: {cleanup_error}")
+            raise
+
+    def stage_chunk(self, blob_name, index, data):
+        """
+        Stage one chunk of a resumable upload as an uncommitted block.
+        
+        Block ids are derived from the chunk index, so re-sending a chunk after a
+        dropped connection simply replaces the staged block.
+        
+        Returns:
+            dict: Result with success status
+        """
+        if not self.is_configured():
+            return {
+                'success': False,
+                'error': 'Azure Storage not configured',
+                'error_code': 'STORAGE_NOT_CONFIGURED'
+            }
+        
+        try:
+            blob_client = self.blob_service_client.get_blob_client(
+                container=self.container_name,
+                blob=blob_name
+            )
+            blob_client.stage_block(block_id=_block_id(int(index)), data=data, length=len(data))
+            return {'success': True, 'size': len(data)}
+        except AzureError as e:
+            logger.error(f"Azure error staging chunk {index} of {blob_name}: {e}")
+            return {
+                'success': False,
+                'error': f'Azure storage error: {str(e)}',
+                'error_code': 'AZURE_ERROR'
+            }
+        except Exception as e:
+            logger.error(f"Unexpected error staging chunk {index} of {blob_name}: {e}")
+            return {
+                'success': False,
+                'error': f'Upload failed: {str(e)}',
+                'error_code': 'UPLOAD_ERROR'
+            }
+    
+    def commit_chunks(self, blob_name, chunk_count, content_type=None, metadata=None):
+        """
+        Commit staged chunks 0..chunk_count-1 (in order) as the blob's content.
+        
+        Returns:
+            dict: Upload result with success status and blob properties
+        """
+        if not self.is_configured():
+            return {
+                'success': False,
+                'error': 'Azure Storage not configured',
+                'error_code': 'STORAGE_NOT_CONFIGURED'
+            }
+        
+        try:
+            from azure.storage.blob import BlobBlock, ContentSettings
+            
+            self._ensure_container_exists_once()
+            blob_client = self.blob_service_client.get_blob_client(
+                container=self.container_name,
+                blob=blob_name
+            )
+            commit_params = {}
+            if content_type:
+                commit_params['content_settings'] = ContentSettings(content_type=content_type)
+            if metadata:
+                commit_params['metadata'] = metadata
+            blob_client.commit_block_list(
+                [BlobBlock(block_id=_block_id(i)) for i in range(int(chunk_count))],
+                **commit_params
+            )
+            
+            blob_properties = blob_client.get_blob_properties()
+            return {
+                'success': True,
+                'file_path': blob_name,
+                'size': blob_properties.size,
+                'last_modified': blob_properties.last_modified,
+                'etag': blob_properties.etag,
+                'url': blob_client.url,
+                'storage_type': 'Blob_Storage'
+            }
+        except AzureError as e:
+            logger.error(f"Azure error committing chunks of {blob_name}: {e}")
+            return {
+                'success': False,
+                'error': f'Azure storage error: {str(e)}',
+                'error_code': 'AZURE_ERROR'
+            }
+        except Exception as e:
+            logger.error(f"Unexpected error committing chunks of {blob_name}: {e}")
+            return {
+                'success': False,
+                'error': f'Upload failed: {str(e)}',
+                'error_code': 'UPLOAD_ERROR'
+            }
+    
+    def download_file(self, blob_name, etag=None):
         """
         Download a file from Azure Blob Storage.
         
         Args:
             blob_name: Name of the blob to download
+            etag: Only download this version of the blob (None for any)
         
         Returns:
             dict: Download result with success status and file data
@@ -252,11 +500,9 @@ class AzureBlobStorageService:
                 blob=blob_name
             )
             
-            # Download the blob
-            blob_data = blob_client.download_blob()
-            
-            # Get blob properties
-            blob_properties = blob_client.get_blob_properties()
+            # Download the blob (the downloader already carries the blob properties)
+            blob_data = blob_client.download_blob(**_version_condition(etag))
+            blob_properties = blob_data.properties
             
             return {
                 'success': True,
@@ -266,6 +512,13 @@ class AzureBlobStorageService:
                 'last_modified': blob_properties.last_modified
             }
             
+        except ResourceModifiedError:
+            logger.error(f"Blob changed since it was recorded: {blob_name}")
+            return {
+                'success': False,
+                'error': 'File has changed since it was uploaded',
+                'error_code': 'FILE_CHANGED'
+            }
         except ResourceNotFoundError:
             logger.error(f"Blob not found: {blob_name}")
             return {
@@ -288,6 +541,83 @@ class AzureBlobStorageService:
                 'error_code': 'DOWNLOAD_ERROR'
             }
     
+    def open_download(self, blob_name, offset=None, length=None, etag=None):
+        """
+        Open a streaming download of a blob, optionally limited to a byte range.
+        
+        Args:
+            blob_name: Name of the blob to download
+            offset: First byte to return (None for the start of the blob)
+            length: Number of bytes to return (None for the rest of the blob)
+            etag: Only download this version of the blob (None for any)
+        
+        Returns:
+            dict: Result with success status, a `chunks` iterator and blob properties
+        """
+        if not self.is_configured():
+            return {
+                'success': False,
+                'error': 'Azure Storage not configured',
+                'error_code': 'STORAGE_NOT_CONFIGURED'
+            }
+        
+        try:
+            blob_client = self.blob_service_client.get_blob_client(
+                container=self.container_name,
+                blob=blob_name
+            )
+            
+            # Only the first chunk is fetched here; the rest is pulled lazily by `chunks`.
+            downloader = blob_client.download_blob(offset=offset, length=length, **_version_condition(etag))
+            properties = downloader.properties
+            
+            total_size = properties.size
+            content_range = getattr(properties, 'content_range', None) or ''
+            if '/' in content_range:
+                try:
+                    total_size = int(content_range.rsplit('/', 1)[1])
+                except ValueError:
+                    pass
+            
+            return {
+                'success': True,
+                'chunks': downloader.chunks(),
+                'size': downloader.size,
+                'total_size': total_size,
+                'content_type': properties.content_settings.content_type,
+                'etag': properties.etag,
+                'last_modified': properties.last_modified
+            }
+            
+        except ResourceModifiedError:
+            logger.error(f"Blob changed since it was recorded: {blob_name}")
+            return {
+                'success': False,
+                'error': 'File has changed since it was uploaded',
+                'error_code': 'FILE_CHANGED'
+            }
+        except ResourceNotFoundError:
+            logger.error(f"Blob not found: {blob_name}")
+            return {
+                'success': False,
+                'error': 'File not found',
+                'error_code': 'FILE_NOT_FOUND'
+            }
+        except AzureError as e:
+            logger.error(f"Azure error opening download for {blob_name}: {e}")
+            return {
+                'success': False,
+                'error': f'Azure storage error: {str(e)}',
+                'error_code': 'AZURE_ERROR'
+            }
+        except Exception as e:
+            logger.error(f"Unexpected error opening download for {blob_name}: {e}")
+            return {
+                'success': False,
+                'error': f'Download failed: {str(e)}',
+                'error_code': 'DOWNLOAD_ERROR'
+            }
+    
     def delete_file(self, blob_name):
         """
         Delete a file from Azure Blob Storage.
@@ -394,15 +724,89 @@ class AzureBlobStorageService:
                 'error_code': 'URL_ERROR'
             }
     
-    def list_files(self, prefix=None):
+    def get_upload_url(self, blob_name, expiry_minutes=15):
+        """
+        Generate a short-lived, create-only SAS URL scoped to a single blob.
+        
+        The browser PUTs the file straight to storage with this URL; the server
+        never sees the bytes. The URL can create the blob once but never overwrite
+        it, so the bytes verified at commit are the bytes that stay stored.
+        
+        Args:
+            blob_name: Name of the blob the client may create
+            expiry_minutes: Minutes until the URL expires
+        
+        Returns:
+            dict: Result with success status, URL and the headers the PUT must send
+        """
+        if not self.is_configured():
+            return {
+                'success': False,
+                'error': 'Azure Storage not configured',
+                'error_code': 'STORAGE_NOT_CONFIGURED'
+            }
+        
+        try:
+            from azure.storage.blob import generate_blob_sas, BlobSasPermissions
+            from datetime import timedelta
+            
+            blob_client = self.blob_service_client.get_blob_client(
+                container=self.container_name,
+                blob=blob_name
+            )
+            
+            # Create only: the URL cannot read, list, delete or overwrite an existing blob.
+            sas_token = generate_blob_sas(
+                account_name=blob_client.account_name,
+                container_name=self.container_name,
+                blob_name=blob_name,
+                account_key=blob_client.credential.account_key,
+                permission=BlobSasPermissions(create=True),
+                expiry=datetime.utcnow() + timedelta(minutes=expiry_minutes)
+            )
+            
+            return {
+                'success': True,
+                'url': f"{blob_client.url}?{sas_token}",
+                'method': 'PUT',
+                'headers': {'x-ms-blob-type': 'BlockBlob', 'If-None-Match': '*'},
+                'expires_in_seconds': int(expiry_minutes * 60)
+            }
+            
+        except Exception as e:
+            logger.error(f"Error generating upload URL for {blob_name}: {e}")
+            return {
+                'success': False,
+                'error': f'URL generation failed: {str(e)}',
+                'error_code': 'URL_ERROR'
+            }
+    
+    @staticmethod
+    def _listed_file(blob):
+        name = getattr(blob, 'name', '')
+        if name.endswith('/'):
+            return name
+        return {
+            'name': name,
+            'size': blob.size,
+            'last_modified': blob.last_modified,
+            'content_type': blob.content_settings.content_type if blob.content_settings else None
+        }
+
+    def list_files(self, prefix=None, max_results=None, continuation_token=None, newest=False):
         """
         List files in the container.
         
         Args:
             prefix: Optional prefix to filter blobs
+            max_results: Return one page of at most this many files
+            continuation_token: Token from a previous page for the same prefix
+            newest: With max_results, return the newest files first (date folders
+                are walked newest first, older ones are not listed)
         
         Returns:
-            dict: Result with success status and list of files
+            dict: Result with success status, list of files and the continuation_token
+            of the next page (None on the last page)
         """
         if not self.is_configured():
             return {
@@ -413,22 +817,50 @@ class AzureBlobStorageService:
         
         try:
             container_client = self.blob_service_client.get_container_client(self.container_name)
-            
-            blobs = container_client.list_blobs(name_starts_with=prefix)
-            
+
+            if newest and max_results:
+                def list_level(level_prefix):
+                    files, sub_prefixes = [], []
+                    pager = container_client.walk_blobs(name_starts_with=level_prefix, delimiter='/')
+                    for items, prefixes, _token in iter_listing_pages(pager, self._listed_file):
+                        files.extend(items)
+                        sub_prefixes.extend(prefixes)
+                    return files, sub_prefixes
+
+                file_list = newest_files(
+                    list_level, prefix, int(max_results),
+                    key=lambda f: (f['last_modified'] is not None, f['last_modified']),
+                )
+                return {
+                    'success': True,
+                    'files': file_list,
+                    'count': len(file_list),
+                    'continuation_token': None
+                }
+
+            try:
+                _source, token = decode_listing_token(continuation_token, prefix)
+            except ListingTokenError as e:
+                return {
+                    'success': False,
+                    'error': str(e),
+                    'error_code': 'INVALID_CONTINUATION_TOKEN'
+                }
+
+            blobs = container_client.list_blobs(name_starts_with=prefix, results_per_page=max_results or None)
+
             file_list = []
-            for blob in blobs:
-                file_list.append({
-                    'name': blob.name,
-                    'size': blob.size,
-                    'last_modified': blob.last_modified,
-                    'content_type': blob.content_settings.content_type if blob.content_settings else None
-                })
+            next_token = None
+            for items, _prefixes, next_token in iter_listing_pages(blobs, self._listed_file, token):
+                file_list.extend(items)
+                if max_results:
+                    break
             
             return {
                 'success': True,
                 'files': file_list,
-                'count': len(file_list)
+                'count': len(file_list),
+                'continuation_token': encode_listing_token(prefix, next_token) if max_results else None
             }
             
         except AzureError as e:
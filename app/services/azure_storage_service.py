@@ -15,10 +15,13 @@ except ImportError:
     BlobServiceClient = None
     ResourceNotFoundError = Exception
 
+from app.services.storage import AssetStorage
+from app.services.storage_clients import get_blob_service_client
+
 logger = logging.getLogger(__name__)
 
 
-class AzureStorageService:
+class AzureStorageService(AssetStorage):
     """Service to interact with Azure Blob Storage for org assets (logos, branding, etc.).
 
     Uses AZURE_LOGOS_CONTAINER_NAME exclusively.
@@ -29,48 +32,43 @@ class AzureStorageService:
         self.account_name = os.getenv('AZURE_STORAGE_ACCOUNT_NAME', 'cenarisprodsa')
         self.logos_container_name = os.getenv('AZURE_LOGOS_CONTAINER_NAME') or 'logos'
         
-        # Initialize client
-        self.blob_service_client = None
+        self.connection_string = None
+        self._connect_timeout = 3
+        self._read_timeout = 5
         self._initialize_client()
     
     def _initialize_client(self):
-        """Initialize the Blob Service client."""
+        """Read client settings; the client itself comes from the shared registry."""
         try:
             # Get connection string from environment
-            connection_string = os.getenv('AZURE_STORAGE_CONNECTION_STRING')
+            self.connection_string = os.getenv('AZURE_STORAGE_CONNECTION_STRING')
             
-            if connection_string and BlobServiceClient:
-                # Network timeouts (best-effort; supported by azure-storage-blob via azure-core).
-                connect_timeout = int(os.getenv('AZURE_BLOB_CONNECTION_TIMEOUT_SECONDS', '3') or 3)
-                read_timeout = int(os.getenv('AZURE_BLOB_READ_TIMEOUT_SECONDS', '5') or 5)
-                try:
-                    self.blob_service_client = BlobServiceClient.from_connection_string(
-                        connection_string,
-                        connection_timeout=connect_timeout,
-                        read_timeout=read_timeout,
-                    )
-                except TypeError:
-                    # Older/newer SDK variants may not accept these kwargs.
-                    self.blob_service_client = BlobServiceClient.from_connection_string(connection_string)
-                logger.info("Azure Blob Storage client initialized successfully")
+            if self.connection_string and BlobServiceClient:
+                # Network timeouts (applied on the shared pooled transport).
+                self._connect_timeout = int(os.getenv('AZURE_BLOB_CONNECTION_TIMEOUT_SECONDS', '3') or 3)
+                self._read_timeout = int(os.getenv('AZURE_BLOB_READ_TIMEOUT_SECONDS', '5') or 5)
+                logger.info("Azure Blob Storage client configured")
             else:
                 logger.warning("No Azure connection string found - blob operations will fail")
-                self.blob_service_client = None
+                self.connection_string = None
         except Exception as e:
             logger.error(f"Failed to initialize Azure Blob Storage client: {e}")
-            self.blob_service_client = None
-    
-    def _get_org_folder(self, organization_id: int) -> str:
-        """
-        Get the organization-specific folder path.
-        
-        Args:
-            organization_id: ID of the organization
-            
-        Returns:
-            Folder path string (e.g., "org_123/")
-        """
-        return f"org_{organization_id}/"
+            self.connection_string = None
+
+    @property
+    def blob_service_client(self):
+        """Per-process pooled client (looked up each time so forked workers get their own)."""
+        if not self.connection_string:
+            return None
+        try:
+            return get_blob_service_client(
+                self.connection_string,
+                connection_timeout=self._connect_timeout,
+                read_timeout=self._read_timeout,
+            )
+        except Exception as e:
+            logger.error(f"Failed to initialize Azure Blob Storage client: {e}")
+            return None
     
     def upload_blob(self, blob_name: str, data: bytes, content_type: str = None, organization_id: int = None) -> bool:
         """
@@ -0,0 +1,272 @@
+"""
+Bounded in-process caches.
+
+The app used to keep one hand-rolled TTL dict per feature (org switcher context, org
+logos, RBAC permission sets, dashboard summaries, ADLS listings, ...), none of them
+size-bounded. BoundedCache replaces them: LRU order plus a per-entry TTL, an entry
+budget and an optional byte budget per namespace, thread safety, invalidation by key
+or key prefix, and hit/miss/eviction counters.
+
+    logos = get_cache('org_logo', max_entries=256, max_bytes=32 * 1024 * 1024)
+    logos.set((org_id, blob_name), (data, content_type), ttl=3600)
+    logos.get((org_id, blob_name))
+    logos.delete_prefix((org_id,))
+
+Budgets can be overridden per namespace with CACHE_<NAMESPACE>_MAX_ENTRIES and
+CACHE_<NAMESPACE>_MAX_BYTES. Caches are per process; namespaces created with
+shared=True also use the cross-worker backend selected by CACHE_URL (see shared_cache).
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+from app.services.shared_cache import encode_key, namespace_prefixes, shared_cache_backend
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def approx_size(value, _depth=0) -> int:
+    """Rough deep size in bytes of plain data (bytes, str, numbers, containers)."""
+    size = sys.getsizeof(value)
+    if _depth > 8:
+        return size
+    if isinstance(value, dict):
+        size += sum(approx_size(k, _depth + 1) + approx_size(v, _depth + 1) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(approx_size(item, _depth + 1) for item in value)
+    return size
+
+
+def _key_has_prefix(key, prefix) -> bool:
+    if isinstance(key, tuple) and isinstance(prefix, tuple):
+        return key[:len(prefix)] == prefix
+    if isinstance(key, str) and isinstance(prefix, str):
+        return key.startswith(prefix)
+    return False
+
+
+class BoundedCache:
+    """Thread-safe LRU cache with per-entry TTL and entry/byte budgets."""
+
+    def __init__(self, namespace: str, max_entries: int = 1024, max_bytes: int | None = None,
+                 default_ttl: float | None = None, sizeof=None, shared: bool = False):
+        self.namespace = namespace
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = int(max_bytes) if max_bytes else None
+        self.default_ttl = default_ttl
+        self.sizeof = sizeof or approx_size
+        self.shared = shared
+        self._lock = threading.Lock()
+        # key -> (value, expires_at or None, size)
+        self._entries: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._stats = {
+            'hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0,
+            'shared_hits': 0, 'shared_misses': 0, 'shared_errors': 0,
+        }
+
+    def _backend(self):
+        return shared_cache_backend() if self.shared else None
+
+    def _shared_call(self, operation, *args):
+        """Run a backend operation; errors are counted and logged, never raised."""
+        backend = self._backend()
+        if backend is None:
+            return None
+        try:
+            return getattr(backend, operation)(*args)
+        except Exception as e:
+            with self._lock:
+                self._stats['shared_errors'] += 1
+            logger.warning(f"Shared cache {operation} failed for '{self.namespace}': {e}")
+            return None
+
+    @staticmethod
+    def _local_ttl(ttl):
+        # Bounds how long this worker keeps a value another worker has since deleted.
+        local_max = float(_env_int('CACHE_LOCAL_TTL_SECONDS', 5))
+        return local_max if ttl is None else min(ttl, local_max)
+
+    def _drop(self, key):
+        _value, _expires_at, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key, default=None):
+        """Cached value for `key`, or `default` when missing or expired."""
+        value = self._get_local(key)
+        if value is not _MISSING:
+            return value
+        if self._backend() is None:
+            return default
+
+        found = self._shared_call('get', encode_key(self.namespace, key))
+        with self._lock:
+            self._stats['shared_hits' if found is not None else 'shared_misses'] += 1
+        if found is None:
+            return default
+        value, expires_at = found
+        remaining = expires_at - time.time() if expires_at is not None else None
+        if remaining is None or remaining > 0:
+            self._set_local(key, value, self._local_ttl(remaining))
+        return value
+
+    def _get_local(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self._stats['misses'] += 1
+                return _MISSING
+            value, expires_at, _size = entry
+            if expires_at is not None and now >= expires_at:
+                self._drop(key)
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+
+    def set(self, key, value, ttl: float | None = None) -> bool:
+        """
+        Store `value` for `ttl` seconds (default_ttl when None; no expiry when both are None).
+
+        Least recently used entries are evicted to stay within the budgets. Returns False
+        (and stores nothing) when the value alone exceeds the byte budget or ttl <= 0.
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl is not None and ttl <= 0:
+            return False
+        size = self.sizeof(value) if self.max_bytes else 0
+        if self.max_bytes and size > self.max_bytes:
+            self.delete(key)
+            return False
+
+        if self._backend() is not None:
+            self._shared_call('set', encode_key(self.namespace, key), value, ttl)
+            ttl = self._local_ttl(ttl)
+        self._set_local(key, value, ttl, size)
+        return True
+
+    def _set_local(self, key, value, ttl, size=None):
+        if size is None:
+            size = self.sizeof(value) if self.max_bytes else 0
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            self._stats['sets'] += 1
+            while len(self._entries) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+
+    def delete(self, key) -> bool:
+        """Drop `key` here and, for shared namespaces, in the shared backend."""
+        self._shared_call('delete', encode_key(self.namespace, key))
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._drop(key)
+            self._stats['invalidations'] += 1
+            return True
+
+    def delete_prefix(self, prefix) -> int:
+        """Drop every key starting with `prefix` (tuple keys: leading elements; str keys: startswith)."""
+        if isinstance(prefix, (tuple, str)):
+            self._shared_call('delete_prefix', encode_key(self.namespace, prefix))
+        with self._lock:
+            keys = [key for key in self._entries if _key_has_prefix(key, prefix)]
+            for key in keys:
+                self._drop(key)
+            self._stats['invalidations'] += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        """Drop every entry of this namespace (including the shared backend's)."""
+        # Per separator, so clearing 'compliance_files' keeps 'compliance_files_failure'.
+        for prefix in namespace_prefixes(self.namespace):
+            self._shared_call('delete_prefix', prefix)
+        with self._lock:
+            self._stats['invalidations'] += len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+        stats['max_entries'] = self.max_entries
+        stats['max_bytes'] = self.max_bytes
+        stats['shared'] = self._backend() is not None
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 3) if lookups else None
+        return stats
+
+    def _reset_lock(self):
+        self._lock = threading.Lock()
+
+
+_CACHES: dict[str, BoundedCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def _env_int(name: str, default):
+    try:
+        value = os.getenv(name)
+        return int(value) if value else default
+    except ValueError:
+        return default
+
+
+def get_cache(namespace: str, max_entries: int = 1024, max_bytes: int | None = None,
+              default_ttl: float | None = None, sizeof=None, shared: bool = False) -> BoundedCache:
+    """Process-wide BoundedCache registered under `namespace` (budgets apply on first use)."""
+    with _CACHES_LOCK:
+        cache = _CACHES.get(namespace)
+        if cache is None:
+            env = f'CACHE_{namespace.upper()}'
+            cache = BoundedCache(
+                namespace,
+                max_entries=_env_int(f'{env}_MAX_ENTRIES', max_entries),
+                max_bytes=_env_int(f'{env}_MAX_BYTES', max_bytes),
+                default_ttl=default_ttl,
+                sizeof=sizeof,
+                shared=shared,
+            )
+            _CACHES[namespace] = cache
+        return cache
+
+
+def cache_stats() -> dict:
+    """Counters for every registered namespace in this process."""
+    with _CACHES_LOCK:
+        caches = dict(_CACHES)
+    return {name: cache.stats() for name, cache in sorted(caches.items())}
+
+
+def _reset_after_fork():
+    # A lock held by another thread at fork time would never be released in the child.
+    global _CACHES_LOCK
+    _CACHES_LOCK = threading.Lock()
+    for cache in _CACHES.values():
+        cache._reset_lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
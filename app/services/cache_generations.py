@@ -0,0 +1,263 @@
+"""
+Cluster-wide invalidation for per-process caches via the cache_generations table.
+
+An RBAC edit or membership change used to invalidate only the worker that handled it;
+every other worker kept serving the old value until its TTL ran out. Now writes that
+matter bump a counter row keyed by (namespace, scope_id) after commit, and each worker
+polls the table at most once per CACHE_GENERATION_CHECK_MS (default 1000) and drops
+the local entries of every scope whose generation moved.
+
+    track_changes(RBACRole, 'rbac', 'organization_id')       # bump on flush + commit
+    watch_generation('rbac', lambda org_id: ...)              # drop local entries
+    sync_generations()                                        # once per request
+
+Each namespace also has a head row (scope_id 0) bumped with every scope; its value is
+stamped on the scope rows, so an unchanged namespace costs one indexed read and a
+changed one returns exactly the scopes bumped since the last check. A callback receives
+None when the worker cannot tell which scopes changed and should drop everything.
+
+Values that outlive a worker (e.g. the RBAC principal snapshot in the signed session)
+record current_generations() when built and are revalidated with changed_since().
+"""
+
+import os
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+HEAD_SCOPE = 0
+_PENDING_KEY = 'cache_generation_bumps'
+
+_WATCHERS: dict[str, list] = {}
+_TRACKED: list[tuple[type, str, object]] = []
+_SEEN: dict[str, int] = {}
+# First head this process saw per namespace; bumps after it are in _SCOPE_GENERATIONS.
+_BASELINE: dict[str, int] = {}
+_SCOPE_GENERATIONS: dict[tuple[str, int], int] = {}
+_NEXT_CHECK = 0.0
+_LOCK = threading.Lock()
+
+
+def _check_interval_seconds() -> float:
+    try:
+        return max(0, int(os.getenv('CACHE_GENERATION_CHECK_MS') or 1000)) / 1000.0
+    except ValueError:
+        return 1.0
+
+
+def watch_generation(namespace: str, on_change) -> None:
+    """Call on_change(scope_id) when another worker (or this one) bumps a scope of `namespace`."""
+    _WATCHERS.setdefault(namespace, []).append(on_change)
+
+
+def track_changes(model, namespace: str, scope) -> None:
+    """Bump (namespace, scope) when a `model` row is inserted, changed or deleted.
+
+    `scope` is an attribute name or a callable returning the scope id (None to skip).
+    """
+    _TRACKED.append((model, namespace, scope))
+
+
+def _notify(namespace: str, scope_id) -> None:
+    for on_change in _WATCHERS.get(namespace, ()):
+        try:
+            on_change(scope_id)
+        except Exception as e:
+            logger.warning(f"Cache generation callback failed for '{namespace}': {e}")
+
+
+def _scope_of(obj, scope):
+    try:
+        value = scope(obj) if callable(scope) else getattr(obj, scope, None)
+        return int(value) if value else None
+    except Exception:
+        return None
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_bumps(session, _flush_context):
+    if not _TRACKED:
+        return
+    changed = list(session.new) + list(session.deleted)
+    changed += [obj for obj in session.dirty if session.is_modified(obj)]
+    if not changed:
+        return
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for obj in changed:
+        for model, namespace, scope in _TRACKED:
+            if isinstance(obj, model):
+                scope_id = _scope_of(obj, scope)
+                if scope_id is not None:
+                    pending.add((namespace, scope_id))
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_bumps(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        bump_generations(pending)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_bumps(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _upsert(conn, table, namespace, scope_id, generation=None):
+    """Set the row's generation (or increment it when generation is None)."""
+    values = {'updated_at': datetime.now(timezone.utc)}
+    values['generation'] = table.c.generation + 1 if generation is None else generation
+    where = (table.c.namespace == namespace) & (table.c.scope_id == scope_id)
+    if conn.execute(update(table).where(where).values(**values)).rowcount:
+        return
+    dialect = conn.dialect.name
+    row = {'namespace': namespace, 'scope_id': scope_id, 'updated_at': values['updated_at'],
+           'generation': 1 if generation is None else generation}
+    if dialect in {'postgresql', 'sqlite'}:
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table).values(**row)
+        # Lost the insert race: fall back to the increment/assignment above.
+        conn.execute(stmt.on_conflict_do_update(index_elements=['namespace', 'scope_id'], set_=values))
+    else:
+        conn.execute(table.insert().values(**row))
+
+
+def bump_generations(pairs) -> None:
+    """Bump every (namespace, scope_id) in `pairs` in one transaction, then drop local entries."""
+    from app import db
+    from app.models import CacheGeneration
+
+    table = CacheGeneration.__table__
+    by_namespace: dict[str, set[int]] = {}
+    for namespace, scope_id in pairs:
+        by_namespace.setdefault(namespace, set()).add(int(scope_id))
+
+    try:
+        with db.engine.begin() as conn:
+            # Sorted so concurrent bumps lock head rows in the same order.
+            for namespace in sorted(by_namespace):
+                _upsert(conn, table, namespace, HEAD_SCOPE)
+                head = conn.execute(
+                    select(table.c.generation).where(
+                        (table.c.namespace == namespace) & (table.c.scope_id == HEAD_SCOPE)
+                    )
+                ).scalar_one()
+                for scope_id in sorted(by_namespace[namespace]):
+                    _upsert(conn, table, namespace, scope_id, generation=head)
+                    _SCOPE_GENERATIONS[(namespace, scope_id)] = int(head)
+    except Exception as e:
+        # Other workers fall back to TTL expiry for this change.
+        logger.warning(f"Could not bump cache generations {sorted(by_namespace)}: {e}")
+
+    for namespace, scope_ids in by_namespace.items():
+        for scope_id in scope_ids:
+            _notify(namespace, scope_id)
+
+
+def sync_generations(force: bool = False) -> None:
+    """Drop local entries for scopes bumped since the last check (rate-limited per process)."""
+    global _NEXT_CHECK
+    if not _WATCHERS:
+        return
+    now = time.monotonic()
+    if not force and now < _NEXT_CHECK:
+        return
+    # Only one thread per process polls; the others keep serving.
+    if not _LOCK.acquire(blocking=force):
+        return
+    try:
+        _NEXT_CHECK = now + _check_interval_seconds()
+        _sync()
+    except Exception as e:
+        logger.debug(f"Cache generation check failed: {e}")
+    finally:
+        _LOCK.release()
+
+
+def _sync():
+    from app import db
+    from app.models import CacheGeneration
+
+    table = CacheGeneration.__table__
+    namespaces = sorted(_WATCHERS)
+    with db.engine.connect() as conn:
+        heads = dict(conn.execute(
+            select(table.c.namespace, table.c.generation).where(
+                (table.c.scope_id == HEAD_SCOPE) & table.c.namespace.in_(namespaces)
+            )
+        ).all())
+        for namespace in namespaces:
+            head = int(heads.get(namespace) or 0)
+            seen = _SEEN.get(namespace)
+            _SEEN[namespace] = head
+            if seen is None or head < seen:
+                # First check in this process only records the baseline. After a table
+                # reset scope generations are no longer comparable, so start over.
+                _BASELINE[namespace] = head
+                for key in [key for key in _SCOPE_GENERATIONS if key[0] == namespace]:
+                    del _SCOPE_GENERATIONS[key]
+                if seen is not None:
+                    _notify(namespace, None)
+                continue
+            if head == seen:
+                continue
+            rows = conn.execute(
+                select(table.c.scope_id, table.c.generation).where(
+                    (table.c.namespace == namespace)
+                    & (table.c.scope_id != HEAD_SCOPE)
+                    & (table.c.generation > seen)
+                )
+            ).all()
+            for scope_id, generation in rows:
+                _SCOPE_GENERATIONS[(namespace, int(scope_id))] = int(generation)
+                _notify(namespace, int(scope_id))
+
+
+def current_generations(namespaces) -> dict[str, int] | None:
+    """Head generation per namespace (0 when never bumped), or None when the table is unavailable."""
+    from app import db
+    from app.models import CacheGeneration
+
+    table = CacheGeneration.__table__
+    try:
+        with db.engine.connect() as conn:
+            heads = dict(conn.execute(
+                select(table.c.namespace, table.c.generation).where(
+                    (table.c.scope_id == HEAD_SCOPE) & table.c.namespace.in_(list(namespaces))
+                )
+            ).all())
+    except Exception as e:
+        logger.debug(f"Cache generation read failed: {e}")
+        return None
+    return {namespace: int(heads.get(namespace) or 0) for namespace in namespaces}
+
+
+def changed_since(namespace: str, scope_id: int, generation: int) -> bool:
+    """True unless this process knows (namespace, scope_id) has not been bumped past `generation`.
+
+    Only as current as the last sync_generations() check in this process.
+    """
+    baseline = _BASELINE.get(namespace)
+    if baseline is None or generation < baseline or generation > _SEEN.get(namespace, 0):
+        # Bumps before our baseline are unknown here; a generation ahead of our last
+        # check came from another worker's fresher read.
+        return True
+    return _SCOPE_GENERATIONS.get((namespace, int(scope_id)), 0) > generation
+
+
+def _reset_after_fork():
+    global _LOCK
+    _LOCK = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,455 @@
+"""
+Persistent index of ML compliance result files.
+
+Without it every dashboard cache miss, in every worker, re-lists ADLS and re-downloads
+result CSVs. With ADLS_RESULT_INDEX_ENABLED the compliance_result_files table is the
+read path instead:
+
+    sync_compliance_results()   lists the recent <results>/<YYYY>/<MM> folders, downloads
+                                only files whose ETag (or, without one, last-modified and
+                                size) changed and stores the parsed process_adls_data()
+                                totals and per-framework rows
+    rebuild_rollups()           recomputes compliance_monthly_rollups for the (organisation,
+                                month) pairs a sync touched
+    indexed_dashboard_summary() builds the dashboard summary from indexed queries
+    compliance_trends()         monthly series from the rollups in one indexed query
+
+The sync runs from `flask sync-compliance-results` (`--months 24` backfills history)
+or, with ADLS_RESULT_SYNC_IN_APP, on a background thread when a dashboard finds this
+process has not synced for ADLS_RESULT_SYNC_INTERVAL_SECONDS.
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import ComplianceMonthlyRollup, ComplianceResultFile
+
+logger = logging.getLogger(__name__)
+
+
+_PERIOD_RE = re.compile(r'/(\d{4})/(\d{2})/')
+_ORG_RE = re.compile(r'/(?:org_|organizations/)(\d+)/')
+_USER_RE = re.compile(r'/user_(\d+)/')
+
+
+def parse_result_path(file_path):
+    """(period 'YYYY-MM', organization_id, user_id) for a result path; unknown parts are None."""
+    path = '/' + (file_path or '')
+    period = _PERIOD_RE.search(path)
+    org = _ORG_RE.search(path)
+    user = _USER_RE.search(path)
+    return (
+        f'{period.group(1)}-{period.group(2)}' if period else None,
+        int(org.group(1)) if org else None,
+        int(user.group(1)) if user else None,
+    )
+
+
+def _utc_naive(value):
+    if value is None or not isinstance(value, datetime):
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _recent_periods(months):
+    now = datetime.now()
+    year, month = now.year, now.month
+    periods = []
+    for _ in range(max(1, int(months))):
+        periods.append((year, month))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return periods
+
+
+def _is_unchanged(row, file_info):
+    if row is None:
+        return False
+    etag = file_info.get('etag')
+    if etag and row.etag:
+        return row.etag == str(etag)
+    return (
+        row.last_modified == _utc_naive(file_info.get('last_modified'))
+        and int(row.file_size or 0) == int(file_info.get('file_size') or 0)
+    )
+
+
+def _apply(row, file_info, summary):
+    period, organization_id, user_id = parse_result_path(row.file_path)
+    row.file_name = file_info.get('file_name') or os.path.basename(row.file_path)
+    row.framework = file_info.get('framework')
+    row.period = period
+    row.organization_id = organization_id
+    row.user_id = user_id
+    row.etag = str(file_info['etag']) if file_info.get('etag') else None
+    row.last_modified = _utc_naive(file_info.get('last_modified'))
+    row.file_size = int(file_info.get('file_size') or 0)
+    row.total_requirements = summary['total_requirements']
+    row.complete_count = summary['complete_count']
+    row.needs_review_count = summary['needs_review_count']
+    row.missing_count = summary['missing_count']
+    row.overall_status = summary['overall_status']
+    row.compliancy_rate = summary['compliancy_rate']
+    row.weighted_score = summary['weighted_score']
+    row.frameworks_json = json.dumps(summary.get('frameworks') or [])
+    row.synced_at = datetime.now(timezone.utc)
+
+
+def sync_compliance_results(months=None, service=None):
+    """
+    Bring compliance_result_files (and their monthly rollups) up to date with the last
+    `months` month folders in ADLS. A large `months` is the bulk backfill: month folders
+    are listed concurrently and changed files downloaded concurrently.
+
+    Returns:
+        dict: success, listed, downloaded, unchanged, removed, failed, rollups
+        (or success False with error/error_code when ADLS is not configured)
+    """
+    from app.services.azure_data_service import _list_pool, _pool, _safe_int_env, azure_data_service
+
+    service = service or azure_data_service
+    if not service.service_client and not service.blob_service_client:
+        return {'success': False, 'error': 'No ADLS/Blob client available', 'error_code': 'ADLS_UNAVAILABLE'}
+
+    if months is None:
+        months = current_app.config.get('ADLS_RESULT_SYNC_MONTHS') or 2
+    timeout_seconds = _safe_int_env('AZURE_ADLS_TIMEOUT_SECONDS', 10)
+    file_system_client = None
+    if service.service_client:
+        file_system_client = service.service_client.get_file_system_client(service.container_name)
+
+    list_pool = _list_pool()
+    fetch_pool = _pool('fetch', 'AZURE_DASHBOARD_FETCH_CONCURRENCY', 4)
+    listings = [
+        (prefix, list_pool.submit(service._list_search_path, file_system_client, prefix, timeout_seconds, True))
+        for prefix in (f'{service.results_path}/{year}/{month:02d}' for year, month in _recent_periods(months))
+    ]
+
+    stats = {'listed': 0, 'downloaded': 0, 'unchanged': 0, 'removed': 0, 'failed': 0, 'rollups': 0}
+    for prefix, listing in listings:
+        try:
+            listed = listing.result()
+        except Exception as e:
+            # Leave this month's rows alone; a failed listing must not look like deletions.
+            logger.error(f"Compliance result sync could not list '{prefix}': {e}")
+            stats['failed'] += 1
+            continue
+
+        stats['listed'] += len(listed)
+        existing = {
+            row.file_path: row
+            for row in ComplianceResultFile.query.filter(
+                ComplianceResultFile.file_path.startswith(prefix + '/', autoescape=True)
+            )
+        }
+        downloads = []
+        for file_path, file_info in listed.items():
+            row = existing.pop(file_path, None)
+            if _is_unchanged(row, file_info):
+                stats['unchanged'] += 1
+                continue
+            downloads.append((file_path, file_info, row, fetch_pool.submit(service._analyze_adls_file, file_path, True)))
+
+        # Rollups of every (organization, month) whose files changed are rebuilt below.
+        touched = set()
+        for file_path, file_info, row, download in downloads:
+            try:
+                _rows, summary = download.result()
+            except Exception as e:
+                logger.warning(f"Compliance result sync could not read '{file_path}': {e}")
+                stats['failed'] += 1
+                continue
+            if row is None:
+                row = ComplianceResultFile(file_path=file_path)
+                db.session.add(row)
+            else:
+                touched.add((row.organization_id, row.period))
+            _apply(row, file_info, summary)
+            touched.add((row.organization_id, row.period))
+            stats['downloaded'] += 1
+
+        for row in existing.values():
+            touched.add((row.organization_id, row.period))
+            db.session.delete(row)
+            stats['removed'] += 1
+
+        try:
+            db.session.flush()
+            stats['rollups'] += rebuild_rollups(touched)
+            db.session.commit()
+        except IntegrityError as e:
+            # Another worker synced the same files first; its rows are just as good.
+            db.session.rollback()
+            logger.info(f"Compliance result sync of '{prefix}' raced another sync: {e.orig}")
+
+    logger.info(f"Compliance result sync finished: {stats}")
+    return {'success': True, **stats}
+
+
+OVERALL_FRAMEWORK = 'Overall'
+
+
+def _aggregate(organization_id, period, rows):
+    # Precomputed summary files already aggregate the others; count only them when present.
+    summary_rows = [r for r in rows if 'summary' in (r.file_name or '').lower()]
+    totals = {}
+
+    def add(framework, score, complete, needs_review, missing):
+        agg = totals.setdefault(framework[:100], [0, 0.0, 0, 0, 0])
+        agg[0] += 1
+        agg[1] += float(score or 0)
+        agg[2] += int(complete)
+        agg[3] += int(needs_review)
+        agg[4] += int(missing)
+
+    for row in summary_rows or rows:
+        add(OVERALL_FRAMEWORK, row.compliancy_rate, row.complete_count, row.needs_review_count, row.missing_count)
+        for framework in json.loads(row.frameworks_json or '[]'):
+            status = str(framework.get('status') or '').strip().lower()
+            add(
+                str(framework.get('name') or 'Unknown'),
+                framework.get('score'),
+                status == 'complete',
+                status == 'needs review',
+                status == 'missing',
+            )
+
+    return [
+        ComplianceMonthlyRollup(
+            organization_id=organization_id,
+            period=period,
+            framework=framework,
+            sample_count=count,
+            score_sum=score_sum,
+            score_avg=round(score_sum / count, 2) if count else 0,
+            complete_count=complete,
+            needs_review_count=needs_review,
+            missing_count=missing,
+        )
+        for framework, (count, score_sum, complete, needs_review, missing) in totals.items()
+    ]
+
+
+def rebuild_rollups(pairs):
+    """Recompute the rollups of each (organization_id, period); returns the rows written."""
+    written = 0
+    for organization_id, period in pairs:
+        if organization_id is None or period is None:
+            continue
+        ComplianceMonthlyRollup.query.filter_by(organization_id=organization_id, period=period).delete(
+            synchronize_session=False
+        )
+        rows = ComplianceResultFile.query.filter_by(organization_id=organization_id, period=period).all()
+        for rollup in _aggregate(organization_id, period, rows):
+            db.session.add(rollup)
+            written += 1
+    return written
+
+
+def rebuild_all_rollups():
+    """Recompute every rollup from the indexed files (caller commits); returns the rows written."""
+    ComplianceMonthlyRollup.query.delete(synchronize_session=False)
+    pairs = (
+        db.session.query(ComplianceResultFile.organization_id, ComplianceResultFile.period)
+        .filter(ComplianceResultFile.organization_id.isnot(None), ComplianceResultFile.period.isnot(None))
+        .distinct()
+        .all()
+    )
+    return rebuild_rollups(pairs)
+
+
+def compliance_trends(organization_id, months=12):
+    """
+    Monthly score and status series for an organisation, from precomputed rollups only.
+
+    Returns:
+        dict: success, periods (oldest first), series ([{'framework', 'points'}], Overall first)
+    """
+    months = min(max(int(months or 12), 1), 60)
+    periods = [f'{year}-{month:02d}' for year, month in reversed(_recent_periods(months))]
+    rows = (
+        ComplianceMonthlyRollup.query
+        .filter(
+            ComplianceMonthlyRollup.organization_id == int(organization_id),
+            ComplianceMonthlyRollup.period >= periods[0],
+        )
+        .order_by(ComplianceMonthlyRollup.framework, ComplianceMonthlyRollup.period)
+        .all()
+    )
+
+    series = {}
+    for row in rows:
+        series.setdefault(row.framework, []).append({
+            'period': row.period,
+            'score': row.score_avg,
+            'samples': row.sample_count,
+            'complete': row.complete_count,
+            'needs_review': row.needs_review_count,
+            'missing': row.missing_count,
+        })
+    names = sorted(series, key=lambda name: (name != OVERALL_FRAMEWORK, name.lower()))
+    return {
+        'success': True,
+        'periods': periods,
+        'series': [{'framework': name, 'points': series[name]} for name in names],
+    }
+
+
+_SYNC_LOCK = threading.Lock()
+_SYNC_RUNNING = False
+_SYNC_LAST_STARTED: float | None = None
+
+
+def _reset_sync_after_fork():
+    global _SYNC_LOCK, _SYNC_RUNNING
+    _SYNC_LOCK = threading.Lock()
+    _SYNC_RUNNING = False
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_sync_after_fork)
+
+
+def kick_sync(app=None, force=False):
+    """Run a sync on a background thread unless one is running or this process synced recently."""
+    global _SYNC_RUNNING, _SYNC_LAST_STARTED
+    app = app or current_app._get_current_object()
+    if not app.config.get('ADLS_RESULT_SYNC_IN_APP', True):
+        return False
+
+    interval = int(app.config.get('ADLS_RESULT_SYNC_INTERVAL_SECONDS') or 300)
+    now = time.monotonic()
+    with _SYNC_LOCK:
+        if _SYNC_RUNNING:
+            return False
+        if not force and _SYNC_LAST_STARTED is not None and now - _SYNC_LAST_STARTED < interval:
+            return False
+        _SYNC_RUNNING = True
+        _SYNC_LAST_STARTED = now
+
+    def run():
+        global _SYNC_RUNNING
+        try:
+            with app.app_context():
+                try:
+                    sync_compliance_results()
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Compliance result sync failed: {e}")
+                finally:
+                    db.session.remove()
+        finally:
+            with _SYNC_LOCK:
+                _SYNC_RUNNING = False
+
+    threading.Thread(target=run, name='compliance-result-sync', daemon=True).start()
+    return True
+
+
+def _scope_rows(user_id=None, organization_id=None, limit=None):
+    """Indexed rows for the same scope AzureDataLakeService.get_compliance_files() lists."""
+    def fetch(query):
+        if limit is None:
+            return query.all()
+        return query.order_by(ComplianceResultFile.last_modified.desc()).limit(max(0, int(limit))).all()
+
+    query = ComplianceResultFile.query
+    if not user_id:
+        return fetch(query)
+
+    query = query.filter_by(user_id=int(user_id), period=datetime.now().strftime('%Y-%m'))
+    # Org-scoped results win; the legacy per-user folder is the fallback.
+    if organization_id:
+        rows = fetch(query.filter_by(organization_id=int(organization_id)))
+        if rows:
+            return rows
+    return fetch(query.filter(ComplianceResultFile.organization_id.is_(None)))
+
+
+def indexed_compliance_files(user_id=None, organization_id=None, limit=None):
+    """get_compliance_files() equivalent served from the index (`limit`: newest first)."""
+    kick_sync()
+    return [
+        {
+            'file_name': row.file_name,
+            'file_path': row.file_path,
+            'last_modified': row.last_modified,
+            'file_size': int(row.file_size or 0),
+            'framework': row.framework,
+            'etag': row.etag,
+        }
+        for row in _scope_rows(user_id, organization_id, limit)
+    ]
+
+
+def indexed_dashboard_summary(service, user_id=None, organization_id=None, max_files=4):
+    """get_dashboard_summary() equivalent served from the index (same keys)."""
+    kick_sync()
+    rows = _scope_rows(user_id, organization_id)
+    adls_path = f'abfss://{service.container_name}@{service.account_name}.dfs.core.windows.net/{service.results_path}/'
+    if not rows:
+        return {
+            'total_files': 0,
+            'avg_compliancy_rate': 0,
+            'total_requirements': 0,
+            'total_complete': 0,
+            'total_needs_review': 0,
+            'total_missing': 0,
+            'last_updated': datetime.now(),
+            'file_summaries': [],
+            'connection_status': 'Connected - No Files Found',
+            'adls_path': adls_path,
+        }
+
+    # Same selection as the live dashboard: one precomputed summary file if present,
+    # otherwise the newest few files.
+    rows_sorted = sorted(
+        rows,
+        key=lambda r: ((r.file_name or '').lower(), r.last_modified or datetime.min),
+        reverse=True,
+    )
+    summary_rows = [r for r in rows_sorted if 'compliance_summary' in (r.file_name or '').lower()]
+    if not summary_rows:
+        summary_rows = [r for r in rows_sorted if 'summary' in (r.file_name or '').lower()]
+    selected = summary_rows[:1] if summary_rows else rows_sorted[: max(1, max_files)]
+
+    file_summaries = [
+        {
+            'file_name': row.file_name,
+            'framework': row.framework or 'Unknown',
+            'compliancy_rate': row.compliancy_rate,
+            'overall_status': row.overall_status,
+            'total_requirements': row.total_requirements,
+            'complete_count': row.complete_count,
+            'needs_review_count': row.needs_review_count,
+            'missing_count': row.missing_count,
+            'last_updated': row.last_modified or row.synced_at,
+            'frameworks': json.loads(row.frameworks_json or '[]'),
+        }
+        for row in selected
+    ]
+    rates = [f['compliancy_rate'] for f in file_summaries]
+    return {
+        'total_files': len(rows),
+        'avg_compliancy_rate': round(sum(rates) / len(rates), 1) if rates else 0,
+        'total_requirements': sum(f['total_requirements'] for f in file_summaries),
+        'total_complete': sum(f['complete_count'] for f in file_summaries),
+        'total_needs_review': sum(f['needs_review_count'] for f in file_summaries),
+        'total_missing': sum(f['missing_count'] for f in file_summaries),
+        'last_updated': max(f['last_updated'] for f in file_summaries),
+        'file_summaries': file_summaries,
+        'connection_status': 'Connected - Files Found',
+        'adls_path': adls_path,
+        'partial': False,
+        'files_skipped': 0,
+    }
@@ -0,0 +1,101 @@
+"""
+Content-addressed document storage (per organisation).
+
+Uploads are hashed (SHA-256) during validation. The first upload of some content
+stores a blob and registers it in document_blobs; later uploads of identical bytes in
+the same organisation get a new Document row pointing at the existing blob, and the
+storage upload is skipped (only after the reference is taken; see
+reference_existing_blob). Direct and resumable uploads are hashed later, when the
+processing worker fetches them (document_processing.adopt_content_hash). ref_count
+tracks active documents per blob so deleting a document only removes the stored file
+when its last reference goes.
+
+Callers own the transaction: these helpers only add/flush and never commit.
+"""
+
+import logging
+
+from app import db
+from app.models import DocumentBlob
+
+logger = logging.getLogger(__name__)
+
+
+def find_blob(organization_id, sha256):
+    """Return the DocumentBlob for this content in the organisation, or None."""
+    if not organization_id or not sha256:
+        return None
+    return DocumentBlob.query.filter_by(organization_id=int(organization_id), sha256=sha256).first()
+
+
+def reference_existing_blob(organization_id, sha256):
+    """Add one reference to the org's live blob holding `sha256`, or return None.
+
+    The increment is guarded by ref_count > 0 and leaves the row locked until the
+    caller commits, so a concurrent delete of the last document cannot remove the
+    stored file in between. Take the reference before deciding to skip an upload.
+    """
+    if not organization_id or not sha256:
+        return None
+    result = db.session.execute(
+        db.update(DocumentBlob)
+        .where(
+            DocumentBlob.organization_id == int(organization_id),
+            DocumentBlob.sha256 == sha256,
+            DocumentBlob.ref_count > 0,
+        )
+        .values(ref_count=DocumentBlob.ref_count + 1)
+    )
+    if not result.rowcount:
+        return None
+    blob = find_blob(organization_id, sha256)
+    db.session.refresh(blob)
+    return blob
+
+
+def acquire_blob_reference(organization_id, sha256, blob_name, file_size=None):
+    """Add one reference to the blob holding `sha256`, registering `blob_name` if it is new.
+
+    Returns the DocumentBlob; its blob_name is the one the new document must use.
+    Raises IntegrityError (on flush/commit) if a concurrent upload registered the same
+    content first; the caller should roll back and retry.
+    """
+    blob = reference_existing_blob(organization_id, sha256)
+    if blob is None:
+        blob = DocumentBlob(
+            organization_id=int(organization_id),
+            sha256=sha256,
+            blob_name=blob_name,
+            file_size=file_size,
+            ref_count=1,
+        )
+        db.session.add(blob)
+        db.session.flush()
+    return blob
+
+
+def release_blob_reference(document):
+    """Drop the document's reference to its blob.
+
+    Returns the blob name to delete from storage (this was the last reference, or the
+    document predates deduplication), or None when other documents still use the blob.
+    """
+    if not getattr(document, 'blob_name', None):
+        return None
+
+    blob = find_blob(document.organization_id, getattr(document, 'content_sha256', None))
+    if blob is None or blob.blob_name != document.blob_name:
+        return document.blob_name
+
+    db.session.execute(
+        db.update(DocumentBlob)
+        .where(DocumentBlob.id == blob.id)
+        .values(ref_count=DocumentBlob.ref_count - 1)
+    )
+    db.session.refresh(blob)
+    if blob.ref_count > 0:
+        logger.info(f"Blob {blob.blob_name} still referenced by {blob.ref_count} document(s); keeping it")
+        return None
+
+    db.session.delete(blob)
+    return blob.blob_name
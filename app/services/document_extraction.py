@@ -0,0 +1,217 @@
+"""
+Pure content extraction for uploaded documents.
+
+Everything here works on bytes and returns plain dicts, with no Flask or database
+access, so it can run in a separate process (see document_processing). Optional
+libraries are used when installed:
+
+- pypdf      PDF text, page count and document info
+- pypdfium2  first-page PDF thumbnails
+- Pillow     image thumbnails (already a dependency for reports)
+
+Without them (or when pypdf cannot parse a damaged file), PDFs still get a best-effort
+page count and DOCX files are handled with the standard library (they are zip archives
+of XML). Extraction only raises when nothing at all can be read from the file.
+"""
+
+import io
+import re
+import html
+import zipfile
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+_PDF_PAGE_RE = re.compile(rb'/Type\s*/Page(?![a-zA-Z])')
+_PDF_HEADER_RE = re.compile(rb'%PDF-(\d+\.\d+)')
+_XML_TAG_RE = re.compile(r'<[^>]+>')
+_DOCX_PARAGRAPH_RE = re.compile(r'</w:p>|<w:br\s*/>|<w:tab\s*/>')
+
+
+def _kind(filename, content_type):
+    name = (filename or '').lower()
+    content_type = (content_type or '').lower()
+    if name.endswith('.pdf') or content_type == 'application/pdf':
+        return 'pdf'
+    if name.endswith('.docx') or 'wordprocessingml' in content_type:
+        return 'docx'
+    if name.endswith(('.png', '.jpg', '.jpeg')) or content_type.startswith('image/'):
+        return 'image'
+    return 'other'
+
+
+def _make_thumbnail(image, size):
+    """Return (bytes, content_type) for a PIL image scaled to fit size x size."""
+    image = image.convert('RGB')
+    image.thumbnail((size, size))
+    out = io.BytesIO()
+    image.save(out, format='JPEG', quality=80, optimize=True)
+    return out.getvalue(), 'image/jpeg'
+
+
+def _clean_text(text, max_chars):
+    text = re.sub(r'[ \t\r\f\v]+', ' ', text or '')
+    text = re.sub(r'\n\s*\n+', '\n\n', text).strip()
+    return text[:max_chars] if max_chars else text
+
+
+def _pdf_header_version(data):
+    match = _PDF_HEADER_RE.match(data[:1024].lstrip())
+    return match.group(1).decode('ascii') if match else None
+
+
+def _extract_pdf(data, max_chars, thumb_size):
+    result = {}
+    parsed = False
+    if PdfReader is not None:
+        try:
+            reader = PdfReader(io.BytesIO(data))
+            result['page_count'] = len(reader.pages)
+            info = reader.metadata or {}
+            result['title'] = (info.get('/Title') or None) and str(info.get('/Title'))
+            result['author'] = (info.get('/Author') or None) and str(info.get('/Author'))
+            result['metadata'] = {
+                str(k).lstrip('/'): str(v) for k, v in dict(info).items() if v is not None
+            }
+
+            parts = []
+            total = 0
+            for page in reader.pages:
+                page_text = page.extract_text() or ''
+                parts.append(page_text)
+                total += len(page_text)
+                if max_chars and total >= max_chars:
+                    break
+            result['text'] = _clean_text('\n\n'.join(parts), max_chars)
+            parsed = True
+        except Exception:
+            # Damaged or truncated PDFs (e.g. no xref table): keep the cheap estimates below.
+            result = {}
+
+    if not parsed:
+        # A page count is still cheap to estimate from the object table.
+        result['page_count'] = len(_PDF_PAGE_RE.findall(data)) or None
+        version = _pdf_header_version(data)
+        if version:
+            result['metadata'] = {'pdf_version': version}
+
+    if pdfium is not None and Image is not None:
+        try:
+            pdf = pdfium.PdfDocument(data)
+        except Exception:
+            pdf = None
+        if pdf is not None:
+            try:
+                page = pdf[0]
+                width, _height = page.get_size()
+                scale = max(0.1, float(thumb_size) / max(1.0, float(width)))
+                image = page.render(scale=scale).to_pil()
+                result['thumbnail'], result['thumbnail_content_type'] = _make_thumbnail(image, thumb_size)
+            except Exception:
+                pass
+            finally:
+                pdf.close()
+
+    if not parsed and not (result.get('page_count') or result.get('metadata') or result.get('thumbnail')):
+        raise ValueError('Not a readable PDF')
+    return result
+
+
+def _docx_xml(archive, name):
+    try:
+        return archive.read(name).decode('utf-8', errors='replace')
+    except KeyError:
+        return ''
+
+
+def _xml_value(xml, tag):
+    match = re.search(rf'<{tag}[^>]*>(.*?)</{tag}>', xml, re.S)
+    return html.unescape(match.group(1)).strip() if match else None
+
+
+def _extract_docx(data, max_chars):
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        body = _docx_xml(archive, 'word/document.xml')
+        core = _docx_xml(archive, 'docProps/core.xml')
+        app_props = _docx_xml(archive, 'docProps/app.xml')
+
+    text = html.unescape(_XML_TAG_RE.sub('', _DOCX_PARAGRAPH_RE.sub('\n', body)))
+    metadata = {
+        key: value for key, value in {
+            'title': _xml_value(core, 'dc:title'),
+            'author': _xml_value(core, 'dc:creator'),
+            'created': _xml_value(core, 'dcterms:created'),
+            'modified': _xml_value(core, 'dcterms:modified'),
+            'last_modified_by': _xml_value(core, 'cp:lastModifiedBy'),
+        }.items() if value
+    }
+    pages = _xml_value(app_props, 'Pages')
+
+    return {
+        'text': _clean_text(text, max_chars),
+        'page_count': int(pages) if pages and pages.isdigit() else None,
+        'title': metadata.get('title'),
+        'author': metadata.get('author'),
+        'metadata': metadata,
+    }
+
+
+def _extract_image(data, thumb_size):
+    if Image is None:
+        return {}
+    with Image.open(io.BytesIO(data)) as image:
+        result = {'metadata': {'width': image.width, 'height': image.height, 'format': image.format}}
+        result['thumbnail'], result['thumbnail_content_type'] = _make_thumbnail(image, thumb_size)
+    result['page_count'] = 1
+    return result
+
+
+def extract_document_file(path, filename, content_type=None, max_text_chars=200_000, thumb_size=320):
+    """extract_document() for a file on local disk (the bytes never cross the process boundary)."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return extract_document(data, filename, content_type, max_text_chars=max_text_chars, thumb_size=thumb_size)
+
+
+def extract_document(data, filename, content_type=None, max_text_chars=200_000, thumb_size=320):
+    """
+    Extract text, page count, metadata and a thumbnail from a document's bytes.
+
+    Runs in a worker process; must stay free of Flask/database access.
+
+    Returns:
+        dict: keys text, page_count, title, author, metadata (dict), thumbnail (bytes),
+        thumbnail_content_type. Missing values are None.
+    """
+    kind = _kind(filename, content_type)
+    if kind == 'pdf':
+        result = _extract_pdf(data, max_text_chars, thumb_size)
+    elif kind == 'docx':
+        result = _extract_docx(data, max_text_chars)
+    elif kind == 'image':
+        result = _extract_image(data, thumb_size)
+    else:
+        result = {}
+
+    return {
+        'text': result.get('text'),
+        'page_count': result.get('page_count'),
+        'title': (result.get('title') or None) and str(result['title'])[:255],
+        'author': (result.get('author') or None) and str(result['author'])[:255],
+        'metadata': result.get('metadata') or {},
+        'thumbnail': result.get('thumbnail'),
+        'thumbnail_content_type': result.get('thumbnail_content_type'),
+    }
@@ -0,0 +1,456 @@
+"""
+Post-upload document processing pipeline.
+
+Upload routes call enqueue_document() once a Document is committed. Queued rows in
+document_derived_data are processed in batches by process_pending_documents():
+
+- rows are claimed with a conditional UPDATE, so several web workers and a separate
+  `flask process-documents` worker can run at once without double-processing;
+- blobs are streamed to a temporary file here (local-backend files are used in
+  place), and the CPU-bound parsing/rendering (document_extraction) runs in a
+  ProcessPoolExecutor that gets only the path, outside any request and outside the
+  web worker's GIL;
+- failures are retried with exponential backoff up to DOCUMENT_PROCESSING_MAX_ATTEMPTS;
+- finished rows are never reprocessed, and documents sharing a deduplicated blob
+  reuse the result already computed for that content;
+- direct and resumable uploads arrive without a content hash; it is computed while
+  their blob is fetched here, and a document whose bytes the organisation already
+  stores is moved onto that blob (see adopt_content_hash);
+- extracted text is written to the full-text index (document_search).
+
+Processing normally runs in its own `flask process-documents --loop` worker. Set
+DOCUMENT_PROCESSING_IN_APP=1 to also drain the queue on a daemon thread per web
+worker, started by kick() after an upload (handy for development).
+"""
+
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import Document, DocumentDerivedData
+from app.services.document_blobs import acquire_blob_reference
+from app.services.document_extraction import extract_document_file
+from app.services.document_search import index_document
+
+logger = logging.getLogger(__name__)
+
+
+_STALE_CLAIM_MINUTES = 15
+
+_POOL = None
+_POOL_WORKERS = 0
+_POOL_LOCK = threading.Lock()
+
+_KICK_LOCK = threading.Lock()
+_KICK_RUNNING = False
+_KICK_AGAIN = False
+
+
+def _reset_after_fork():
+    global _POOL, _POOL_WORKERS, _POOL_LOCK, _KICK_LOCK, _KICK_RUNNING, _KICK_AGAIN
+    _POOL = None
+    _POOL_WORKERS = 0
+    _POOL_LOCK = threading.Lock()
+    _KICK_LOCK = threading.Lock()
+    _KICK_RUNNING = False
+    _KICK_AGAIN = False
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _utcnow():
+    # Stored as naive UTC (SQLite drops tzinfo).
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _config_int(name, default):
+    try:
+        return int(current_app.config.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _get_pool(max_workers):
+    """Shared process pool ('spawn', so children never inherit the web worker's threads/sockets)."""
+    global _POOL, _POOL_WORKERS
+    with _POOL_LOCK:
+        if _POOL is None or _POOL_WORKERS != max_workers:
+            if _POOL is not None:
+                _POOL.shutdown(wait=False)
+            _POOL = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+            _POOL_WORKERS = max_workers
+        return _POOL
+
+
+def shutdown_pool():
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=True)
+            _POOL = None
+
+
+def enqueue_document(document_id, commit=True):
+    """Queue a document for processing. No-op if it is already queued or processed."""
+    if not current_app.config.get('DOCUMENT_PROCESSING_ENABLED', True):
+        return False
+    if db.session.get(DocumentDerivedData, int(document_id)) is not None:
+        return False
+
+    db.session.add(DocumentDerivedData(document_id=int(document_id), status='pending', next_attempt_at=_utcnow()))
+    if commit:
+        db.session.commit()
+    return True
+
+
+def enqueue_unprocessed_documents(limit=None):
+    """Queue every active document that has never been processed (backfill)."""
+    query = (
+        db.session.query(Document.id)
+        .outerjoin(DocumentDerivedData, DocumentDerivedData.document_id == Document.id)
+        .filter(Document.is_active.is_(True), DocumentDerivedData.document_id.is_(None))
+        .order_by(Document.id)
+    )
+    if limit:
+        query = query.limit(int(limit))
+    count = 0
+    for (document_id,) in query.all():
+        count += int(enqueue_document(document_id, commit=False))
+    db.session.commit()
+    return count
+
+
+def _claim_batch(batch_size):
+    """Claim up to batch_size due rows; returns the claimed rows."""
+    now = _utcnow()
+    stale = now - timedelta(minutes=_STALE_CLAIM_MINUTES)
+    candidates = (
+        DocumentDerivedData.query
+        .filter(or_(
+            and_(
+                DocumentDerivedData.status == 'pending',
+                or_(DocumentDerivedData.next_attempt_at.is_(None), DocumentDerivedData.next_attempt_at <= now),
+            ),
+            and_(DocumentDerivedData.status == 'processing', DocumentDerivedData.claimed_at < stale),
+        ))
+        .order_by(DocumentDerivedData.next_attempt_at)
+        .limit(batch_size)
+        .all()
+    )
+
+    claimed_ids = []
+    for row in candidates:
+        # attempts changes on every claim, so it doubles as a version check.
+        result = db.session.execute(
+            db.update(DocumentDerivedData)
+            .where(
+                DocumentDerivedData.document_id == row.document_id,
+                DocumentDerivedData.status == row.status,
+                DocumentDerivedData.attempts == row.attempts,
+            )
+            .values(status='processing', claimed_at=now, attempts=row.attempts + 1)
+        )
+        if result.rowcount == 1:
+            claimed_ids.append(row.document_id)
+    db.session.commit()
+
+    if not claimed_ids:
+        return []
+    db.session.expire_all()
+    return DocumentDerivedData.query.filter(DocumentDerivedData.document_id.in_(claimed_ids)).all()
+
+
+def _store_result(row, result):
+    row.text_content = result.get('text')
+    row.page_count = result.get('page_count')
+    row.title = result.get('title')
+    row.author = result.get('author')
+    row.metadata_json = json.dumps(result.get('metadata') or {}, default=str)
+    row.thumbnail = result.get('thumbnail')
+    row.thumbnail_content_type = result.get('thumbnail_content_type')
+    row.status = 'done'
+    row.error = None
+    row.processed_at = _utcnow()
+    row.claimed_at = None
+
+
+def _copy_result(row, source):
+    row.text_content = source.text_content
+    row.page_count = source.page_count
+    row.title = source.title
+    row.author = source.author
+    row.metadata_json = source.metadata_json
+    row.thumbnail = source.thumbnail
+    row.thumbnail_content_type = source.thumbnail_content_type
+    row.status = 'done'
+    row.error = None
+    row.processed_at = _utcnow()
+    row.claimed_at = None
+
+
+def _record_failure(row, error, max_attempts):
+    row.error = str(error)[:500]
+    row.claimed_at = None
+    if int(row.attempts or 0) >= max_attempts:
+        row.status = 'failed'
+        logger.error(f"Document {row.document_id} processing failed permanently: {row.error}")
+    else:
+        # 30s, 60s, 120s, ...
+        row.status = 'pending'
+        row.next_attempt_at = _utcnow() + timedelta(seconds=30 * 2 ** max(0, int(row.attempts or 1) - 1))
+        logger.warning(f"Document {row.document_id} processing failed (attempt {row.attempts}); will retry: {row.error}")
+
+
+def _processed_twin(document):
+    """A finished row for another document with identical content, if any."""
+    if not getattr(document, 'content_sha256', None):
+        return None
+    return (
+        DocumentDerivedData.query
+        .join(Document, Document.id == DocumentDerivedData.document_id)
+        .filter(
+            Document.organization_id == document.organization_id,
+            Document.content_sha256 == document.content_sha256,
+            Document.id != document.id,
+            DocumentDerivedData.status == 'done',
+        )
+        .first()
+    )
+
+
+def _fetch_to_file(storage_service, document, digest=None):
+    """(path, is_temporary) of the document's bytes on local disk.
+
+    Streams the blob to a temporary file chunk by chunk, so neither this process nor
+    the pool pickles whole files. Each chunk also updates `digest` when one is given.
+    Raises RuntimeError when the download fails.
+    """
+    local_path = None if document.blob_etag else storage_service.get_local_path(document.blob_name)
+    if local_path:
+        if digest is not None:
+            with open(local_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+        return local_path, False
+
+    download = storage_service.open_download(document.blob_name, etag=document.blob_etag)
+    if not download.get('success'):
+        raise RuntimeError(download.get('error') or 'Download failed')
+
+    suffix = os.path.splitext(document.filename or '')[1]
+    fd, path = tempfile.mkstemp(prefix='docproc-', suffix=suffix)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in download['chunks']:
+                f.write(chunk)
+                if digest is not None:
+                    digest.update(chunk)
+    except Exception:
+        _remove_quietly(path)
+        raise
+    return path, True
+
+
+def adopt_content_hash(storage_service, document, sha256):
+    """Record the hash of a document uploaded without one and register its blob.
+
+    If the organisation already stores identical bytes, the document is moved onto
+    that blob and its own copy deleted. The document update is conditional (still
+    active, still unhashed, same blob), so a concurrent delete or adoption wins.
+    Returns True when the hash was recorded.
+    """
+    own_blob = document.blob_name
+    for attempt in range(2):
+        try:
+            blob = acquire_blob_reference(document.organization_id, sha256, own_blob, file_size=document.file_size)
+            values = {'content_sha256': sha256}
+            if blob.blob_name != own_blob:
+                sibling = Document.query.filter_by(blob_name=blob.blob_name).first()
+                values.update(blob_name=blob.blob_name, blob_etag=sibling.blob_etag if sibling else None)
+            updated = db.session.execute(
+                db.update(Document)
+                .where(
+                    Document.id == document.id,
+                    Document.blob_name == own_blob,
+                    Document.content_sha256.is_(None),
+                    Document.is_active.isnot(False),
+                )
+                .values(**values)
+            ).rowcount
+            if not updated:
+                db.session.rollback()
+                return False
+            db.session.commit()
+            break
+        except IntegrityError:
+            # A concurrent upload registered the same content first.
+            db.session.rollback()
+            if attempt:
+                raise
+
+    db.session.refresh(document)
+    if document.blob_name != own_blob:
+        result = storage_service.delete_file(own_blob)
+        if isinstance(result, dict) and not result.get('success'):
+            logger.warning(f"Could not delete duplicate blob {own_blob}: {result.get('error')}")
+        else:
+            logger.info(f"Document {document.id} now shares blob {document.blob_name}")
+    return True
+
+
+def _remove_quietly(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def process_pending_documents(batch_size=None, max_workers=None):
+    """
+    Process one batch of queued documents.
+
+    Returns:
+        int: number of rows claimed (0 when nothing is due)
+    """
+    from app.services.storage import get_document_storage
+
+    batch_size = batch_size or _config_int('DOCUMENT_PROCESSING_BATCH_SIZE', 8)
+    max_workers = _config_int('DOCUMENT_PROCESSING_WORKERS', 2) if max_workers is None else int(max_workers)
+    max_attempts = _config_int('DOCUMENT_PROCESSING_MAX_ATTEMPTS', 3)
+    extract_kwargs = {
+        'max_text_chars': _config_int('DOCUMENT_TEXT_MAX_CHARS', 200_000),
+        'thumb_size': _config_int('DOCUMENT_THUMBNAIL_SIZE', 320),
+    }
+
+    rows = _claim_batch(batch_size)
+    if not rows:
+        return 0
+
+    storage_service = get_document_storage()
+    pool = _get_pool(max_workers) if max_workers > 0 else None
+    futures = {}
+
+    for row in rows:
+        document = db.session.get(Document, int(row.document_id))
+        if not document or not document.blob_name:
+            _record_failure(row, 'Document has no stored file', max_attempts=0)
+            continue
+
+        path = is_temporary = None
+        if not document.content_sha256:
+            # Uploaded without validate_file (direct/resumable): hash on this fetch.
+            # Adoption commits or rolls back, so save the batch's results so far first.
+            db.session.commit()
+            digest = hashlib.sha256()
+            try:
+                path, is_temporary = _fetch_to_file(storage_service, document, digest)
+                adopt_content_hash(storage_service, document, digest.hexdigest())
+            except Exception as e:
+                db.session.rollback()
+                if is_temporary:
+                    _remove_quietly(path)
+                _record_failure(row, e, max_attempts)
+                continue
+
+        twin = _processed_twin(document)
+        if twin is not None:
+            if is_temporary:
+                _remove_quietly(path)
+            _copy_result(row, twin)
+            index_document(document, row)
+            continue
+
+        if path is None:
+            try:
+                path, is_temporary = _fetch_to_file(storage_service, document)
+            except Exception as e:
+                _record_failure(row, e, max_attempts)
+                continue
+
+        args = (path, document.filename, document.content_type)
+        if pool is None:
+            try:
+                _store_result(row, extract_document_file(*args, **extract_kwargs))
+            except Exception as e:
+                _record_failure(row, e, max_attempts)
+                continue
+            finally:
+                if is_temporary:
+                    _remove_quietly(path)
+            index_document(document, row)
+        else:
+            future = pool.submit(extract_document_file, *args, **extract_kwargs)
+            futures[future] = (row, document, path if is_temporary else None)
+
+    for future in as_completed(futures):
+        row, document, temporary_path = futures[future]
+        try:
+            _store_result(row, future.result())
+        except Exception as e:
+            _record_failure(row, e, max_attempts)
+            continue
+        finally:
+            if temporary_path:
+                _remove_quietly(temporary_path)
+        index_document(document, row)
+
+    db.session.commit()
+    logger.info(f"Processed {len(rows)} document(s)")
+    return len(rows)
+
+
+def kick(app=None):
+    """Drain the queue on a background thread in this process (one thread at a time)."""
+    global _KICK_RUNNING, _KICK_AGAIN
+    app = app or current_app._get_current_object()
+    if not app.config.get('DOCUMENT_PROCESSING_ENABLED', True) or not app.config.get('DOCUMENT_PROCESSING_IN_APP', False):
+        return False
+
+    with _KICK_LOCK:
+        if _KICK_RUNNING:
+            _KICK_AGAIN = True
+            return False
+        _KICK_RUNNING = True
+        _KICK_AGAIN = False
+
+    def run():
+        global _KICK_RUNNING, _KICK_AGAIN
+        try:
+            with app.app_context():
+                while True:
+                    try:
+                        processed = process_pending_documents()
+                    except Exception as e:
+                        db.session.rollback()
+                        logger.error(f"Document processing batch failed: {e}")
+                        processed = 0
+                    finally:
+                        db.session.remove()
+                    if processed:
+                        continue
+                    with _KICK_LOCK:
+                        if not _KICK_AGAIN:
+                            _KICK_RUNNING = False
+                            return
+                        _KICK_AGAIN = False
+        except Exception:
+            with _KICK_LOCK:
+                _KICK_RUNNING = False
+            raise
+
+    thread = threading.Thread(target=run, name='document-processing', daemon=True)
+    thread.start()
+    return True
@@ -0,0 +1,223 @@
+"""
+Full-text search over document filenames and extracted text.
+
+The index lives beside the documents table, in the database's native full-text engine:
+
+    sqlite      document_search_fts, an FTS5 virtual table (rowid = documents.id)
+    postgresql  document_search, a tsvector column with a GIN index
+
+Each entry also carries an organisation token ("o<org_id>") that every query must
+match, so a search is a single index lookup scoped to one organisation; the documents
+table is only read afterwards for the page of hits being shown.
+
+Entries are written when a document is created, rewritten once post-upload
+processing has extracted its text, and removed on (soft) delete. Callers own the
+transaction: these helpers only execute statements and never commit.
+"""
+
+import re
+import logging
+
+from markupsafe import Markup, escape
+from sqlalchemy import text
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+
+MAX_QUERY_TERMS = 10
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+# Snippet highlight markers; replaced with <mark> after HTML-escaping the snippet.
+_MARK_START = '\x02'
+_MARK_END = '\x03'
+
+SEARCH_INDEX_DDL = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS document_search_fts USING fts5("
+        "org, filename, body, tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    ],
+    'postgresql': [
+        "CREATE TABLE IF NOT EXISTS document_search ("
+        "document_id INTEGER PRIMARY KEY REFERENCES documents(id) ON DELETE CASCADE, "
+        "organization_id INTEGER NOT NULL, "
+        "search_vector TSVECTOR NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS ix_document_search_vector ON document_search USING GIN (search_vector)",
+    ],
+}
+
+DROP_SEARCH_INDEX_DDL = {
+    'sqlite': ["DROP TABLE IF EXISTS document_search_fts"],
+    'postgresql': ["DROP TABLE IF EXISTS document_search"],
+}
+
+
+def _dialect(bind=None):
+    return (bind or db.session.get_bind()).dialect.name
+
+
+def create_search_index(connection):
+    """Create the search index for this connection's dialect (idempotent)."""
+    for statement in SEARCH_INDEX_DDL.get(connection.dialect.name, []):
+        connection.execute(text(statement))
+
+
+def drop_search_index(connection):
+    for statement in DROP_SEARCH_INDEX_DDL.get(connection.dialect.name, []):
+        connection.execute(text(statement))
+
+
+def _org_token(organization_id):
+    return f'o{int(organization_id)}'
+
+
+def _query_terms(query):
+    return _TERM_RE.findall((query or '').lower())[:MAX_QUERY_TERMS]
+
+
+def _body_text(derived):
+    if derived is None:
+        return ''
+    parts = [derived.title, derived.author, derived.text_content]
+    return '\n'.join(p for p in parts if p)
+
+
+def index_document(document, derived=None):
+    """Write (or rewrite) the index entry for a document and its extracted text."""
+    if not getattr(document, 'is_active', True) or not document.organization_id:
+        remove_document(document.id)
+        return
+
+    dialect = _dialect()
+    params = {
+        'id': int(document.id),
+        'org_id': int(document.organization_id),
+        'org': _org_token(document.organization_id),
+        'filename': document.filename or '',
+        'body': _body_text(derived),
+    }
+    if dialect == 'sqlite':
+        db.session.execute(text("DELETE FROM document_search_fts WHERE rowid = :id"), params)
+        db.session.execute(
+            text("INSERT INTO document_search_fts (rowid, org, filename, body) VALUES (:id, :org, :filename, :body)"),
+            params,
+        )
+    elif dialect == 'postgresql':
+        db.session.execute(
+            text(
+                "INSERT INTO document_search (document_id, organization_id, search_vector) VALUES ("
+                ":id, :org_id, "
+                "to_tsvector('simple', :org) "
+                "|| setweight(to_tsvector('english', :filename), 'A') "
+                "|| setweight(to_tsvector('english', :body), 'B')) "
+                "ON CONFLICT (document_id) DO UPDATE SET "
+                "organization_id = EXCLUDED.organization_id, search_vector = EXCLUDED.search_vector"
+            ),
+            params,
+        )
+
+
+def remove_document(document_id):
+    """Drop a document from the index (no-op if it is not indexed)."""
+    dialect = _dialect()
+    if dialect == 'sqlite':
+        db.session.execute(text("DELETE FROM document_search_fts WHERE rowid = :id"), {'id': int(document_id)})
+    elif dialect == 'postgresql':
+        db.session.execute(text("DELETE FROM document_search WHERE document_id = :id"), {'id': int(document_id)})
+
+
+def rebuild_search_index(organization_id=None):
+    """Re-index every active document (optionally one organisation). Returns the count."""
+    from app.models import Document, DocumentDerivedData
+
+    query = (
+        db.session.query(Document, DocumentDerivedData)
+        .outerjoin(DocumentDerivedData, DocumentDerivedData.document_id == Document.id)
+        .filter(Document.is_active.is_(True), Document.organization_id.isnot(None))
+        .order_by(Document.id)
+    )
+    if organization_id:
+        query = query.filter(Document.organization_id == int(organization_id))
+
+    count = 0
+    for document, derived in query.yield_per(500):
+        index_document(document, derived)
+        count += 1
+    return count
+
+
+def _highlight(snippet):
+    if not snippet:
+        return None
+    return Markup(str(escape(snippet)).replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>'))
+
+
+def search_documents(organization_id, query, page=1, per_page=20):
+    """
+    Ranked full-text search within one organisation.
+
+    Terms are prefix-matched and all must occur (in the filename or the text).
+
+    Returns:
+        dict: success, results (list of {'document_id', 'rank', 'snippet'} best first),
+        page, per_page, has_next
+    """
+    page = max(1, int(page or 1))
+    per_page = min(max(int(per_page or 20), 1), 100)
+    terms = _query_terms(query)
+    result = {'success': True, 'results': [], 'page': page, 'per_page': per_page, 'has_next': False}
+    if not organization_id or not terms:
+        return result
+
+    params = {
+        'org': _org_token(organization_id),
+        'org_id': int(organization_id),
+        'limit': per_page + 1,
+        'offset': (page - 1) * per_page,
+    }
+    dialect = _dialect()
+    if dialect == 'sqlite':
+        # Quoted terms, so FTS5 operators typed by the user are plain text.
+        params['match'] = f"org:{params['org']} AND (" + ' '.join(f'"{t}"*' for t in terms) + ')'
+        sql = text(
+            "SELECT rowid AS document_id, bm25(document_search_fts, 0.0, 10.0, 1.0) AS rank, "
+            "snippet(document_search_fts, 2, char(2), char(3), '…', 16) AS snippet "
+            "FROM document_search_fts WHERE document_search_fts MATCH :match "
+            "ORDER BY rank, rowid DESC LIMIT :limit OFFSET :offset"
+        )
+    elif dialect == 'postgresql':
+        params['tsquery'] = ' & '.join(f'{t}:*' for t in terms)
+        sql = text(
+            "WITH hits AS ("
+            " SELECT s.document_id, ts_rank_cd(s.search_vector, to_tsquery('english', :tsquery)) AS rank"
+            " FROM document_search s"
+            " WHERE s.search_vector @@ (to_tsquery('simple', :org) && to_tsquery('english', :tsquery))"
+            " AND s.organization_id = :org_id"
+            " ORDER BY rank DESC, s.document_id DESC LIMIT :limit OFFSET :offset)"
+            " SELECT hits.document_id, hits.rank,"
+            " ts_headline('english', COALESCE(d.text_content, ''), to_tsquery('english', :tsquery),"
+            " 'StartSel=' || chr(2) || ', StopSel=' || chr(3) || ', MaxWords=24, MinWords=8') AS snippet"
+            " FROM hits LEFT JOIN document_derived_data d ON d.document_id = hits.document_id"
+            " ORDER BY hits.rank DESC, hits.document_id DESC"
+        )
+    else:
+        return {**result, 'success': False, 'error': 'Search is not available on this database', 'error_code': 'SEARCH_UNAVAILABLE'}
+
+    try:
+        rows = db.session.execute(sql, params).all()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Document search failed for org {organization_id}: {e}")
+        return {**result, 'success': False, 'error': 'Search failed', 'error_code': 'SEARCH_ERROR'}
+
+    result['has_next'] = len(rows) > per_page
+    result['results'] = [
+        {
+            'document_id': int(row.document_id),
+            'rank': float(row.rank or 0),
+            # Text without a match (e.g. filename-only hits) has no useful snippet.
+            'snippet': _highlight(row.snippet) if row.snippet and _MARK_START in row.snippet else None,
+        }
+        for row in rows[:per_page]
+    ]
+    return result
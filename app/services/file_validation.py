@@ -1,4 +1,6 @@
+import io
 import os
+import hashlib
 import mimetypes
 from werkzeug.utils import secure_filename
 from flask import current_app
@@ -19,8 +21,8 @@ class FileValidationService:
         '.jpeg': 'image/jpeg',
     }
     
-    # Maximum file size (16MB)
-    MAX_FILE_SIZE = 16 * 1024 * 1024
+    # Maximum file size (16MB by default; keep in sync with MAX_CONTENT_LENGTH)
+    MAX_FILE_SIZE = int(os.environ.get('MAX_UPLOAD_SIZE_MB') or 16) * 1024 * 1024
     
     @classmethod
     def is_allowed_file(cls, filename):
@@ -249,8 +251,14 @@ class FileValidationService:
         if not size_result['success']:
             return size_result
         
+        # One read of the stream yields both the signature header and the content
+        # digest (used to deduplicate identical uploads per organisation)
+        hash_result = cls.compute_sha256(file_stream)
+        if not hash_result['success']:
+            return hash_result
+        
         # Validate file content
-        content_result = cls.validate_file_content(file_stream, filename)
+        content_result = cls.validate_file_content(io.BytesIO(hash_result['header']), filename)
         if not content_result['success']:
             return content_result
         
@@ -261,10 +269,53 @@ class FileValidationService:
             'success': True,
             'file_size': size_result['file_size'],
             'content_type': content_result['content_type'],
+            'sha256': hash_result['sha256'],
             'safe_filename': safe_filename,
             'original_filename': filename
         }
     
+    @classmethod
+    def compute_sha256(cls, file_stream, chunk_size=1024 * 1024):
+        """
+        Compute the SHA-256 of a stream in fixed-size chunks (never the whole file in memory).
+        
+        Args:
+            file_stream: Seekable file stream
+            chunk_size: Bytes read per iteration
+        
+        Returns:
+            dict: Result with success status, hex digest and the first 8 bytes (header)
+        """
+        try:
+            current_pos = file_stream.tell()
+            file_stream.seek(0)
+            
+            digest = hashlib.sha256()
+            header = b''
+            while True:
+                chunk = file_stream.read(chunk_size)
+                if not chunk:
+                    break
+                if len(header) < 8:
+                    header += chunk[:8 - len(header)]
+                digest.update(chunk)
+            
+            file_stream.seek(current_pos)
+            
+            return {
+                'success': True,
+                'sha256': digest.hexdigest(),
+                'header': header
+            }
+            
+        except Exception as e:
+            logger.error(f"Error hashing file: {e}")
+            return {
+                'success': False,
+                'error': 'Unable to read file content',
+                'error_code': 'HASH_ERROR'
+            }
+    
     @classmethod
     def _format_file_size(cls, size_bytes):
         """
@@ -0,0 +1,515 @@
+"""
+Local filesystem storage backend (STORAGE_BACKEND=local).
+
+Implements the same contract as the Azure services so uploads, downloads and logo
+handling can run (and be load-tested) with no Azure account:
+
+- Files live under LOCAL_STORAGE_ROOT/<container>/, sharded by a hash of the blob
+  name (ab/cd/<hash>) so no single directory grows unbounded. A JSON sidecar keeps
+  the original name, content type, metadata and etag.
+- Writes go to a temp file in the target directory and are moved into place with
+  os.replace, so readers never see a partial file.
+- get_local_path() lets the download route hand the file to send_file, which uses
+  the server's zero-copy sendfile path.
+- get_file_url() returns an app URL signed with SECRET_KEY (see main.local_storage_file).
+"""
+
+import io
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+from datetime import datetime, timezone
+
+from flask import current_app, url_for
+from itsdangerous import URLSafeSerializer, BadSignature
+
+from app.services.storage import AssetStorage, DocumentStorage
+from app.services.storage_listing import ListingTokenError, decode_listing_token, encode_listing_token
+
+logger = logging.getLogger(__name__)
+
+
+_COPY_BUFFER_SIZE = 1024 * 1024
+_LOCAL_URL_SALT = 'local-storage-url'
+
+
+def local_storage_root():
+    root = current_app.config.get('LOCAL_STORAGE_ROOT')
+    return root or os.path.join(current_app.instance_path, 'storage')
+
+
+def _url_serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt=_LOCAL_URL_SALT)
+
+
+def sign_local_url(container_name, blob_name, expiry_seconds):
+    """Return a signed, expiring app URL for one stored file."""
+    token = _url_serializer().dumps({
+        'c': container_name,
+        'b': blob_name,
+        'e': int(time.time()) + int(expiry_seconds),
+    })
+    return url_for('main.local_storage_file', token=token, _external=True)
+
+
+def verify_local_url(token):
+    """Return (container_name, blob_name) for a valid, unexpired token, else None."""
+    try:
+        payload = _url_serializer().loads(token)
+    except BadSignature:
+        return None
+    if not isinstance(payload, dict) or int(payload.get('e') or 0) < time.time():
+        return None
+    return payload.get('c'), payload.get('b')
+
+
+def _changed(blob_name):
+    logger.error(f"Local file changed since it was recorded: {blob_name}")
+    return {
+        'success': False,
+        'error': 'File has changed since it was uploaded',
+        'error_code': 'FILE_CHANGED'
+    }
+
+
+class LocalFileStorageService(DocumentStorage):
+    """Document storage on local disk."""
+
+    def __init__(self, container_name=None):
+        self.root = local_storage_root()
+        self.container_name = container_name or current_app.config.get('AZURE_CONTAINER_NAME', 'compliance-documents')
+        self.base_dir = os.path.join(self.root, self.container_name)
+
+    def is_configured(self):
+        return True
+
+    def _paths(self, blob_name):
+        """Return (data_path, meta_path) for a blob, sharded by hash of its name."""
+        digest = hashlib.sha1(blob_name.encode('utf-8')).hexdigest()
+        directory = os.path.join(self.base_dir, digest[:2], digest[2:4])
+        data_path = os.path.join(directory, digest)
+        return data_path, data_path + '.json'
+
+    def _read_meta(self, blob_name):
+        data_path, meta_path = self._paths(blob_name)
+        if not os.path.exists(data_path):
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            stat = os.stat(data_path)
+            return {'name': blob_name, 'size': stat.st_size, 'content_type': None, 'metadata': {}, 'etag': None}
+
+    @staticmethod
+    def _atomic_write(path, write):
+        """Call write(fileobj) on a temp file next to `path`, then move it into place."""
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                result = write(f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            return result
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    @staticmethod
+    def _last_modified(path):
+        return datetime.fromtimestamp(os.stat(path).st_mtime, tz=timezone.utc)
+
+    def upload_file(self, file_stream, file_path, content_type=None, metadata=None):
+        """
+        Upload a file to local storage.
+
+        Args:
+            file_stream: File stream to upload
+            file_path: Path (blob name) for the file
+            content_type: MIME type of the file
+            metadata: Dictionary of metadata to store with the file
+
+        Returns:
+            dict: Upload result with success status and file info
+        """
+        def read_chunks():
+            while True:
+                chunk = file_stream.read(_COPY_BUFFER_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+        try:
+            return self._store(file_path, read_chunks(), content_type, metadata)
+        except Exception as e:
+            logger.error(f"Unexpected error uploading file {file_path} to local storage: {e}")
+            return {
+                'success': False,
+                'error': f'Upload failed: {str(e)}',
+                'error_code': 'UPLOAD_ERROR'
+            }
+
+    def _store(self, file_path, chunks, content_type=None, metadata=None):
+        """Atomically write `chunks` (an iterable of bytes) plus its sidecar; returns the upload result."""
+        data_path, meta_path = self._paths(file_path)
+
+        def copy(f):
+            digest = hashlib.sha256()
+            total = 0
+            for chunk in chunks:
+                f.write(chunk)
+                digest.update(chunk)
+                total += len(chunk)
+            return total, digest.hexdigest()
+
+        size, sha256 = self._atomic_write(data_path, copy)
+        etag = f'"{sha256[:32]}"'
+        meta = {
+            'name': file_path,
+            'size': size,
+            'content_type': content_type,
+            'metadata': dict(metadata or {}),
+            'etag': etag,
+        }
+        self._atomic_write(meta_path, lambda f: f.write(json.dumps(meta).encode('utf-8')))
+
+        return {
+            'success': True,
+            'file_path': file_path,
+            'size': size,
+            'last_modified': self._last_modified(data_path),
+            'etag': etag,
+            'url': None,
+            'storage_type': 'Local'
+        }
+
+    def _staging_dir(self, blob_name):
+        digest = hashlib.sha1(blob_name.encode('utf-8')).hexdigest()
+        return os.path.join(self.base_dir, '.staging', digest)
+
+    def stage_chunk(self, blob_name, index, data):
+        """Store one chunk of a resumable upload (re-staging the same index overwrites it)."""
+        try:
+            path = os.path.join(self._staging_dir(blob_name), f'{int(index):08d}')
+            self._atomic_write(path, lambda f: f.write(data))
+            return {'success': True, 'size': len(data)}
+        except Exception as e:
+            logger.error(f"Unexpected error staging chunk {index} of {blob_name}: {e}")
+            return {
+                'success': False,
+                'error': f'Upload failed: {str(e)}',
+                'error_code': 'UPLOAD_ERROR'
+            }
+
+    def commit_chunks(self, blob_name, chunk_count, content_type=None, metadata=None):
+        """Assemble staged chunks 0..chunk_count-1 into the final file."""
+        staging_dir = self._staging_dir(blob_name)
+        paths = [os.path.join(staging_dir, f'{i:08d}') for i in range(int(chunk_count))]
+        missing = [i for i, path in enumerate(paths) if not os.path.exists(path)]
+        if missing:
+            return {
+                'success': False,
+                'error': f'Missing chunks: {missing[:10]}',
+                'error_code': 'MISSING_CHUNKS'
+            }
+
+        def read_chunks():
+            for path in paths:
+                with open(path, 'rb') as f:
+                    while True:
+                        chunk = f.read(_COPY_BUFFER_SIZE)
+                        if not chunk:
+                            break
+                        yield chunk
+
+        try:
+            result = self._store(blob_name, read_chunks(), content_type, metadata)
+        except Exception as e:
+            logger.error(f"Unexpected error committing chunks of {blob_name}: {e}")
+            return {
+                'success': False,
+                'error': f'Upload failed: {str(e)}',
+                'error_code': 'UPLOAD_ERROR'
+            }
+        self.discard_chunks(blob_name)
+        return result
+
+    def discard_chunks(self, blob_name):
+        """Remove any staged chunks for a blob."""
+        shutil.rmtree(self._staging_dir(blob_name), ignore_errors=True)
+        return {'success': True}
+
+    def discard_stale_chunks(self, older_than_seconds):
+        """Remove staging dirs (abandoned uploads, crashed workers) not written to recently."""
+        root = os.path.join(self.base_dir, '.staging')
+        cutoff = time.time() - max(0, float(older_than_seconds))
+        removed = 0
+        try:
+            entries = list(os.scandir(root))
+        except FileNotFoundError:
+            return 0
+        for entry in entries:
+            try:
+                if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+    def download_file(self, blob_name, etag=None):
+        """
+        Download a file from local storage (only version `etag` when given).
+
+        Returns:
+            dict: Download result with success status and file data
+        """
+        meta = self._read_meta(blob_name)
+        if meta is None:
+            logger.error(f"Local file not found: {blob_name}")
+            return {
+                'success': False,
+                'error': 'File not found',
+                'error_code': 'FILE_NOT_FOUND'
+            }
+        if etag and meta.get('etag') != etag:
+            return _changed(blob_name)
+        try:
+            data_path, _meta_path = self._paths(blob_name)
+            with open(data_path, 'rb') as f:
+                data = f.read()
+            return {
+                'success': True,
+                'data': data,
+                'content_type': meta.get('content_type'),
+                'size': len(data),
+                'last_modified': self._last_modified(data_path)
+            }
+        except Exception as e:
+            logger.error(f"Unexpected error downloading local file {blob_name}: {e}")
+            return {
+                'success': False,
+                'error': f'Download failed: {str(e)}',
+                'error_code': 'DOWNLOAD_ERROR'
+            }
+
+    def open_download(self, blob_name, offset=None, length=None, etag=None):
+        """
+        Open a streaming download of a file, optionally limited to a byte range.
+
+        Returns:
+            dict: Result with success status, a `chunks` iterator and file properties
+        """
+        meta = self._read_meta(blob_name)
+        if meta is None:
+            logger.error(f"Local file not found: {blob_name}")
+            return {
+                'success': False,
+                'error': 'File not found',
+                'error_code': 'FILE_NOT_FOUND'
+            }
+        if etag and meta.get('etag') != etag:
+            return _changed(blob_name)
+        try:
+            data_path, _meta_path = self._paths(blob_name)
+            total_size = os.path.getsize(data_path)
+            start = min(int(offset or 0), total_size)
+            size = total_size - start if length is None else max(0, min(int(length), total_size - start))
+            f = open(data_path, 'rb')
+            f.seek(start)
+
+            def chunks():
+                remaining = size
+                try:
+                    while remaining > 0:
+                        chunk = f.read(min(_COPY_BUFFER_SIZE, remaining))
+                        if not chunk:
+                            return
+                        remaining -= len(chunk)
+                        yield chunk
+                finally:
+                    f.close()
+
+            return {
+                'success': True,
+                'chunks': chunks(),
+                'size': size,
+                'total_size': total_size,
+                'content_type': meta.get('content_type'),
+                'etag': meta.get('etag'),
+                'last_modified': self._last_modified(data_path)
+            }
+        except Exception as e:
+            logger.error(f"Unexpected error opening local download for {blob_name}: {e}")
+            return {
+                'success': False,
+                'error': f'Download failed: {str(e)}',
+                'error_code': 'DOWNLOAD_ERROR'
+            }
+
+    def get_local_path(self, blob_name):
+        data_path, _meta_path = self._paths(blob_name)
+        return data_path if os.path.exists(data_path) else None
+
+    def delete_file(self, blob_name):
+        """Delete a file (and its sidecar) from local storage."""
+        data_path, meta_path = self._paths(blob_name)
+        try:
+            existed = False
+            for path in (data_path, meta_path):
+                try:
+                    os.unlink(path)
+                    existed = True
+                except FileNotFoundError:
+                    pass
+            if not existed:
+                logger.warning(f"Attempted to delete non-existent local file: {blob_name}")
+                return {
+                    'success': True,
+                    'message': 'File already deleted or does not exist'
+                }
+            return {
+                'success': True,
+                'message': f'File {blob_name} deleted successfully'
+            }
+        except Exception as e:
+            logger.error(f"Unexpected error deleting local file {blob_name}: {e}")
+            return {
+                'success': False,
+                'error': f'Delete failed: {str(e)}',
+                'error_code': 'DELETE_ERROR'
+            }
+
+    def list_files(self, prefix=None, max_results=None, continuation_token=None, newest=False):
+        """
+        List files in the container (walks the sidecars; meant for dev/test volumes).
+
+        Same paging contract as AzureBlobStorageService.list_files(): with max_results one
+        page is returned with the continuation_token of the next (None on the last page).
+        """
+        try:
+            _source, after = decode_listing_token(continuation_token, prefix)
+        except ListingTokenError as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'INVALID_CONTINUATION_TOKEN'
+            }
+        try:
+            file_list = []
+            for dirpath, dirnames, filenames in os.walk(self.base_dir):
+                dirnames[:] = [d for d in dirnames if d != '.staging']
+                for name in filenames:
+                    if not name.endswith('.json') or name.startswith('.tmp-'):
+                        continue
+                    try:
+                        with open(os.path.join(dirpath, name), 'r', encoding='utf-8') as f:
+                            meta = json.load(f)
+                    except (OSError, ValueError):
+                        continue
+                    blob_name = meta.get('name') or ''
+                    if prefix and not blob_name.startswith(prefix):
+                        continue
+                    data_path = os.path.join(dirpath, name[:-len('.json')])
+                    if not os.path.exists(data_path):
+                        continue
+                    file_list.append({
+                        'name': blob_name,
+                        'size': meta.get('size'),
+                        'last_modified': self._last_modified(data_path),
+                        'content_type': meta.get('content_type')
+                    })
+            next_token = None
+            if newest and max_results:
+                file_list.sort(key=lambda item: item['last_modified'], reverse=True)
+                file_list = file_list[:int(max_results)]
+            else:
+                file_list.sort(key=lambda item: item['name'])
+                if after:
+                    file_list = [item for item in file_list if item['name'] > after]
+                if max_results and len(file_list) > int(max_results):
+                    file_list = file_list[:int(max_results)]
+                    next_token = encode_listing_token(prefix, file_list[-1]['name'], 'local')
+            return {
+                'success': True,
+                'files': file_list,
+                'count': len(file_list),
+                'continuation_token': next_token
+            }
+        except Exception as e:
+            logger.error(f"Unexpected error listing local files: {e}")
+            return {
+                'success': False,
+                'error': f'List operation failed: {str(e)}',
+                'error_code': 'LIST_ERROR'
+            }
+
+    def get_file_url(self, blob_name, expiry_hours=1):
+        """Generate a signed, expiring app URL for reading a file."""
+        try:
+            return {
+                'success': True,
+                'url': sign_local_url(self.container_name, blob_name, int(expiry_hours * 3600)),
+                'expires_in_hours': expiry_hours
+            }
+        except Exception as e:
+            logger.error(f"Error generating local URL for {blob_name}: {e}")
+            return {
+                'success': False,
+                'error': f'URL generation failed: {str(e)}',
+                'error_code': 'URL_ERROR'
+            }
+
+    def get_upload_url(self, blob_name, expiry_minutes=15):
+        """Direct-to-storage uploads need a real storage endpoint; callers fall back to form uploads."""
+        return {
+            'success': False,
+            'error': 'Direct uploads are not supported by local storage',
+            'error_code': 'URL_ERROR'
+        }
+
+
+class LocalAssetStorageService(AssetStorage):
+    """Organisation asset (logo/branding) storage on local disk."""
+
+    def __init__(self):
+        self.logos_container_name = os.getenv('AZURE_LOGOS_CONTAINER_NAME') or 'logos'
+        self._files = LocalFileStorageService(container_name=self.logos_container_name)
+
+    def _full_name(self, blob_name, organization_id=None, upload=False):
+        if organization_id is None:
+            return blob_name
+        if upload or not blob_name.startswith('org_'):
+            return self._get_org_folder(organization_id) + blob_name
+        return blob_name
+
+    def upload_blob(self, blob_name: str, data: bytes, content_type: str = None, organization_id: int = None) -> bool:
+        full_blob_name = self._full_name(blob_name, organization_id, upload=True)
+        result = self._files.upload_file(io.BytesIO(data), full_blob_name, content_type=content_type)
+        if not result['success']:
+            logger.error(f"Error uploading local asset {full_blob_name}: {result['error']}")
+        return bool(result['success'])
+
+    def download_blob(self, blob_name: str, organization_id: int = None):
+        result = self._files.download_file(self._full_name(blob_name, organization_id))
+        return result['data'] if result['success'] else None
+
+    def delete_blob(self, blob_name: str, organization_id: int = None) -> bool:
+        return bool(self._files.delete_file(self._full_name(blob_name, organization_id))['success'])
+
+    def blob_exists(self, blob_name: str, organization_id: int = None) -> bool:
+        return self._files.get_local_path(self._full_name(blob_name, organization_id)) is not None
+
+    def get_blob_url(self, blob_name: str, organization_id: int = None):
+        result = self._files.get_file_url(self._full_name(blob_name, organization_id))
+        return result['url'] if result['success'] else None
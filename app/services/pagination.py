@@ -0,0 +1,180 @@
+"""
+Keyset (cursor) pagination.
+
+OFFSET pagination reads and discards every row before the requested page and usually
+runs a COUNT as well, so page N gets slower as N grows. keyset_paginate() instead
+seeks past the last row shown with a row-value predicate on the sort columns, e.g.
+
+    WHERE (uploaded_at, id) < (:last_uploaded_at, :last_id)
+    ORDER BY uploaded_at DESC, id DESC LIMIT :per_page + 1
+
+which an index ending in those columns (ix_documents_org_active_uploaded_at) answers
+directly, so every page costs the same as the first. Cursors are opaque URL-safe
+strings; totals are optional and cached per process for a short time.
+"""
+
+import json
+import base64
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+from app.models import Document
+from app.services.cache import get_cache
+
+
+class CursorError(ValueError):
+    """Raised for a cursor that cannot be decoded."""
+
+
+class KeysetPage:
+    """One page of a keyset-paginated query."""
+
+    def __init__(self, items, per_page, next_cursor=None, prev_cursor=None, total=None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def to_dict(self):
+        return {
+            'per_page': self.per_page,
+            'next_cursor': self.next_cursor,
+            'prev_cursor': self.prev_cursor,
+            'has_next': self.has_next,
+            'has_prev': self.has_prev,
+            'total': self.total,
+        }
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and 'dt' in value:
+        return datetime.fromisoformat(value['dt'])
+    return value
+
+
+def encode_cursor(values, direction='next'):
+    payload = json.dumps({'d': direction, 'v': [_encode_value(v) for v in values]}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, width):
+    """Return (direction, values) for a cursor produced by encode_cursor()."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw.decode('utf-8'))
+        direction = payload['d']
+        values = [_decode_value(v) for v in payload['v']]
+    except Exception as e:
+        raise CursorError(f'Invalid cursor: {e}') from e
+    if direction not in {'next', 'prev'} or len(values) != width:
+        raise CursorError('Invalid cursor')
+    return direction, values
+
+
+def keyset_paginate(query, columns, per_page=50, cursor=None, total=None):
+    """
+    Paginate `query` newest-first by `columns` (all descending; the last must be unique).
+
+    Args:
+        query: SQLAlchemy query, already filtered but not ordered
+        columns: sort columns, e.g. (Document.uploaded_at, Document.id)
+        per_page: page size
+        cursor: next_cursor / prev_cursor from a previous page, or None for the first page
+        total: optional precomputed total to attach to the page
+
+    Returns:
+        KeysetPage (raises CursorError for a malformed cursor)
+    """
+    columns = list(columns)
+    direction, values = ('next', None)
+    if cursor:
+        direction, values = decode_cursor(cursor, len(columns))
+
+    key = tuple_(*columns)
+    if direction == 'prev':
+        # Walk backwards (ascending) from the first row of the current page, then flip.
+        if values is not None:
+            query = query.filter(key > tuple_(*values))
+        rows = query.order_by(*[c.asc() for c in columns]).limit(per_page + 1).all()
+        has_more = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        has_prev, has_next = has_more, True
+    else:
+        if values is not None:
+            query = query.filter(key < tuple_(*values))
+        rows = query.order_by(*[c.desc() for c in columns]).limit(per_page + 1).all()
+        items = rows[:per_page]
+        has_next, has_prev = len(rows) > per_page, values is not None
+
+    def row_key(item):
+        return [getattr(item, c.key) for c in columns]
+
+    return KeysetPage(
+        items,
+        per_page,
+        next_cursor=encode_cursor(row_key(items[-1]), 'next') if items and has_next else None,
+        prev_cursor=encode_cursor(row_key(items[0]), 'prev') if items and has_prev else None,
+        total=total,
+    )
+
+
+_COUNT_CACHE = get_cache('document_count', max_entries=4096)
+
+
+def cached_count(key, query, ttl_seconds=60):
+    """COUNT(*) of `query`, cached per process for ttl_seconds under `key`."""
+    hit = _COUNT_CACHE.get(key)
+    if hit is not None:
+        return hit
+
+    count = query.order_by(None).count()
+    _COUNT_CACHE.set(key, count, ttl=ttl_seconds)
+    return count
+
+
+def invalidate_count(key):
+    _COUNT_CACHE.delete(key)
+
+
+def active_documents_query(organization_id):
+    return Document.query.filter_by(organization_id=int(organization_id), is_active=True)
+
+
+def document_count(organization_id, ttl_seconds=60):
+    """Cached number of active documents in an organisation."""
+    return cached_count(('documents', int(organization_id)), active_documents_query(organization_id), ttl_seconds)
+
+
+def invalidate_document_count(organization_id):
+    """Drop this process's cached count after an upload or delete."""
+    invalidate_count(('documents', int(organization_id)))
+
+
+def paginate_documents(organization_id, per_page=50, cursor=None, with_total=False):
+    """Newest-first page of an organisation's active documents, uploaders eager-loaded."""
+    from sqlalchemy.orm import joinedload
+
+    query = active_documents_query(organization_id).options(joinedload(Document.uploader))
+    return keyset_paginate(
+        query,
+        (Document.uploaded_at, Document.id),
+        per_page=per_page,
+        cursor=cursor,
+        total=document_count(organization_id) if with_total else None,
+    )
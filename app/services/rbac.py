@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import time
 from dataclasses import dataclass
 from typing import Iterable
 
+from flask import g, has_request_context, session
+from sqlalchemy import bindparam, text
+
 from app import db
 from app.models import OrganizationMembership
 
@@ -31,6 +35,13 @@ PERMISSIONS: dict[str, str] = {
 }
 
 
+# One bit per permission code for compiled role masks (RBACRole.permission_mask).
+# Append-only: masks stored on roles and in session principals depend on these positions.
+PERMISSION_BITS: dict[str, int] = {code: 1 << i for i, code in enumerate(PERMISSIONS)}
+
+PRINCIPAL_SESSION_KEY = 'rbac_principal'
+
+
 DEFAULT_ROLE_GRANTS: dict[str, list[str]] = {
     BUILTIN_ROLE_KEYS.MEMBER: ['documents.view', 'documents.upload'],
     BUILTIN_ROLE_KEYS.AUDITOR: ['documents.view', 'audits.export'],
@@ -172,3 +183,192 @@ def choose_default_role_id_for_membership(m: OrganizationMembership) -> int | No
         .first()
     )
     return int(role.id) if role else None
+
+
+# Inheritance deeper than this is ignored (it also bounds the walk around cycles).
+MAX_INHERITANCE_DEPTH = 32
+
+_DELETE_ORG_ROWS = """
+    DELETE FROM {table} WHERE role_id IN (SELECT id FROM rbac_roles WHERE organization_id = :org_id)
+"""
+
+_INSERT_ORG_CLOSURE = text("""
+    INSERT INTO rbac_role_closure (role_id, ancestor_role_id, depth)
+    WITH RECURSIVE closure(role_id, ancestor_role_id, depth) AS (
+        SELECT id, id, 0 FROM rbac_roles WHERE organization_id = :org_id
+        UNION
+        SELECT c.role_id, i.inherited_role_id, c.depth + 1
+        FROM closure c JOIN rbac_role_inherits i ON i.role_id = c.ancestor_role_id
+        WHERE c.depth < :max_depth
+    )
+    SELECT role_id, ancestor_role_id, MIN(depth) FROM closure GROUP BY role_id, ancestor_role_id
+""")
+
+_INSERT_ORG_EFFECTIVE_PERMISSIONS = text("""
+    INSERT INTO rbac_role_effective_permissions (role_id, permission_id)
+    SELECT DISTINCT c.role_id, rp.permission_id
+    FROM rbac_role_closure c
+    JOIN rbac_roles r ON r.id = c.role_id
+    JOIN rbac_role_permissions rp ON rp.role_id = c.ancestor_role_id
+    WHERE r.organization_id = :org_id
+""")
+
+
+def materialize_role_permissions(connection, org_ids: Iterable[int], deleted_role_ids: Iterable[int] = ()) -> dict[int, int]:
+    """Rebuild rbac_role_closure, rbac_role_effective_permissions and permission masks for orgs.
+
+    Runs on the caller's connection so it commits or rolls back with the edit itself.
+    Returns {role_id: permission_mask} for the rebuilt roles.
+    """
+    # Deleted roles are already gone from rbac_roles (and FK cascades are not enforced everywhere).
+    deleted = sorted({int(rid) for rid in deleted_role_ids})
+    if deleted:
+        for statement in (
+            'DELETE FROM rbac_role_closure WHERE role_id IN :ids OR ancestor_role_id IN :ids',
+            'DELETE FROM rbac_role_effective_permissions WHERE role_id IN :ids',
+        ):
+            connection.execute(text(statement).bindparams(bindparam('ids', expanding=True)), {'ids': deleted})
+
+    masks: dict[int, int] = {}
+    for org_id in sorted({int(org_id) for org_id in org_ids}):
+        params = {'org_id': org_id}
+        connection.execute(text(_DELETE_ORG_ROWS.format(table='rbac_role_effective_permissions')), params)
+        connection.execute(text(_DELETE_ORG_ROWS.format(table='rbac_role_closure')), params)
+        connection.execute(_INSERT_ORG_CLOSURE, {'org_id': org_id, 'max_depth': MAX_INHERITANCE_DEPTH})
+        connection.execute(_INSERT_ORG_EFFECTIVE_PERMISSIONS, params)
+
+        roles = dict(connection.execute(
+            text('SELECT id, permission_mask FROM rbac_roles WHERE organization_id = :org_id'), params
+        ).all())
+        codes_by_role: dict[int, list[str]] = {int(rid): [] for rid in roles}
+        for rid, code in connection.execute(text("""
+            SELECT ep.role_id, p.code
+            FROM rbac_role_effective_permissions ep
+            JOIN rbac_roles r ON r.id = ep.role_id
+            JOIN rbac_permissions p ON p.id = ep.permission_id
+            WHERE r.organization_id = :org_id
+        """), params):
+            codes_by_role[int(rid)].append(code)
+
+        for rid, codes in codes_by_role.items():
+            mask = compile_permission_mask(codes)
+            masks[rid] = mask
+            if roles[rid] != mask:
+                connection.execute(
+                    text('UPDATE rbac_roles SET permission_mask = :mask WHERE id = :id'), {'mask': mask, 'id': rid}
+                )
+    return masks
+
+
+def role_has_permission(role_id: int, code: str) -> bool:
+    """Whether the role holds `code` directly or through inheritance (one indexed lookup)."""
+    from app.models import RBACPermission, rbac_role_effective_permissions as effective
+
+    return db.session.execute(
+        db.select(effective.c.role_id)
+        .join(RBACPermission, RBACPermission.id == effective.c.permission_id)
+        .where(effective.c.role_id == int(role_id), RBACPermission.code == code)
+    ).first() is not None
+
+
+def memberships_with_permission(org_id: int, code: str, active_only: bool = True):
+    """Query of the org's memberships whose RBAC role grants `code` (a single join).
+
+    Legacy memberships without role_id are not included.
+    """
+    from app.models import RBACPermission, rbac_role_effective_permissions as effective
+
+    query = (
+        OrganizationMembership.query
+        .join(effective, effective.c.role_id == OrganizationMembership.role_id)
+        .join(RBACPermission, RBACPermission.id == effective.c.permission_id)
+        .filter(OrganizationMembership.organization_id == int(org_id), RBACPermission.code == code)
+    )
+    if active_only:
+        query = query.filter(OrganizationMembership.is_active.is_(True))
+    return query
+
+
+def compile_permission_mask(codes: Iterable[str]) -> int:
+    """Bitmask of the known permission codes in `codes` (unknown codes are ignored)."""
+    mask = 0
+    for code in codes:
+        mask |= PERMISSION_BITS.get(code, 0)
+    return mask
+
+
+def _principal_is_current(snapshot, user_id: int, org_id: int, max_age: int) -> bool:
+    from app.services.cache_generations import changed_since
+
+    try:
+        if snapshot.get('uid') != user_id or snapshot.get('org') != org_id:
+            return False
+        if time.time() - float(snapshot['at']) >= max_age:
+            return False
+        rbac_gen, user_gen = snapshot['gen']
+        return not (changed_since('rbac', org_id, int(rbac_gen)) or changed_since('user', user_id, int(user_gen)))
+    except Exception:
+        return False
+
+
+def _compile_principal(user, org_id: int) -> dict | None:
+    from app.services.cache_generations import current_generations
+
+    # Generations are read first: any later role/membership edit bumps past them.
+    heads = current_generations(('rbac', 'user'))
+    if heads is None:
+        return None
+
+    membership = user.active_membership(org_id=org_id)
+    if membership is None:
+        membership_id, role_id, mask = None, None, 0
+    elif membership.rbac_role is None:
+        # Legacy memberships keep the uncompiled has_permission path.
+        return None
+    else:
+        role = membership.rbac_role
+        membership_id, role_id = int(membership.id), int(role.id)
+        mask = role.permission_mask
+        if mask is None:
+            mask = compile_permission_mask(role.effective_permission_codes())
+
+    return {
+        'uid': int(user.id),
+        'org': int(org_id),
+        'm': membership_id,
+        'r': role_id,
+        'mask': int(mask),
+        'gen': [heads['rbac'], heads['user']],
+        'at': int(time.time()),
+    }
+
+
+def load_principal(user, org_id: int) -> dict | None:
+    """RBAC principal snapshot for `user` in `org_id`, or None to use the uncompiled path.
+
+    The snapshot (org, membership, role, permission mask, cache generations) lives in the
+    signed session, so a typical request answers permission checks with a bit test and
+    no queries. It is rebuilt when the org's 'rbac' or the user's 'user' cache
+    generation moves, and at least every RBAC_PERMS_CACHE_SECONDS.
+    """
+    from app.models import _rbac_effective_perms_cache_ttl_seconds
+
+    if not has_request_context():
+        return None
+    max_age = _rbac_effective_perms_cache_ttl_seconds()
+    if max_age <= 0:
+        return None
+
+    user_id, org_id = int(user.id), int(org_id)
+    principal = getattr(g, '_rbac_principal', None)
+    if principal and principal['uid'] == user_id and principal['org'] == org_id:
+        return principal
+
+    principal = session.get(PRINCIPAL_SESSION_KEY)
+    if not isinstance(principal, dict) or not _principal_is_current(principal, user_id, org_id, max_age):
+        principal = _compile_principal(user, org_id)
+        if principal is None:
+            return None
+        session[PRINCIPAL_SESSION_KEY] = principal
+    g._rbac_principal = principal
+    return principal
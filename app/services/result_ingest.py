@@ -0,0 +1,180 @@
+"""
+Columnar ingestion of ML compliance result CSVs.
+
+The row-by-row path (csv.DictReader into a list of dicts, then several scans in
+AzureDataLakeService.process_adls_data) is CPU-bound for result files with tens of
+thousands of requirement rows. Here the downloaded bytes go straight into a pandas
+DataFrame, the Framework / Compliance_Score / Status columns are normalised once, and
+summarize_frame() computes the status counts and score statistics with vectorized
+operations. Output matches process_adls_data() key for key.
+
+pandas is optional at import time; callers use should_vectorize() and fall back to
+the row-by-row path without it (and for small files).
+"""
+
+import io
+import csv
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    np = None
+    pd = None
+
+PANDAS_AVAILABLE = pd is not None
+
+RESULT_COLUMNS = ('Framework', 'Compliance_Score', 'Status')
+
+# Below roughly 2k rows DataFrame setup costs more than it saves
+# (see scripts/bench_result_ingest.py).
+VECTORIZE_MIN_BYTES = 64 * 1024
+
+
+def should_vectorize(file_path, content):
+    """True when a downloaded result file is a CSV large enough for the pandas path."""
+    return PANDAS_AVAILABLE and file_path.endswith('.csv') and len(content) >= VECTORIZE_MIN_BYTES
+
+
+def status_for_score(score):
+    """Overall status label for a 0-10 compliance score (same thresholds as process_adls_data)."""
+    if score >= 9:
+        return 'Excellent'
+    if score >= 7:
+        return 'Good'
+    if score >= 5:
+        return 'Needs Attention'
+    return 'Critical'
+
+
+def _empty_frame():
+    return pd.DataFrame({
+        'Framework': pd.Categorical([]),
+        'Compliance_Score': pd.Series([], dtype=float),
+        'Status': pd.Categorical([]),
+    })
+
+
+def _header_names(data):
+    first_line = data.split(b'\n', 1)[0].decode('utf-8-sig').rstrip('\r')
+    return next(csv.reader([first_line]), [])
+
+
+def _normalise_text(column):
+    """Strip a text column via its distinct values (result files repeat a handful of labels)."""
+    codes, uniques = pd.factorize(column, use_na_sentinel=False)
+    stripped_codes, stripped = pd.factorize(pd.Index(uniques, dtype=object).str.strip())
+    return pd.Categorical.from_codes(stripped_codes[codes], categories=stripped)
+
+
+def parse_result_csv(data):
+    """
+    Parse result CSV bytes into a DataFrame with the known, normalised columns.
+
+    Header names are matched after stripping whitespace; other columns are never
+    materialised. Text columns are stripped (missing -> '') and stored as categoricals;
+    scores are numeric (missing or unparseable -> 0.0). A file with none of the known
+    columns parses as empty.
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    if not data or not data.strip():
+        return _empty_frame()
+
+    # Duplicate headers (after stripping) keep the last one, like csv.DictReader.
+    wanted = {}
+    for position, name in enumerate(_header_names(data)):
+        if name.strip() in RESULT_COLUMNS:
+            wanted[name.strip()] = position
+    if not wanted:
+        return _empty_frame()
+
+    read = dict(
+        header=0,
+        usecols=sorted(wanted.values()),
+        keep_default_na=False,
+        encoding='utf-8-sig',
+    )
+    score_position = wanted.get('Compliance_Score')
+    try:
+        # Parse scores as floats in the C parser; blanks become NaN.
+        frame = pd.read_csv(
+            io.BytesIO(data),
+            dtype={p: (float if p == score_position else object) for p in wanted.values()},
+            na_values={score_position: ['']} if score_position is not None else None,
+            **read,
+        )
+    except ValueError:
+        # Some score is not a number: read as text and coerce.
+        frame = pd.read_csv(io.BytesIO(data), dtype=object, **read)
+    frame.columns = [name for name, _ in sorted(wanted.items(), key=lambda item: item[1])]
+
+    for column in ('Framework', 'Status'):
+        if column in frame:
+            frame[column] = _normalise_text(frame[column])
+    if 'Compliance_Score' in frame:
+        scores = frame['Compliance_Score']
+        if scores.dtype == object:
+            scores = pd.to_numeric(scores.str.strip(), errors='coerce')
+        frame['Compliance_Score'] = scores.fillna(0.0).astype(float)
+    return frame
+
+
+def summarize_frame(frame):
+    """process_adls_data() for a parsed result DataFrame, plus score_stats over the framework rows."""
+    total = len(frame.index)
+    if 'Framework' in frame:
+        framework = frame['Framework'].cat
+        is_overall = np.asarray(framework.categories.str.lower() == 'overall')[framework.codes]
+    else:
+        is_overall = np.zeros(total, dtype=bool)
+    rows = frame[~is_overall]
+
+    counts = {}
+    if 'Status' in rows and len(rows.index):
+        status = rows['Status'].cat
+        per_label = np.bincount(status.codes, minlength=len(status.categories))
+        for label, count in zip(status.categories.str.lower(), per_label.tolist()):
+            counts[label] = counts.get(label, 0) + count
+    scores = rows['Compliance_Score'] if 'Compliance_Score' in rows else pd.Series(0.0, index=rows.index)
+
+    compliancy_rate = 0.0
+    if is_overall.any() and 'Compliance_Score' in frame:
+        compliancy_rate = float(frame['Compliance_Score'].to_numpy()[is_overall][0] or 0)
+
+    names = rows['Framework'].tolist() if 'Framework' in rows else ['Unknown'] * len(rows.index)
+    statuses = rows['Status'].tolist() if 'Status' in rows else ['Unknown'] * len(rows.index)
+    frameworks = [
+        {'name': name, 'score': score, 'status': status}
+        for name, score, status in zip(names, scores.tolist(), statuses)
+    ]
+
+    return {
+        'total_requirements': len(rows.index),
+        'complete_count': int(counts.get('complete', 0)),
+        'needs_review_count': int(counts.get('needs review', 0)),
+        'missing_count': int(counts.get('missing', 0)),
+        'overall_status': status_for_score(compliancy_rate) if total else 'No Data',
+        'compliancy_rate': round(compliancy_rate, 2),
+        'weighted_score': round(compliancy_rate, 2),
+        'frameworks': frameworks,
+        'score_stats': _score_stats(scores),
+    }
+
+
+def _score_stats(scores):
+    if not len(scores.index):
+        return {'min': 0.0, 'max': 0.0, 'mean': 0.0}
+    values = scores.to_numpy(dtype=float)
+    return {
+        'min': round(float(values.min()), 2),
+        'max': round(float(values.max()), 2),
+        'mean': round(float(values.mean()), 2),
+    }
+
+
+def frame_to_rows(frame):
+    """The list-of-dicts shape read_adls_file() returns for CSVs."""
+    columns = list(frame.columns)
+    # Plain zip over column lists: DataFrame.to_dict('records') is several times slower.
+    return [dict(zip(columns, values)) for values in zip(*(frame[c].tolist() for c in columns))]
@@ -0,0 +1,233 @@
+"""
+Constant-memory streaming of ML result files.
+
+read_adls_file() holds the whole blob, then every parsed row, in memory; a very large
+result file can push a worker out of memory. stream_result() instead consumes the
+download as a chunk iterator, decodes incrementally, parses CSV rows / JSON array
+elements lazily and feeds each row to a ResultAggregator, so peak memory is bounded by
+the chunk size and the sample size rather than the file size.
+
+ResultAggregator is also what process_adls_data() runs on, so a streamed summary has
+the same totals, counts and overall score. What is bounded is the per-requirement
+detail: 'frameworks' keeps the first `sample_rows` entries (with
+'frameworks_truncated' set when more were dropped) and the caller gets the first
+`sample_rows` raw rows for the detail view.
+"""
+
+import csv
+import json
+import codecs
+
+from app.services.result_ingest import status_for_score
+
+
+class ResultAggregator:
+    """Online equivalent of AzureDataLakeService.process_adls_data()."""
+
+    def __init__(self, max_frameworks=None, sample_rows=0):
+        self.max_frameworks = max_frameworks
+        self.sample_rows = max(0, int(sample_rows or 0))
+        self.sample = []
+        self.rows_seen = 0
+        self.total_requirements = 0
+        self.complete_count = 0
+        self.needs_review_count = 0
+        self.missing_count = 0
+        self.overall_row = None
+        self.frameworks = []
+        self.frameworks_dropped = 0
+        self._score_min = None
+        self._score_max = None
+        self._score_sum = 0.0
+
+    def add(self, row):
+        self.rows_seen += 1
+        if len(self.sample) < self.sample_rows:
+            self.sample.append(row)
+
+        # The "Overall" row carries the score; every other row is a requirement.
+        if row.get('Framework', '').lower() == 'overall':
+            if self.overall_row is None:
+                self.overall_row = row
+            return
+
+        self.total_requirements += 1
+        status = row.get('Status', '').lower()
+        if status == 'complete':
+            self.complete_count += 1
+        elif status == 'needs review':
+            self.needs_review_count += 1
+        elif status == 'missing':
+            self.missing_count += 1
+
+        score = float(row.get('Compliance_Score', 0))
+        self._score_sum += score
+        self._score_min = score if self._score_min is None else min(self._score_min, score)
+        self._score_max = score if self._score_max is None else max(self._score_max, score)
+
+        if self.max_frameworks is None or len(self.frameworks) < self.max_frameworks:
+            self.frameworks.append({
+                'name': row.get('Framework', 'Unknown'),
+                'score': score,
+                'status': row.get('Status', 'Unknown'),
+            })
+        else:
+            self.frameworks_dropped += 1
+
+    def summary(self):
+        if not self.rows_seen:
+            return {
+                'total_requirements': 0,
+                'complete_count': 0,
+                'needs_review_count': 0,
+                'missing_count': 0,
+                'overall_status': 'No Data',
+                'compliancy_rate': 0,
+                'weighted_score': 0,
+                'frameworks': [],
+                'score_stats': {'min': 0.0, 'max': 0.0, 'mean': 0.0},
+            }
+
+        overall_score = self.overall_row.get('Compliance_Score', 0) if self.overall_row else 0
+        compliancy_rate = float(overall_score) if overall_score else 0
+        count = self.total_requirements
+        summary = {
+            'total_requirements': count,
+            'complete_count': self.complete_count,
+            'needs_review_count': self.needs_review_count,
+            'missing_count': self.missing_count,
+            'overall_status': status_for_score(compliancy_rate),
+            'compliancy_rate': round(compliancy_rate, 2),
+            'weighted_score': round(compliancy_rate, 2),
+            'frameworks': self.frameworks,
+            'score_stats': {
+                'min': round(self._score_min, 2) if count else 0.0,
+                'max': round(self._score_max, 2) if count else 0.0,
+                'mean': round(self._score_sum / count, 2) if count else 0.0,
+            },
+        }
+        if self.frameworks_dropped:
+            summary['frameworks_truncated'] = True
+        return summary
+
+
+def normalise_csv_row(row):
+    """Map a csv.DictReader row to the Framework / Compliance_Score / Status row shape."""
+    processed_row = {}
+    for key, value in row.items():
+        if key is None:
+            continue
+        clean_key = key.strip()
+        if clean_key == 'Framework':
+            processed_row['Framework'] = value.strip() if value else ''
+        elif clean_key == 'Compliance_Score':
+            processed_row['Compliance_Score'] = float(value) if value else 0.0
+        elif clean_key == 'Status':
+            processed_row['Status'] = value.strip() if value else ''
+    return processed_row
+
+
+def iter_text(chunks, encoding='utf-8-sig'):
+    """Decode a byte-chunk iterator incrementally (multi-byte characters may span chunks)."""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def _iter_lines(texts):
+    pending = ''
+    for text in texts:
+        pending += text
+        if '\n' not in pending:
+            continue
+        *lines, pending = pending.split('\n')
+        for line in lines:
+            yield line + '\n'
+    if pending:
+        yield pending
+
+
+def iter_csv_rows(texts):
+    """Normalised result rows from a text-chunk iterator (quoted newlines are handled by csv)."""
+    for row in csv.DictReader(_iter_lines(texts)):
+        processed_row = normalise_csv_row(row)
+        if processed_row:
+            yield processed_row
+
+
+def iter_json_rows(texts):
+    """
+    Elements of a top-level JSON array, decoded one at a time from a text-chunk iterator.
+
+    A top-level object is a single row (it has to be read whole).
+    """
+    texts = iter(texts)
+    decoder = json.JSONDecoder()
+    buf, pos, done = '', 0, False
+
+    def fill():
+        nonlocal buf, pos, done
+        if done:
+            return False
+        try:
+            chunk = next(texts)
+        except StopIteration:
+            done = True
+            return False
+        # Drop what has been consumed so the buffer holds at most one partial element.
+        buf, pos = buf[pos:] + chunk, 0
+        return True
+
+    def skip(chars):
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in chars:
+                pos += 1
+            if pos < len(buf) or not fill():
+                return pos < len(buf)
+
+    if not skip(' \t\r\n'):
+        return
+    if buf[pos] != '[':
+        while fill():
+            pass
+        yield json.loads(buf[pos:])
+        return
+
+    pos += 1
+    while skip(' \t\r\n,'):
+        if buf[pos] == ']':
+            return
+        try:
+            value, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if fill():
+                continue
+            raise
+        # A number or literal that ends the buffer may continue in the next chunk.
+        if end == len(buf) and fill():
+            continue
+        pos = end
+        yield value
+    raise ValueError('Unterminated JSON array')
+
+
+def stream_result(chunks, file_path, sample_rows=1000):
+    """
+    Summarise a result file from a byte-chunk iterator in constant memory.
+
+    Returns:
+        (sample, summary): the first `sample_rows` rows and the process_adls_data()-style
+        summary (frameworks bounded to `sample_rows` entries)
+    """
+    texts = iter_text(chunks)
+    rows = iter_csv_rows(texts) if file_path.endswith('.csv') else iter_json_rows(texts)
+    aggregator = ResultAggregator(max_frameworks=sample_rows, sample_rows=sample_rows)
+    for row in rows:
+        aggregator.add(row)
+    return aggregator.sample, aggregator.summary()
@@ -0,0 +1,200 @@
+"""
+Cross-worker backends for BoundedCache namespaces created with shared=True.
+
+BoundedCache is per process, so with `gunicorn -w 4` every summary, org switcher
+payload and logo is fetched and stored four times, and an invalidation only reaches the
+worker that handled the request. With CACHE_URL set, shared namespaces also read and
+write a backend every worker sees, and deletes go to it as well:
+
+    CACHE_URL=redis://cache-host:6379/0     any Redis-protocol server (needs `redis`)
+    CACHE_URL=sqlite:///instance/cache.db   one file shared by the workers on a host
+    CACHE_URL=memory:// (or unset)          per-process only
+
+The in-process tier keeps serving hot keys; its entries live at most
+CACHE_LOCAL_TTL_SECONDS when a backend is configured, which bounds how long another
+worker can keep a value that was deleted elsewhere. Values are pickled, so a backend
+must only be reachable by this application. Backend errors are logged and the cache
+falls back to the in-process tier.
+"""
+
+import os
+import time
+import pickle
+import logging
+import sqlite3
+import itertools
+import threading
+from abc import ABC, abstractmethod
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+def encode_key(namespace, key) -> str:
+    """
+    Backend key for (namespace, key); prefixes of tuple and str keys stay string prefixes.
+
+    A tuple key's encoding starts with the encoding of each of its leading sub-tuples, so
+    delete_prefix((user_id,)) becomes a string-prefix delete.
+    """
+    if isinstance(key, tuple):
+        return f'{namespace}\x1f' + ''.join(f'{part!r}\x1f' for part in key)
+    if isinstance(key, str):
+        return f'{namespace}\x1e{key}'
+    return f'{namespace}\x1d{key!r}'
+
+
+def namespace_prefixes(namespace) -> tuple[str, ...]:
+    """Backend key prefixes covering every key of `namespace` (and no other namespace's)."""
+    return tuple(f'{namespace}{separator}' for separator in ('\x1f', '\x1e', '\x1d'))
+
+
+class SharedCacheBackend(ABC):
+    """Contract for shared backends (keys are encode_key() strings, ttl in seconds or None)."""
+
+    @abstractmethod
+    def get(self, key):
+        """(value, expires_at wall-clock or None), or None when missing or expired."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key):
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_prefix(self, prefix):
+        raise NotImplementedError
+
+
+class SqliteCacheBackend(SharedCacheBackend):
+    """Single-host shared cache in one SQLite file (WAL mode; one connection per thread)."""
+
+    PURGE_EVERY = 256
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        # Counts set() calls across threads (next() on a count is atomic).
+        self._sets = itertools.count(1)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache_entries ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)'
+            )
+
+    def _connect(self):
+        # A connection must not cross a fork: reconnect when the pid changes.
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute(
+            'SELECT value, expires_at FROM cache_entries WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)',
+            (key, time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(row[0]), row[1]
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, sqlite3.Binary(pickle.dumps(value, pickle.HIGHEST_PROTOCOL)), now + ttl if ttl else None),
+        )
+        if next(self._sets) % self.PURGE_EVERY == 0:
+            conn.execute('DELETE FROM cache_entries WHERE expires_at <= ?', (now,))
+
+    def delete(self, key):
+        self._connect().execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+
+    def delete_prefix(self, prefix):
+        # Range scan on the primary key; U+10FFFF sorts after every other character.
+        self._connect().execute(
+            'DELETE FROM cache_entries WHERE key >= ? AND key < ?', (prefix, prefix + '\U0010ffff')
+        )
+
+
+class RedisCacheBackend(SharedCacheBackend):
+    """Shared cache on any Redis-protocol server (Redis, Valkey, Azure Cache for Redis, ...)."""
+
+    def __init__(self, url, key_prefix='cenaris:cache:'):
+        if redis is None:
+            raise RuntimeError('CACHE_URL uses redis:// but the redis package is not installed')
+        self.key_prefix = key_prefix
+        self.client = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+
+    def get(self, key):
+        full_key = self.key_prefix + key
+        with self.client.pipeline(transaction=False) as pipe:
+            pipe.get(full_key)
+            pipe.pttl(full_key)
+            raw, pttl = pipe.execute()
+        if raw is None:
+            return None
+        expires_at = time.time() + pttl / 1000.0 if pttl and pttl > 0 else None
+        return pickle.loads(raw), expires_at
+
+    def set(self, key, value, ttl=None):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if ttl:
+            self.client.set(self.key_prefix + key, data, px=max(1, int(ttl * 1000)))
+        else:
+            self.client.set(self.key_prefix + key, data)
+
+    def delete(self, key):
+        self.client.delete(self.key_prefix + key)
+
+    def delete_prefix(self, prefix):
+        pattern = ''.join('\\' + ch if ch in '*?[]\\' else ch for ch in self.key_prefix + prefix) + '*'
+        batch = []
+        for found in self.client.scan_iter(match=pattern, count=500):
+            batch.append(found)
+            if len(batch) >= 500:
+                self.client.delete(*batch)
+                batch = []
+        if batch:
+            self.client.delete(*batch)
+
+
+_BACKEND: SharedCacheBackend | None = None
+
+
+def configure_shared_cache(url: str | None) -> SharedCacheBackend | None:
+    """Select the shared backend from CACHE_URL (None/'' /'memory://' disables it)."""
+    global _BACKEND
+    url = (url or '').strip()
+    backend = None
+    try:
+        if url.startswith(('redis://', 'rediss://', 'unix://')):
+            backend = RedisCacheBackend(url, key_prefix=os.getenv('CACHE_KEY_PREFIX') or 'cenaris:cache:')
+        elif url.startswith('sqlite:///'):
+            backend = SqliteCacheBackend(url[len('sqlite:///'):])
+        elif url and not url.startswith('memory://'):
+            logger.warning("Unsupported CACHE_URL scheme; using per-process caches only")
+    except Exception as e:
+        logger.error(f"Shared cache backend unavailable, using per-process caches only: {e}")
+        backend = None
+    _BACKEND = backend
+    return backend
+
+
+def shared_cache_backend() -> SharedCacheBackend | None:
+    return _BACKEND
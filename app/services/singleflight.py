@@ -0,0 +1,168 @@
+"""
+Single-flight request coalescing.
+
+When a popular cache entry expires, every concurrent request in the worker misses at
+once and repeats the same slow call (ADLS listing, blob download). SingleFlight.do()
+lets the first caller for a key run the call while later callers for the same key
+wait for its result instead:
+
+    files = _FLIGHTS.do(('compliance_files', cache_key), load_files, timeout=15)
+
+A waiter that gives up after `timeout` seconds runs the call itself, so a hung leader
+delays others by at most that long. Exceptions raised by the leader are re-raised in
+every waiter. Coalescing is per process; each gunicorn worker has its own flights.
+
+SingleFlight.stream() does the same for a generator: the leader yields items as they
+are produced and its return value is the flight's result, which waiters (including
+do() callers for the same key) receive once it finishes.
+"""
+
+import os
+import threading
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters', 'abandoned')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+        # A streaming leader stopped early (e.g. the client went away): no result.
+        self.abandoned = False
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict = {}
+        self._stats = {'leaders': 0, 'coalesced': 0, 'wait_timeouts': 0}
+
+    def _join(self, key):
+        """(call, is_leader) for key."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self._stats['leaders'] += 1
+            else:
+                call.waiters += 1
+                self._stats['coalesced'] += 1
+        return call, leader
+
+    def _finish(self, key, call):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.done.set()
+
+    def _wait(self, call, timeout) -> bool:
+        """True when the leader's result (or error) can be used."""
+        if not call.done.wait(timeout):
+            with self._lock:
+                self._stats['wait_timeouts'] += 1
+            return False
+        return not call.abandoned
+
+    def do(self, key, fn, timeout: float | None = None):
+        """Return fn(), sharing one execution with concurrent callers using the same key."""
+        call, leader = self._join(key)
+
+        if leader:
+            try:
+                call.result = fn()
+                return call.result
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                self._finish(key, call)
+
+        if not self._wait(call, timeout):
+            return fn()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stream(self, key, iterate, replay, timeout: float | None = None):
+        """
+        Yield from iterate() as the leader, or from replay(result) of the leader's run.
+
+        iterate() must be a generator whose return value is the result (what do() callers
+        for the same key get). Waiters that time out, or whose leader stopped early,
+        iterate themselves.
+        """
+        call, leader = self._join(key)
+
+        if leader:
+            finished = False
+            try:
+                call.result = yield from iterate()
+                finished = True
+                return
+            except Exception as e:
+                call.error = e
+                finished = True
+                raise
+            finally:
+                call.abandoned = not finished
+                self._finish(key, call)
+
+        if not self._wait(call, timeout):
+            yield from iterate()
+            return
+        if call.error is not None:
+            raise call.error
+        yield from replay(call.result)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls)
+        return stats
+
+    def _reset(self):
+        # Calls in flight at fork time belong to threads that do not exist in the child.
+        self._lock = threading.Lock()
+        self._calls = {}
+
+
+_GROUPS: dict[str, SingleFlight] = {}
+_GROUPS_LOCK = threading.Lock()
+
+
+def flight_group(name: str) -> SingleFlight:
+    """Process-wide SingleFlight registered under `name`."""
+    with _GROUPS_LOCK:
+        group = _GROUPS.get(name)
+        if group is None:
+            group = SingleFlight()
+            _GROUPS[name] = group
+        return group
+
+
+def flight_stats() -> dict:
+    """Counters for every registered group in this process."""
+    with _GROUPS_LOCK:
+        groups = dict(_GROUPS)
+    return {name: group.stats() for name, group in sorted(groups.items())}
+
+
+def _reset_after_fork():
+    global _GROUPS_LOCK
+    _GROUPS_LOCK = threading.Lock()
+    for group in _GROUPS.values():
+        group._reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
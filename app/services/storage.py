@@ -0,0 +1,208 @@
+"""
+Pluggable storage backends.
+
+Routes ask for storage through get_document_storage() / get_asset_storage() instead of
+constructing Azure services directly. STORAGE_BACKEND selects the implementation:
+
+    azure  - AzureBlobStorageService (documents) and AzureStorageService (logos)
+    local  - LocalFileStorageService / LocalAssetStorageService on local disk, for
+             offline development and load tests without an Azure account.
+
+Document backends return the same result dicts as AzureBlobStorageService
+({'success': ..., 'error': ..., 'error_code': ...}); asset backends keep the simple
+bool / bytes / None returns of AzureStorageService.
+"""
+
+import os
+import uuid
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentStorage(ABC):
+    """Contract for document storage backends."""
+
+    @abstractmethod
+    def is_configured(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def upload_file(self, file_stream, file_path, content_type=None, metadata=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def download_file(self, blob_name, etag=None):
+        """Download a file; with `etag`, fail with FILE_CHANGED unless the file still has it."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def open_download(self, blob_name, offset=None, length=None, etag=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_file(self, blob_name):
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_files(self, prefix=None, max_results=None, continuation_token=None, newest=False):
+        """List files; with max_results one page plus the continuation_token of the next."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_file_url(self, blob_name, expiry_hours=1):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_upload_url(self, blob_name, expiry_minutes=15):
+        raise NotImplementedError
+
+    @abstractmethod
+    def stage_chunk(self, blob_name, index, data):
+        """Stage chunk `index` of a resumable upload (idempotent per index)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def commit_chunks(self, blob_name, chunk_count, content_type=None, metadata=None):
+        """Assemble staged chunks 0..chunk_count-1 into the blob."""
+        raise NotImplementedError
+
+    def discard_chunks(self, blob_name):
+        """Drop staged chunks of an abandoned upload (best effort)."""
+        return {'success': True}
+
+    def discard_stale_chunks(self, older_than_seconds):
+        """Drop staged chunks untouched for `older_than_seconds`; returns the uploads dropped."""
+        return 0
+
+    def get_local_path(self, blob_name):
+        """Filesystem path of the stored file, or None when it is not on local disk."""
+        return None
+
+    def generate_blob_name(self, original_filename, user_id, organization_id=None):
+        """Generate a unique file path for ADLS Gen2."""
+        # Get file extension
+        file_ext = os.path.splitext(original_filename)[1].lower()
+
+        # Generate unique identifier
+        unique_id = str(uuid.uuid4())
+
+        # Create timestamp
+        now = datetime.now(timezone.utc)
+        timestamp = now.strftime('%Y%m%d_%H%M%S')
+
+        # Create organized folder structure for ADLS
+        year = now.strftime('%Y')
+        month = now.strftime('%m')
+
+        # Combine to create unique file path with organized structure
+        if organization_id:
+            file_path = (
+                f"organizations/{organization_id}/documents/{year}/{month}/"
+                f"user_{user_id}/{timestamp}_{unique_id}{file_ext}"
+            )
+        else:
+            file_path = f"compliance-docs/{year}/{month}/user_{user_id}/{timestamp}_{unique_id}{file_ext}"
+
+        return file_path
+
+    def inspect_file(self, blob_name, header_bytes=8):
+        """
+        Read the first bytes of a blob together with its size and content type.
+
+        Uses a single ranged read, so the cost does not depend on the file size.
+
+        Args:
+            blob_name: Name of the blob
+            header_bytes: Number of leading bytes to return
+
+        Returns:
+            dict: Result with success status, header bytes, size and content type
+        """
+        result = self.open_download(blob_name, offset=0, length=max(1, int(header_bytes)))
+        if not result.get('success'):
+            return result
+
+        try:
+            header = b''.join(result['chunks'])
+        except Exception as e:
+            logger.error(f"Error reading header of {blob_name}: {e}")
+            return {
+                'success': False,
+                'error': f'Download failed: {str(e)}',
+                'error_code': 'DOWNLOAD_ERROR'
+            }
+
+        return {
+            'success': True,
+            'header': header,
+            'size': result.get('total_size'),
+            'content_type': result.get('content_type'),
+            'etag': result.get('etag')
+        }
+
+
+class AssetStorage(ABC):
+    """Contract for organisation asset (logo/branding) storage backends."""
+
+    @abstractmethod
+    def upload_blob(self, blob_name: str, data: bytes, content_type: str = None, organization_id: int = None) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def download_blob(self, blob_name: str, organization_id: int = None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_blob(self, blob_name: str, organization_id: int = None) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def blob_exists(self, blob_name: str, organization_id: int = None) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_blob_url(self, blob_name: str, organization_id: int = None):
+        raise NotImplementedError
+
+    def _get_org_folder(self, organization_id: int) -> str:
+        """
+        Get the organization-specific folder path.
+
+        Args:
+            organization_id: ID of the organization
+
+        Returns:
+            Folder path string (e.g., "org_123/")
+        """
+        return f"org_{organization_id}/"
+
+
+def storage_backend() -> str:
+    """Configured backend name ('azure' or 'local')."""
+    return (current_app.config.get('STORAGE_BACKEND') or 'azure').strip().lower()
+
+
+def get_document_storage() -> DocumentStorage:
+    """Return a document storage service for the configured backend."""
+    if storage_backend() == 'local':
+        from app.services.local_storage import LocalFileStorageService
+        return LocalFileStorageService()
+
+    # Resolved through the module so tests can swap the class.
+    from app.services import azure_storage
+    return azure_storage.AzureBlobStorageService()
+
+
+def get_asset_storage() -> AssetStorage:
+    """Return the logo/branding asset storage for the configured backend."""
+    if storage_backend() == 'local':
+        from app.services.local_storage import LocalAssetStorageService
+        return LocalAssetStorageService()
+
+    from app.services.azure_storage_service import azure_storage_service
+    return azure_storage_service
@@ -0,0 +1,160 @@
+"""
+Process-wide registry of Azure Storage clients.
+
+Every storage service used to build its own BlobServiceClient / DataLakeServiceClient,
+and AzureBlobStorageService is constructed per request, so each upload or download
+opened a fresh HTTP connection pool and paid a new TCP + TLS handshake.
+
+Clients handed out here are created once per process and reused. All clients for a
+connection string share one keep-alive requests.Session with a tuned connection pool.
+Gunicorn forks workers after import, so the registry is dropped in the child (via
+os.register_at_fork, plus a pid check as a fallback) and rebuilt lazily there; sockets
+opened in the parent are never reused by a child.
+"""
+
+import os
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from azure.core.pipeline.transport import RequestsTransport
+except ImportError:
+    RequestsTransport = None
+
+try:
+    from azure.storage.blob import BlobServiceClient
+except ImportError:
+    BlobServiceClient = None
+
+try:
+    from azure.storage.filedatalake import DataLakeServiceClient
+except ImportError:
+    DataLakeServiceClient = None
+
+logger = logging.getLogger(__name__)
+
+
+_LOCK = threading.Lock()
+_PID = os.getpid()
+_SESSIONS: dict[str, requests.Session] = {}
+_CLIENTS: dict[tuple, object] = {}
+_CHECKED_CONTAINERS: set[tuple[str, str]] = set()
+
+
+def _safe_int_env(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)) or default)
+    except Exception:
+        return default
+
+
+def _reset_after_fork():
+    """Forget everything inherited from the parent process.
+
+    Sessions are dropped, not closed: closing them would shut sockets the parent
+    is still using.
+    """
+    global _LOCK, _PID
+    _LOCK = threading.Lock()
+    _PID = os.getpid()
+    _SESSIONS.clear()
+    _CLIENTS.clear()
+    _CHECKED_CONTAINERS.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _check_pid():
+    if os.getpid() != _PID:
+        _reset_after_fork()
+
+
+def _session_for(connection_string: str) -> requests.Session:
+    """Return the shared keep-alive session for an account (caller holds _LOCK)."""
+    session = _SESSIONS.get(connection_string)
+    if session is None:
+        # pool_connections = number of hosts kept (blob + dfs endpoints);
+        # pool_maxsize = sockets kept per host, sized for parallel block transfers.
+        adapter = HTTPAdapter(
+            pool_connections=_safe_int_env('AZURE_HTTP_POOL_CONNECTIONS', 4),
+            pool_maxsize=_safe_int_env('AZURE_HTTP_POOL_MAXSIZE', 16),
+            max_retries=0,  # azure-core applies its own retry policy
+        )
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _SESSIONS[connection_string] = session
+    return session
+
+
+def _transport_kwargs(connection_string, connection_timeout=None, read_timeout=None):
+    if RequestsTransport is None:
+        return {}
+    kwargs = {'session': _session_for(connection_string), 'session_owner': False}
+    if connection_timeout is not None:
+        kwargs['connection_timeout'] = connection_timeout
+    if read_timeout is not None:
+        kwargs['read_timeout'] = read_timeout
+    return {'transport': RequestsTransport(**kwargs)}
+
+
+def _get_client(kind, factory, connection_string, connection_timeout=None, read_timeout=None, **options):
+    if not connection_string or factory is None:
+        return None
+
+    key = (kind, connection_string, connection_timeout, read_timeout, tuple(sorted(options.items())))
+    _check_pid()
+    client = _CLIENTS.get(key)
+    if client is not None:
+        return client
+
+    with _LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            transport = _transport_kwargs(connection_string, connection_timeout, read_timeout)
+            client = factory.from_connection_string(connection_string, **transport, **options)
+            _CLIENTS[key] = client
+            logger.info(f"Created shared {kind} storage client (pid {os.getpid()})")
+    return client
+
+
+def get_blob_service_client(connection_string, connection_timeout=None, read_timeout=None, **options):
+    """Return the shared BlobServiceClient for this process, or None if not configured.
+
+    Extra keyword options (e.g. max_single_get_size) are part of the cache key.
+    """
+    return _get_client('blob', BlobServiceClient, connection_string, connection_timeout, read_timeout, **options)
+
+
+def get_datalake_service_client(connection_string, connection_timeout=None, read_timeout=None, **options):
+    """Return the shared DataLakeServiceClient for this process, or None if not configured."""
+    return _get_client('datalake', DataLakeServiceClient, connection_string, connection_timeout, read_timeout, **options)
+
+
+def container_checked(connection_string, container_name) -> bool:
+    """Whether the container/file system was already verified in this process."""
+    _check_pid()
+    return (connection_string, container_name) in _CHECKED_CONTAINERS
+
+
+def mark_container_checked(connection_string, container_name):
+    _check_pid()
+    _CHECKED_CONTAINERS.add((connection_string, container_name))
+
+
+def reset_clients():
+    """Drop all cached clients and sessions (used by tests and after config changes)."""
+    with _LOCK:
+        for session in _SESSIONS.values():
+            try:
+                session.close()
+            except Exception:
+                pass
+        _SESSIONS.clear()
+        _CLIENTS.clear()
+        _CHECKED_CONTAINERS.clear()
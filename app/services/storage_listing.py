@@ -0,0 +1,117 @@
+"""
+Paged, hierarchical listing of storage containers.
+
+Iterating list_blobs() / get_paths() directly walks a whole subtree in one go, and the
+result-file listing used to stop at a fixed number of blobs and drop the rest. Here:
+
+- iter_listing_pages() drives an SDK pager one page at a time (ItemPaged.by_page) and
+  yields ListingPage objects carrying the continuation token of the next page; the
+  caller's filter runs while each page is read.
+- encode_listing_token() / decode_listing_token() bind that token to the prefix it was
+  issued for, so it can be persisted (query string, session, database) and resumed.
+- newest_files() answers "newest N" one delimiter level at a time, descending into
+  date folders (YYYY, MM, ...) newest first; once N files are found the older folders
+  are never listed.
+"""
+
+import json
+import base64
+
+
+class ListingTokenError(ValueError):
+    """Raised for a continuation token that cannot be decoded or belongs to another prefix."""
+
+
+class ListingPage:
+    """One page of a storage listing: files, sub-prefixes (delimiter listings) and the next token."""
+
+    def __init__(self, items, continuation_token=None, prefixes=None):
+        self.items = items
+        self.continuation_token = continuation_token
+        self.prefixes = prefixes or []
+
+    @property
+    def has_more(self):
+        return self.continuation_token is not None
+
+    def to_dict(self):
+        return {
+            'count': len(self.items),
+            'continuation_token': self.continuation_token,
+            'has_more': self.has_more,
+        }
+
+
+def encode_listing_token(prefix, token, source='blob'):
+    """Opaque, URL-safe form of an SDK continuation token (None when there is no next page)."""
+    if not token:
+        return None
+    payload = json.dumps({'p': prefix or '', 's': source, 't': token}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_listing_token(cursor, prefix):
+    """Return (source, sdk_token) for a token produced by encode_listing_token() for `prefix`."""
+    if not cursor:
+        return None, None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw.decode('utf-8'))
+        token_prefix, source, token = payload['p'], payload['s'], payload['t']
+    except Exception as e:
+        raise ListingTokenError('Invalid continuation token') from e
+    if token_prefix != (prefix or ''):
+        raise ListingTokenError('Continuation token was issued for a different prefix')
+    return source, token
+
+
+def iter_listing_pages(pager, convert, continuation_token=None):
+    """
+    Yield (items, prefixes, next_token) for each page of an SDK pager.
+
+    `convert(item)` returns a file dict, a sub-prefix string, or None to skip the item.
+    Plain iterables (no by_page) are treated as a single final page.
+    """
+    by_page = getattr(pager, 'by_page', None)
+    pages = by_page(continuation_token=continuation_token) if by_page else iter([pager])
+    for page in pages:
+        items, prefixes = [], []
+        for item in page:
+            converted = convert(item)
+            if converted is None:
+                continue
+            if isinstance(converted, str):
+                prefixes.append(converted)
+            else:
+                items.append(converted)
+        yield items, prefixes, getattr(pages, 'continuation_token', None) or None
+
+
+def _is_date_segment(prefix):
+    return prefix.rstrip('/').rsplit('/', 1)[-1].isdigit()
+
+
+def newest_files(list_level, prefix, limit, key):
+    """
+    The `limit` newest files under `prefix`, newest first.
+
+    `list_level(prefix)` returns (files, sub_prefixes) for one delimiter level. Date
+    folders are zero-padded, so descending name order is newest first; files in an
+    older date folder cannot be newer than `limit` files already found in a newer one.
+    Other folders (org_1, user_3, ...) are not time-ordered and are always listed.
+    """
+    files, sub_prefixes = list_level(prefix)
+    found = list(files)
+    dated = sorted((p for p in sub_prefixes if _is_date_segment(p)), reverse=True)
+    for sub_prefix in sub_prefixes:
+        if not _is_date_segment(sub_prefix):
+            found.extend(newest_files(list_level, sub_prefix, limit, key))
+    from_dated = 0
+    for sub_prefix in dated:
+        if from_dated >= limit:
+            break
+        newer = newest_files(list_level, sub_prefix, limit, key)
+        from_dated += len(newer)
+        found.extend(newer)
+    found.sort(key=key, reverse=True)
+    return found[:limit]
@@ -0,0 +1,111 @@
+"""
+Cleanup of upload sessions that were never completed.
+
+Direct uploads get an UploadSession row (status 'direct') when the SAS URL is issued,
+so a blob the browser created but never committed can be found and deleted once the
+commit window has passed. Resumable sessions past expires_at are aborted the same way:
+their staged chunks are dropped and, if the chunks were already assembled but never
+recorded, so is the blob. Staging dirs with no session left (e.g. a worker died) are
+removed once they are older than RESUMABLE_UPLOAD_SESSION_HOURS.
+
+    flask sweep-uploads            # one pass
+    flask sweep-uploads --loop     # keep sweeping
+
+The `flask process-documents --loop` worker also runs a pass every
+UPLOAD_SWEEP_INTERVAL_SECONDS (default 300; 0 turns it off), so deployments that run
+the worker need no separate schedule.
+
+Each session is claimed with a conditional status update before its blob is touched,
+so a sweep never races a commit or finalize of the same upload.
+"""
+
+import logging
+from datetime import datetime, timezone
+
+from flask import current_app
+
+from app import db
+from app.models import Document, UploadSession
+
+logger = logging.getLogger(__name__)
+
+# Statuses whose blob (if any) is not recorded by a Document yet.
+_OPEN_STATUSES = ('direct', 'pending', 'uploading', 'finalizing', 'assembled')
+
+
+def _utcnow():
+    # SQLite returns naive datetimes; compare everything as naive UTC.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _claim(session_id, from_status, now):
+    """Move one session to 'aborted' unless another worker got to it first."""
+    result = db.session.execute(
+        db.update(UploadSession)
+        .where(UploadSession.id == session_id, UploadSession.status == from_status)
+        .values(status='aborted', updated_at=now)
+    )
+    db.session.commit()
+    return bool(result.rowcount)
+
+
+def _delete_unrecorded_blob(storage_service, blob_name):
+    # A commit recorded before the session row was claimed still owns the blob.
+    if Document.query.filter_by(blob_name=blob_name).first() is not None:
+        return
+    result = storage_service.delete_file(blob_name)
+    if isinstance(result, dict) and not result.get('success') and result.get('error_code') != 'FILE_NOT_FOUND':
+        logger.warning(f"Could not delete uncommitted upload {blob_name}: {result.get('error')}")
+
+
+def sweep_expired_uploads(batch_size: int = 100) -> int:
+    """Abort expired upload sessions and delete what they left behind. Returns the count."""
+    from app.services.storage import get_document_storage
+
+    now = _utcnow()
+    rows = (
+        db.session.query(UploadSession.id, UploadSession.status, UploadSession.blob_name)
+        .filter(UploadSession.status.in_(_OPEN_STATUSES), UploadSession.expires_at < now)
+        .order_by(UploadSession.expires_at)
+        .limit(max(1, int(batch_size)))
+        .all()
+    )
+    if not rows:
+        return 0
+
+    storage_service = get_document_storage()
+    swept = 0
+    for session_id, status, blob_name in rows:
+        if not _claim(session_id, status, now):
+            continue
+        swept += 1
+        if status != 'direct':
+            storage_service.discard_chunks(blob_name)
+        if status in {'direct', 'finalizing', 'assembled'}:
+            _delete_unrecorded_blob(storage_service, blob_name)
+
+    logger.info(f"Swept {swept} expired upload session(s)")
+    return swept
+
+
+def sweep_stale_staging() -> int:
+    """Drop staged chunks older than the resumable session lifetime. Returns the uploads dropped."""
+    from app.services.storage import get_document_storage
+
+    hours = int(current_app.config.get('RESUMABLE_UPLOAD_SESSION_HOURS') or 24)
+    removed = get_document_storage().discard_stale_chunks(hours * 3600)
+    if removed:
+        logger.info(f"Removed staged chunks of {removed} abandoned upload(s)")
+    return removed
+
+
+def sweep_uploads() -> int:
+    """One full pass: every expired session, then abandoned staging. Returns the sessions swept."""
+    total = 0
+    while True:
+        swept = sweep_expired_uploads()
+        total += swept
+        if not swept:
+            break
+    sweep_stale_staging()
+    return total
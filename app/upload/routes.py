@@ -2,17 +2,26 @@ from flask import request, redirect, url_for, flash, jsonify, current_app
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 from app.upload import bp
-from app.services.azure_storage import AzureBlobStorageService
+from app.services.storage import get_document_storage
 from app.services.file_validation import FileValidationService
-from app.models import Document, Organization, OrganizationMembership
+from app.services.document_blobs import acquire_blob_reference, reference_existing_blob
+from app.services import document_processing, document_search
+from app.services.pagination import invalidate_document_count
+from app.models import Document, Organization, OrganizationMembership, UploadSession
 from app import db
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+from sqlalchemy.exc import IntegrityError
+import io
 import logging
 import re
 import os
+import uuid
 
 logger = logging.getLogger(__name__)
 
+_DIRECT_UPLOAD_TOKEN_SALT = 'direct-upload'
+
 def get_versioned_filename(original_filename, organization_id):
     """
     Check if filename exists in the organization and return a versioned name if needed.
@@ -54,6 +63,123 @@ def get_versioned_filename(original_filename, organization_id):
     next_version = max(version_numbers) + 1
     return f"{name} ({next_version}){ext}"
 
+def _document_created(document):
+    """Index a committed document's filename and queue text/thumbnail extraction (best effort)."""
+    invalidate_document_count(document.organization_id)
+    try:
+        document_search.index_document(document)
+        queued = document_processing.enqueue_document(int(document.id), commit=False)
+        db.session.commit()
+        if queued:
+            document_processing.kick()
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"Could not index/queue document {getattr(document, 'id', None)}: {e}")
+
+
+def _create_document_record(filename, blob_name, file_size, content_type, org_id, content_sha256=None, blob_etag=None):
+    """Add a Document row for an uploaded blob (caller commits)."""
+    # The documents.content_type column may be limited (older schema uses VARCHAR(50)).
+    # DOCX MIME types can exceed that length, so store a safe, truncated value.
+    db_content_type = (content_type or '').strip() or None
+    if db_content_type and len(db_content_type) > 50:
+        db_content_type = db_content_type[:50]
+
+    document = Document(
+        filename=filename,
+        blob_name=blob_name,
+        file_size=file_size,
+        content_type=db_content_type,
+        uploaded_by=current_user.id,
+        organization_id=int(org_id),
+        content_sha256=content_sha256,
+        blob_etag=blob_etag
+    )
+    db.session.add(document)
+    return document
+
+
+def _save_deduplicated_document(filename, blob_name, file_size, content_type, org_id, sha256):
+    """Create and commit a Document that shares the org's blob for `sha256` (if any).
+
+    Retries once when a concurrent upload of the same content registers its blob first.
+    """
+    for attempt in range(2):
+        try:
+            document = _create_document_record(filename, blob_name, file_size, content_type, org_id, content_sha256=sha256)
+            blob = acquire_blob_reference(int(org_id), sha256, blob_name, file_size=file_size)
+            document.blob_name = blob.blob_name
+            db.session.commit()
+            return document
+        except IntegrityError:
+            db.session.rollback()
+            if attempt:
+                raise
+
+
+def _upload_org_id_or_error():
+    """Return (org_id, None) if the current user may upload, else (None, json error response)."""
+    org_id = getattr(current_user, 'organization_id', None)
+    if not org_id or not current_user.has_permission('documents.upload', org_id=int(org_id)):
+        return None, (jsonify({'success': False, 'error': 'Not authorized', 'error_code': 'NOT_AUTHORIZED'}), 403)
+    return int(org_id), None
+
+
+def _direct_upload_serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt=_DIRECT_UPLOAD_TOKEN_SALT)
+
+
+def _direct_upload_expiry_minutes():
+    try:
+        return max(1, int(current_app.config.get('DIRECT_UPLOAD_SAS_MINUTES') or 15))
+    except Exception:
+        return 15
+
+
+def _direct_upload_commit_window_seconds():
+    # A short grace period after SAS expiry for the commit call itself.
+    return _direct_upload_expiry_minutes() * 60 + 300
+
+
+def _resumable_max_size():
+    return int(current_app.config.get('RESUMABLE_UPLOAD_MAX_SIZE') or FileValidationService.MAX_FILE_SIZE)
+
+
+def _resumable_chunk_size():
+    """Chunk size handed to clients; every chunk must fit in one request body."""
+    chunk_size = int(current_app.config.get('RESUMABLE_UPLOAD_CHUNK_SIZE') or 4 * 1024 * 1024)
+    max_body = current_app.config.get('MAX_CONTENT_LENGTH')
+    if max_body:
+        chunk_size = min(chunk_size, int(max_body))
+    return max(64 * 1024, chunk_size)
+
+
+def _utcnow():
+    # SQLite returns naive datetimes; compare everything as naive UTC.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _get_upload_session(upload_id):
+    """Return the current user's upload session, or None."""
+    session = db.session.get(UploadSession, str(upload_id))
+    if not session or int(session.user_id) != int(current_user.id):
+        return None
+    return session
+
+
+def _upload_session_state(session):
+    return {
+        'success': True,
+        'upload_id': session.id,
+        'status': session.status,
+        'received_bytes': int(session.received_bytes or 0),
+        'total_size': int(session.total_size),
+        'chunk_size': int(session.chunk_size),
+        'progress': session.progress_percent(),
+        'document_id': session.document_id,
+    }
+
+
 @bp.route('/upload', methods=['POST'])
 @login_required
 def upload_file():
@@ -113,87 +239,539 @@ def upload_file():
         versioned_filename = get_versioned_filename(validation_result['original_filename'], int(org_id))
         
         # Initialize Azure Storage service
-        storage_service = AzureBlobStorageService()
+        storage_service = get_document_storage()
         
         if not storage_service.is_configured():
             flash('File upload is currently unavailable. Azure Storage is not configured.', 'error')
             logger.error("Azure Storage not configured for file upload")
             return redirect(referrer)
         
-        # Generate unique file path for ADLS
-        file_path = storage_service.generate_blob_name(
-            validation_result['original_filename'],
-            current_user.id,
-            organization_id=int(org_id),
-        )
-        
-        # Prepare metadata
-        metadata = {
-            'uploaded_by': str(current_user.id),
-            'uploaded_by_email': current_user.email,
-            'original_filename': versioned_filename,
-            'upload_timestamp': str(int(datetime.now(timezone.utc).timestamp()))
-        }
-        
-        # Reset file stream position
-        file.stream.seek(0)
-        
-        # Upload to Azure Data Lake Storage
-        upload_result = storage_service.upload_file(
-            file_stream=file.stream,
-            file_path=file_path,
-            content_type=validation_result['content_type'],
-            metadata=metadata
-        )
-        
-        if not upload_result['success']:
-            flash(f"Upload failed: {upload_result['error']}", 'error')
-            logger.error(f"Azure upload failed for user {current_user.id}: {upload_result['error']}")
-            return redirect(referrer)
+        # Identical content already stored for this org? Then skip the storage upload
+        # entirely and point the new document at the existing blob. The reference is
+        # taken first (and committed with the document), so a concurrent delete cannot
+        # remove the blob in between; if none can be taken, the bytes are uploaded.
+        sha256 = validation_result.get('sha256')
+        existing_blob = reference_existing_blob(int(org_id), sha256)
+        uploaded = False
+
+        if existing_blob is not None:
+            file_path = existing_blob.blob_name
+            storage_type = 'existing copy (deduplicated)'
+        else:
+            # Generate unique file path for ADLS
+            file_path = storage_service.generate_blob_name(
+                validation_result['original_filename'],
+                current_user.id,
+                organization_id=int(org_id),
+            )
+            
+            # Prepare metadata
+            metadata = {
+                'uploaded_by': str(current_user.id),
+                'uploaded_by_email': current_user.email,
+                'original_filename': versioned_filename,
+                'upload_timestamp': str(int(datetime.now(timezone.utc).timestamp()))
+            }
+            
+            # Reset file stream position
+            file.stream.seek(0)
+            
+            # Upload to Azure Data Lake Storage
+            upload_result = storage_service.upload_file(
+                file_stream=file.stream,
+                file_path=file_path,
+                content_type=validation_result['content_type'],
+                metadata=metadata
+            )
+            
+            if not upload_result['success']:
+                flash(f"Upload failed: {upload_result['error']}", 'error')
+                logger.error(f"Azure upload failed for user {current_user.id}: {upload_result['error']}")
+                return redirect(referrer)
+
+            uploaded = True
+            storage_type = upload_result.get('storage_type', 'ADLS_Gen2')
         
         # Save document metadata to database
         try:
-            # The documents.content_type column may be limited (older schema uses VARCHAR(50)).
-            # DOCX MIME types can exceed that length, so store a safe, truncated value.
-            db_content_type = (validation_result.get('content_type') or '').strip() or None
-            if db_content_type and len(db_content_type) > 50:
-                db_content_type = db_content_type[:50]
-
-            document = Document(
-                filename=versioned_filename,
-                blob_name=file_path,
-                file_size=validation_result['file_size'],
-                content_type=db_content_type,
-                uploaded_by=current_user.id,
-                organization_id=int(org_id)
-            )
-            db.session.add(document)
-            db.session.commit()
+            if existing_blob is not None:
+                document = _create_document_record(
+                    filename=versioned_filename,
+                    blob_name=file_path,
+                    file_size=validation_result['file_size'],
+                    content_type=validation_result.get('content_type'),
+                    org_id=int(org_id),
+                    content_sha256=sha256,
+                )
+                db.session.commit()
+            elif sha256:
+                document = _save_deduplicated_document(
+                    filename=versioned_filename,
+                    blob_name=file_path,
+                    file_size=validation_result['file_size'],
+                    content_type=validation_result.get('content_type'),
+                    org_id=int(org_id),
+                    sha256=sha256,
+                )
+            else:
+                document = _create_document_record(
+                    filename=versioned_filename,
+                    blob_name=file_path,
+                    file_size=validation_result['file_size'],
+                    content_type=validation_result.get('content_type'),
+                    org_id=int(org_id),
+                )
+                db.session.commit()
 
-            storage_type = upload_result.get('storage_type', 'ADLS_Gen2')
+            if uploaded and document.blob_name != file_path:
+                # A concurrent upload of the same content won; our copy is redundant.
+                storage_service.delete_file(file_path)
+            _document_created(document)
             
             # Show appropriate message based on whether filename was versioned
             if versioned_filename != validation_result['original_filename']:
                 flash(f'File uploaded as "{versioned_filename}" (original name already exists).', 'success')
+            elif not uploaded:
+                flash(f'File "{versioned_filename}" uploaded successfully (identical content was already stored).', 'success')
             else:
                 flash(f'File "{versioned_filename}" uploaded successfully to {storage_type}!', 'success')
             
-            logger.info(f"File uploaded successfully: {file_path} as {versioned_filename} by user {current_user.id} to {storage_type}")
+            logger.info(f"File uploaded successfully: {document.blob_name} as {versioned_filename} by user {current_user.id} to {storage_type}")
         
         except Exception as e:
             db.session.rollback()
             # If database save failed, try to clean up the uploaded file
-            storage_service.delete_file(file_path)
+            if uploaded:
+                storage_service.delete_file(file_path)
             flash('Upload failed: Database error occurred.', 'error')
             logger.error(f"Database error during file upload: {e}")
         
         return redirect(referrer)
     
     except Exception as e:
+        db.session.rollback()
         flash('An unexpected error occurred during upload. Please try again.', 'error')
         logger.error(f"Unexpected error in file upload: {e}")
         return redirect(referrer if 'referrer' in locals() else url_for('main.dashboard'))
 
+@bp.route('/upload/direct', methods=['POST'])
+@login_required
+def direct_upload_start():
+    """Issue a write-only SAS so the browser can PUT the file straight to storage."""
+    if not current_app.config.get('DIRECT_UPLOAD_ENABLED'):
+        return jsonify({'success': False, 'error': 'Direct uploads are disabled', 'error_code': 'DIRECT_UPLOAD_DISABLED'}), 404
+
+    org_id, error = _upload_org_id_or_error()
+    if error:
+        return error
+
+    payload = request.get_json(silent=True) or {}
+    filename = (payload.get('filename') or '').strip()
+    try:
+        declared_size = int(payload.get('size') or 0)
+    except (TypeError, ValueError):
+        declared_size = 0
+
+    if not FileValidationService.is_allowed_file(filename):
+        return jsonify({
+            'success': False,
+            'error': f'File type not allowed. Supported formats: {", ".join(FileValidationService.ALLOWED_EXTENSIONS.keys())}',
+            'error_code': 'INVALID_EXTENSION'
+        }), 400
+
+    if declared_size <= 0 or declared_size > FileValidationService.MAX_FILE_SIZE:
+        return jsonify({
+            'success': False,
+            'error': f'File size must be between 1 byte and {FileValidationService.get_max_file_size_formatted()}',
+            'error_code': 'FILE_TOO_LARGE' if declared_size > 0 else 'EMPTY_FILE'
+        }), 400
+
+    storage_service = get_document_storage()
+    if not storage_service.is_configured():
+        return jsonify({'success': False, 'error': 'Azure Storage is not configured', 'error_code': 'STORAGE_NOT_CONFIGURED'}), 503
+
+    file_path = storage_service.generate_blob_name(filename, current_user.id, organization_id=org_id)
+    expiry_minutes = _direct_upload_expiry_minutes()
+    sas = storage_service.get_upload_url(file_path, expiry_minutes=expiry_minutes)
+    if not sas.get('success'):
+        logger.error(f"Direct upload SAS failed for user {current_user.id}: {sas.get('error')}")
+        return jsonify({'success': False, 'error': 'Could not prepare upload', 'error_code': sas.get('error_code')}), 502
+
+    headers = dict(sas.get('headers') or {})
+    headers['x-ms-blob-content-type'] = FileValidationService.get_content_type(filename)
+
+    # Tracked so `flask sweep-uploads` can delete the blob if the commit never comes.
+    now = _utcnow()
+    session = UploadSession(
+        id=str(uuid.uuid4()),
+        organization_id=org_id,
+        user_id=int(current_user.id),
+        filename=filename,
+        content_type=headers['x-ms-blob-content-type'],
+        blob_name=file_path,
+        total_size=declared_size,
+        chunk_size=declared_size,
+        received_bytes=0,
+        status='direct',
+        created_at=now,
+        updated_at=now,
+        expires_at=now + timedelta(seconds=_direct_upload_commit_window_seconds()),
+    )
+    db.session.add(session)
+    db.session.commit()
+
+    commit_token = _direct_upload_serializer().dumps({
+        'i': session.id,
+        'b': file_path,
+        'f': filename,
+        's': declared_size,
+        'o': org_id,
+        'u': int(current_user.id),
+    })
+
+    return jsonify({
+        'success': True,
+        'upload_url': sas['url'],
+        'method': sas.get('method', 'PUT'),
+        'headers': headers,
+        'commit_url': url_for('upload.direct_upload_commit'),
+        'commit_token': commit_token,
+        'expires_in_seconds': sas.get('expires_in_seconds'),
+    })
+
+
+@bp.route('/upload/direct/commit', methods=['POST'])
+@login_required
+def direct_upload_commit():
+    """Verify a browser-uploaded blob with a ranged read, then record the Document."""
+    if not current_app.config.get('DIRECT_UPLOAD_ENABLED'):
+        return jsonify({'success': False, 'error': 'Direct uploads are disabled', 'error_code': 'DIRECT_UPLOAD_DISABLED'}), 404
+
+    org_id, error = _upload_org_id_or_error()
+    if error:
+        return error
+
+    payload = request.get_json(silent=True) or {}
+    try:
+        token = _direct_upload_serializer().loads(
+            payload.get('commit_token') or '',
+            max_age=_direct_upload_commit_window_seconds(),
+        )
+    except (BadSignature, SignatureExpired):
+        return jsonify({'success': False, 'error': 'Upload token is invalid or expired', 'error_code': 'INVALID_TOKEN'}), 400
+
+    if int(token.get('u') or 0) != int(current_user.id) or int(token.get('o') or 0) != org_id:
+        return jsonify({'success': False, 'error': 'Not authorized', 'error_code': 'NOT_AUTHORIZED'}), 403
+
+    file_path = token['b']
+    filename = token['f']
+
+    # Idempotent: a retried commit returns the document that was already recorded.
+    existing = Document.query.filter_by(blob_name=file_path, organization_id=org_id).first()
+    if existing:
+        return jsonify({'success': True, 'document_id': int(existing.id), 'filename': existing.filename})
+
+    storage_service = get_document_storage()
+    if not storage_service.is_configured():
+        return jsonify({'success': False, 'error': 'Azure Storage is not configured', 'error_code': 'STORAGE_NOT_CONFIGURED'}), 503
+
+    info = storage_service.inspect_file(file_path, header_bytes=8)
+    if not info.get('success'):
+        status = 400 if info.get('error_code') == 'FILE_NOT_FOUND' else 502
+        return jsonify({'success': False, 'error': 'Uploaded file not found', 'error_code': 'UPLOAD_NOT_FOUND'}), status
+
+    expected_type = FileValidationService.get_content_type(filename)
+    problem = None
+    size = int(info.get('size') or 0)
+    if size != int(token.get('s') or 0) or size > FileValidationService.MAX_FILE_SIZE:
+        problem = {'error': 'Uploaded file size does not match', 'error_code': 'SIZE_MISMATCH'}
+    elif (info.get('content_type') or '') != expected_type:
+        problem = {'error': 'Uploaded file type does not match', 'error_code': 'CONTENT_TYPE_MISMATCH'}
+    else:
+        content_result = FileValidationService.validate_file_content(io.BytesIO(info.get('header') or b''), filename)
+        if not content_result['success']:
+            problem = {'error': content_result['error'], 'error_code': content_result['error_code']}
+
+    if problem:
+        db.session.execute(
+            db.update(UploadSession)
+            .where(UploadSession.id == str(token.get('i')), UploadSession.status == 'direct')
+            .values(status='aborted', updated_at=_utcnow())
+        )
+        db.session.commit()
+        storage_service.delete_file(file_path)
+        logger.warning(f"Direct upload rejected for user {current_user.id}: {problem['error_code']} ({file_path})")
+        return jsonify({'success': False, **problem}), 400
+
+    versioned_filename = get_versioned_filename(filename, org_id)
+    try:
+        document = _create_document_record(
+            filename=versioned_filename,
+            blob_name=file_path,
+            file_size=size,
+            content_type=expected_type,
+            org_id=org_id,
+            blob_etag=info.get('etag'),
+        )
+        db.session.flush()
+        # Completing the session in the same transaction keeps the sweep off this blob.
+        claimed = db.session.execute(
+            db.update(UploadSession)
+            .where(UploadSession.id == str(token.get('i')), UploadSession.status == 'direct')
+            .values(status='completed', document_id=int(document.id), updated_at=_utcnow())
+        ).rowcount
+        if not claimed:
+            db.session.rollback()
+            return jsonify({'success': False, 'error': 'Upload session expired', 'error_code': 'UPLOAD_EXPIRED'}), 410
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        storage_service.delete_file(file_path)
+        logger.error(f"Database error during direct upload commit: {e}")
+        return jsonify({'success': False, 'error': 'Database error occurred', 'error_code': 'DATABASE_ERROR'}), 500
+
+    _document_created(document)
+    logger.info(f"Direct upload committed: {file_path} as {versioned_filename} by user {current_user.id}")
+    return jsonify({'success': True, 'document_id': int(document.id), 'filename': versioned_filename})
+
+
+@bp.route('/upload/sessions', methods=['POST'])
+@login_required
+def resumable_upload_create():
+    """Start a resumable upload; the client then PUTs chunks at the returned offsets."""
+    if not current_app.config.get('RESUMABLE_UPLOAD_ENABLED'):
+        return jsonify({'success': False, 'error': 'Resumable uploads are disabled', 'error_code': 'RESUMABLE_UPLOAD_DISABLED'}), 404
+
+    org_id, error = _upload_org_id_or_error()
+    if error:
+        return error
+
+    payload = request.get_json(silent=True) or {}
+    filename = (payload.get('filename') or '').strip()
+    try:
+        declared_size = int(payload.get('size') or 0)
+    except (TypeError, ValueError):
+        declared_size = 0
+
+    if not FileValidationService.is_allowed_file(filename):
+        return jsonify({
+            'success': False,
+            'error': f'File type not allowed. Supported formats: {", ".join(FileValidationService.ALLOWED_EXTENSIONS.keys())}',
+            'error_code': 'INVALID_EXTENSION'
+        }), 400
+
+    max_size = _resumable_max_size()
+    if declared_size <= 0 or declared_size > max_size:
+        return jsonify({
+            'success': False,
+            'error': f'File size must be between 1 byte and {FileValidationService._format_file_size(max_size)}',
+            'error_code': 'FILE_TOO_LARGE' if declared_size > 0 else 'EMPTY_FILE'
+        }), 400
+
+    storage_service = get_document_storage()
+    if not storage_service.is_configured():
+        return jsonify({'success': False, 'error': 'Azure Storage is not configured', 'error_code': 'STORAGE_NOT_CONFIGURED'}), 503
+
+    now = _utcnow()
+    session = UploadSession(
+        id=str(uuid.uuid4()),
+        organization_id=org_id,
+        user_id=int(current_user.id),
+        filename=filename,
+        content_type=FileValidationService.get_content_type(filename),
+        blob_name=storage_service.generate_blob_name(filename, current_user.id, organization_id=org_id),
+        total_size=declared_size,
+        chunk_size=_resumable_chunk_size(),
+        received_bytes=0,
+        status='pending',
+        created_at=now,
+        updated_at=now,
+        expires_at=now + timedelta(hours=int(current_app.config.get('RESUMABLE_UPLOAD_SESSION_HOURS') or 24)),
+    )
+    db.session.add(session)
+    db.session.commit()
+
+    state = _upload_session_state(session)
+    state.update({
+        'chunk_url': url_for('upload.resumable_upload_chunk', upload_id=session.id),
+        'finalize_url': url_for('upload.resumable_upload_finalize', upload_id=session.id),
+        'status_url': url_for('upload.upload_progress', upload_id=session.id),
+    })
+    return jsonify(state), 201
+
+
+@bp.route('/upload/sessions/<upload_id>/chunks', methods=['PUT'])
+@login_required
+def resumable_upload_chunk(upload_id):
+    """Accept one chunk (raw body) at ?offset=N.
+
+    Offsets must be chunk-aligned and sequential. Re-sending a chunk that was already
+    received is harmless; an offset past the received bytes gets 409 with the offset
+    the client should resume from.
+    """
+    session = _get_upload_session(upload_id)
+    if not session:
+        return jsonify({'success': False, 'error': 'Upload not found', 'error_code': 'UPLOAD_NOT_FOUND'}), 404
+    if session.status not in {'pending', 'uploading'}:
+        return jsonify({**_upload_session_state(session), 'success': False, 'error': f'Upload is {session.status}', 'error_code': 'UPLOAD_CLOSED'}), 409
+    if session.expires_at < _utcnow():
+        return jsonify({'success': False, 'error': 'Upload session expired', 'error_code': 'UPLOAD_EXPIRED'}), 410
+
+    try:
+        offset = int(request.args.get('offset', ''))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'offset is required', 'error_code': 'INVALID_OFFSET'}), 400
+
+    chunk_size = int(session.chunk_size)
+    total_size = int(session.total_size)
+    received = int(session.received_bytes or 0)
+    if offset < 0 or offset % chunk_size or offset >= total_size:
+        return jsonify({'success': False, 'error': 'offset must be a chunk boundary inside the file', 'error_code': 'INVALID_OFFSET'}), 400
+    if offset > received:
+        return jsonify({**_upload_session_state(session), 'success': False, 'error': 'Chunk out of order', 'error_code': 'OFFSET_MISMATCH'}), 409
+
+    data = request.get_data(cache=False)
+    expected_length = min(chunk_size, total_size - offset)
+    if len(data) != expected_length:
+        return jsonify({'success': False, 'error': f'Expected {expected_length} bytes at offset {offset}', 'error_code': 'CHUNK_SIZE_MISMATCH'}), 400
+
+    if offset == 0:
+        content_result = FileValidationService.validate_file_content(io.BytesIO(data[:8]), session.filename)
+        if not content_result['success']:
+            session.status = 'aborted'
+            session.updated_at = _utcnow()
+            db.session.commit()
+            return jsonify({'success': False, 'error': content_result['error'], 'error_code': content_result['error_code']}), 400
+
+    storage_service = get_document_storage()
+    staged = storage_service.stage_chunk(session.blob_name, offset // chunk_size, data)
+    if not staged.get('success'):
+        logger.error(f"Chunk staging failed for upload {session.id}: {staged.get('error')}")
+        return jsonify({'success': False, 'error': 'Could not store chunk', 'error_code': staged.get('error_code')}), 502
+
+    # Advance received_bytes only if nobody else did in the meantime (any worker may
+    # handle the next chunk), so a retried chunk never double-counts.
+    new_received = offset + len(data)
+    db.session.execute(
+        db.update(UploadSession)
+        .where(
+            UploadSession.id == session.id,
+            UploadSession.received_bytes == offset,
+            UploadSession.status.in_(('pending', 'uploading')),
+        )
+        .values(received_bytes=new_received, status='uploading', updated_at=_utcnow())
+    )
+    db.session.commit()
+    db.session.refresh(session)
+    return jsonify(_upload_session_state(session))
+
+
+@bp.route('/upload/sessions/<upload_id>/finalize', methods=['POST'])
+@login_required
+def resumable_upload_finalize(upload_id):
+    """Commit the staged chunks and record the Document (idempotent).
+
+    The session is claimed with a conditional status update (uploading -> finalizing),
+    so concurrent finalize calls assemble the blob once. Once assembled the blob is
+    kept until a Document records it: a database error leaves the session 'assembled'
+    and a retried finalize only records the Document.
+    """
+    session = _get_upload_session(upload_id)
+    if not session:
+        return jsonify({'success': False, 'error': 'Upload not found', 'error_code': 'UPLOAD_NOT_FOUND'}), 404
+
+    if session.status in {'completed', 'finalizing'}:
+        return _finalize_result(session)
+    if session.status not in {'uploading', 'assembled'} or int(session.received_bytes or 0) != int(session.total_size):
+        return jsonify({**_upload_session_state(session), 'success': False, 'error': 'Upload is incomplete', 'error_code': 'UPLOAD_INCOMPLETE'}), 409
+    if not current_user.has_permission('documents.upload', org_id=int(session.organization_id)):
+        return jsonify({'success': False, 'error': 'Not authorized', 'error_code': 'NOT_AUTHORIZED'}), 403
+
+    storage_service = get_document_storage()
+    versioned_filename = get_versioned_filename(session.filename, int(session.organization_id))
+
+    if session.status == 'uploading':
+        if not _move_upload_session(session, 'uploading', 'finalizing'):
+            return _finalize_result(session)
+
+        metadata = {
+            'uploaded_by': str(current_user.id),
+            'uploaded_by_email': current_user.email,
+            'original_filename': versioned_filename,
+            'upload_timestamp': str(int(datetime.now(timezone.utc).timestamp()))
+        }
+        result = storage_service.commit_chunks(session.blob_name, session.chunk_count, content_type=session.content_type, metadata=metadata)
+        if not result.get('success'):
+            # The staged chunks are still there; let the client retry.
+            _move_upload_session(session, 'finalizing', 'uploading')
+            logger.error(f"Chunk commit failed for upload {session.id}: {result.get('error')}")
+            return jsonify({'success': False, 'error': 'Could not assemble upload', 'error_code': result.get('error_code')}), 502
+        _move_upload_session(session, 'finalizing', 'assembled')
+
+    try:
+        document = _create_document_record(
+            filename=versioned_filename,
+            blob_name=session.blob_name,
+            file_size=int(session.total_size),
+            content_type=session.content_type,
+            org_id=int(session.organization_id),
+        )
+        db.session.flush()
+        claimed = db.session.execute(
+            db.update(UploadSession)
+            .where(UploadSession.id == session.id, UploadSession.status == 'assembled')
+            .values(status='completed', document_id=int(document.id), updated_at=_utcnow())
+        ).rowcount
+        if not claimed:
+            # Another finalize recorded it first.
+            db.session.rollback()
+            db.session.refresh(session)
+            return _finalize_result(session)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Database error during resumable upload finalize {session.id}: {e}")
+        return jsonify({'success': False, 'error': 'Database error occurred', 'error_code': 'DATABASE_ERROR'}), 500
+
+    db.session.refresh(session)
+    _document_created(document)
+    logger.info(f"Resumable upload completed: {session.blob_name} as {versioned_filename} by user {current_user.id}")
+    return jsonify({**_upload_session_state(session), 'filename': versioned_filename})
+
+
+def _move_upload_session(session, from_status, to_status):
+    """Conditionally change the session status; False when another request moved it first."""
+    claimed = db.session.execute(
+        db.update(UploadSession)
+        .where(UploadSession.id == session.id, UploadSession.status == from_status)
+        .values(status=to_status, updated_at=_utcnow())
+    ).rowcount
+    db.session.commit()
+    db.session.refresh(session)
+    return bool(claimed)
+
+
+def _finalize_result(session):
+    """Response for a finalize call that found the session already claimed or completed."""
+    if session.status != 'completed':
+        return jsonify({**_upload_session_state(session), 'success': False, 'error': f'Upload is {session.status}', 'error_code': 'UPLOAD_FINALIZING'}), 409
+    document = db.session.get(Document, int(session.document_id)) if session.document_id else None
+    return jsonify({**_upload_session_state(session), 'filename': document.filename if document else session.filename})
+
+
+@bp.route('/upload/sessions/<upload_id>', methods=['DELETE'])
+@login_required
+def resumable_upload_abort(upload_id):
+    """Abandon a resumable upload and drop its staged chunks."""
+    session = _get_upload_session(upload_id)
+    if not session:
+        return jsonify({'success': False, 'error': 'Upload not found', 'error_code': 'UPLOAD_NOT_FOUND'}), 404
+    # Only sessions whose chunks have not been assembled yet can be abandoned.
+    if _move_upload_session(session, 'pending', 'aborted') or _move_upload_session(session, 'uploading', 'aborted'):
+        get_document_storage().discard_chunks(session.blob_name)
+    return jsonify(_upload_session_state(session))
+
+
 @bp.route('/upload/validate', methods=['POST'])
 @login_required
 def validate_file_ajax():
@@ -244,13 +822,11 @@ def validate_file_ajax():
 @bp.route('/upload/progress/<upload_id>')
 @login_required
 def upload_progress(upload_id):
-    """Get upload progress (placeholder for future implementation)."""
-    # This is a placeholder for future upload progress tracking
-    return jsonify({
-        'success': True,
-        'progress': 100,
-        'status': 'completed'
-    })
+    """Get progress of a resumable upload (state is in the database, so any worker can answer)."""
+    session = _get_upload_session(upload_id)
+    if not session:
+        return jsonify({'success': False, 'error': 'Upload not found', 'error_code': 'UPLOAD_NOT_FOUND'}), 404
+    return jsonify(_upload_session_state(session))
 
 @bp.route('/upload/info')
 @login_required
@@ -261,5 +837,9 @@ def upload_info():
         'max_file_size': FileValidationService.MAX_FILE_SIZE,
         'max_file_size_formatted': FileValidationService.get_max_file_size_formatted(),
         'allowed_extensions': FileValidationService.get_allowed_extensions_list(),
-        'azure_configured': AzureBlobStorageService().is_configured()
+        'azure_configured': get_document_storage().is_configured(),
+        'direct_upload_enabled': bool(current_app.config.get('DIRECT_UPLOAD_ENABLED')),
+        'resumable_upload_enabled': bool(current_app.config.get('RESUMABLE_UPLOAD_ENABLED')),
+        'resumable_max_file_size': _resumable_max_size(),
+        'resumable_chunk_size': _resumable_chunk_size()
     })
\ No newline at end of file
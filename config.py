@@ -20,6 +20,11 @@ class Config:
     # Azure Storage Configuration
     AZURE_STORAGE_CONNECTION_STRING = os.environ.get('AZURE_STORAGE_CONNECTION_STRING')
     AZURE_CONTAINER_NAME = os.environ.get('AZURE_CONTAINER_NAME') or 'compliance-documents'
+
+    # Storage backend: 'azure' (default) or 'local' (files on disk; for offline dev and load tests).
+    STORAGE_BACKEND = (os.environ.get('STORAGE_BACKEND') or 'azure').strip().lower()
+    # Root directory for the local backend (defaults to <instance>/storage).
+    LOCAL_STORAGE_ROOT = os.environ.get('LOCAL_STORAGE_ROOT')
     
     # Database Configuration
     # For SQLite, Flask-SQLAlchemy resolves relative file paths against the Flask instance folder.
@@ -70,8 +75,47 @@ class Config:
     TURNSTILE_SECRET_KEY = os.environ.get('TURNSTILE_SECRET_KEY')
     
     # File Upload Configuration
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_UPLOAD_SIZE_MB') or 16) * 1024 * 1024  # 16MB default
     ALLOWED_EXTENSIONS = {'pdf', 'docx'}
+
+    # Storage uploads are staged in fixed-size blocks so peak memory per upload is about
+    # (AZURE_UPLOAD_MAX_CONCURRENCY + 1) blocks, whatever the file size.
+    AZURE_UPLOAD_CHUNKED = (os.environ.get('AZURE_UPLOAD_CHUNKED') or '1').strip().lower() in {'1', 'true', 'yes', 'on'}
+    AZURE_UPLOAD_BLOCK_SIZE = int(os.environ.get('AZURE_UPLOAD_BLOCK_SIZE_MB') or 4) * 1024 * 1024
+    AZURE_UPLOAD_MAX_CONCURRENCY = int(os.environ.get('AZURE_UPLOAD_MAX_CONCURRENCY') or 2)
+    # Direct-to-storage uploads: the browser PUTs to a short-lived write-only SAS and the
+    # server only verifies + records the result. Requires CORS (PUT) on the storage account.
+    DIRECT_UPLOAD_ENABLED = (os.environ.get('DIRECT_UPLOAD_ENABLED') or '0').strip().lower() in {'1', 'true', 'yes', 'on'}
+    DIRECT_UPLOAD_SAS_MINUTES = int(os.environ.get('DIRECT_UPLOAD_SAS_MINUTES') or 15)
+    # Resumable uploads: the browser sends fixed-size chunks (each one request, so within
+    # MAX_CONTENT_LENGTH) and can resume after a dropped connection. This is what allows a
+    # file-size ceiling above MAX_CONTENT_LENGTH.
+    RESUMABLE_UPLOAD_ENABLED = (os.environ.get('RESUMABLE_UPLOAD_ENABLED') or '0').strip().lower() in {'1', 'true', 'yes', 'on'}
+    RESUMABLE_UPLOAD_CHUNK_SIZE = int(os.environ.get('RESUMABLE_UPLOAD_CHUNK_SIZE_MB') or 4) * 1024 * 1024
+    RESUMABLE_UPLOAD_MAX_SIZE = int(os.environ.get('RESUMABLE_UPLOAD_MAX_SIZE_MB') or 256) * 1024 * 1024
+    RESUMABLE_UPLOAD_SESSION_HOURS = int(os.environ.get('RESUMABLE_UPLOAD_SESSION_HOURS') or 24)
+    # Expired upload sessions and abandoned staged chunks are swept by the
+    # `flask process-documents --loop` worker this often (0 = only `flask sweep-uploads`).
+    UPLOAD_SWEEP_INTERVAL_SECONDS = int(os.environ.get('UPLOAD_SWEEP_INTERVAL_SECONDS') or 300)
+    # Post-upload processing (text, page count, metadata, thumbnails). Run
+    # `flask process-documents --loop` as a separate worker (extraction runs in its process
+    # pool); IN_APP=1 also drains the queue on a background thread in each web worker.
+    DOCUMENT_PROCESSING_ENABLED = (os.environ.get('DOCUMENT_PROCESSING_ENABLED') or '1').strip().lower() in {'1', 'true', 'yes', 'on'}
+    DOCUMENT_PROCESSING_IN_APP = (os.environ.get('DOCUMENT_PROCESSING_IN_APP') or '0').strip().lower() in {'1', 'true', 'yes', 'on'}
+    DOCUMENT_PROCESSING_WORKERS = int(os.environ.get('DOCUMENT_PROCESSING_WORKERS') or 2)
+    DOCUMENT_PROCESSING_BATCH_SIZE = int(os.environ.get('DOCUMENT_PROCESSING_BATCH_SIZE') or 8)
+    DOCUMENT_PROCESSING_MAX_ATTEMPTS = int(os.environ.get('DOCUMENT_PROCESSING_MAX_ATTEMPTS') or 3)
+    DOCUMENT_TEXT_MAX_CHARS = int(os.environ.get('DOCUMENT_TEXT_MAX_CHARS') or 200000)
+    DOCUMENT_THUMBNAIL_SIZE = int(os.environ.get('DOCUMENT_THUMBNAIL_SIZE') or 320)
+    # Persistent index of ML result files (compliance_result_files). When enabled,
+    # dashboards read the table and only the sync talks to ADLS; run
+    # `flask sync-compliance-results --loop` or let each web worker sync in the background.
+    ADLS_RESULT_INDEX_ENABLED = (os.environ.get('ADLS_RESULT_INDEX_ENABLED') or '0').strip().lower() in {'1', 'true', 'yes', 'on'}
+    ADLS_RESULT_SYNC_IN_APP = (os.environ.get('ADLS_RESULT_SYNC_IN_APP') or '1').strip().lower() in {'1', 'true', 'yes', 'on'}
+    ADLS_RESULT_SYNC_INTERVAL_SECONDS = int(os.environ.get('ADLS_RESULT_SYNC_INTERVAL_SECONDS') or 300)
+    ADLS_RESULT_SYNC_MONTHS = int(os.environ.get('ADLS_RESULT_SYNC_MONTHS') or 2)
+    # Downloads are streamed in chunks of this size (also bounds time-to-first-byte).
+    AZURE_DOWNLOAD_CHUNK_SIZE = int(os.environ.get('AZURE_DOWNLOAD_CHUNK_SIZE_MB') or 4) * 1024 * 1024
     
     # Security Configuration
     WTF_CSRF_ENABLED = True
@@ -90,6 +134,10 @@ class Config:
     # Rate limiting (Flask-Limiter)
     RATELIMIT_STORAGE_URI = os.environ.get('RATELIMIT_STORAGE_URI') or 'memory://'
 
+    # Shared cache across gunicorn workers/hosts: redis://host:6379/0, or sqlite:///path for
+    # workers on one host. Empty keeps every cache per-process.
+    CACHE_URL = os.environ.get('CACHE_URL') or ''
+
     # Feature flags
     # ML/ADLS summary is not shipped yet; keep disabled unless explicitly enabled.
     ML_SUMMARY_ENABLED = (os.environ.get('ML_SUMMARY_ENABLED') or '0').strip().lower() in {'1', 'true', 'yes', 'on'}
@@ -163,6 +211,10 @@ class TestingConfig(DevelopmentConfig):
     # Disable secure cookies in testing so they work with test client
     SESSION_COOKIE_SECURE = False
     REMEMBER_COOKIE_SECURE = False
+    # Tests drive the queue explicitly instead of via background threads.
+    DOCUMENT_PROCESSING_IN_APP = False
+    ADLS_RESULT_SYNC_IN_APP = False
+
 
 config = {
     'development': DevelopmentConfig,
@@ -0,0 +1,45 @@
+"""content-addressed document blobs
+
+Revision ID: h2i3j4k5l6m7
+Revises: g1h2j3k4l5m6
+Create Date: 2026-10-16
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'h2i3j4k5l6m7'
+down_revision = 'g1h2j3k4l5m6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'document_blobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('organization_id', sa.Integer(), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('blob_name', sa.String(length=255), nullable=False),
+        sa.Column('file_size', sa.Integer(), nullable=True),
+        sa.Column('ref_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('organization_id', 'sha256', name='uq_document_blobs_org_sha256'),
+    )
+
+    with op.batch_alter_table('documents', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_sha256', sa.String(length=64), nullable=True))
+        batch_op.create_index('ix_documents_org_content_sha256', ['organization_id', 'content_sha256'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('documents', schema=None) as batch_op:
+        batch_op.drop_index('ix_documents_org_content_sha256')
+        batch_op.drop_column('content_sha256')
+
+    op.drop_table('document_blobs')
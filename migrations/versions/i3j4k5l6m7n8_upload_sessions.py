@@ -0,0 +1,47 @@
+"""resumable upload sessions
+
+Revision ID: i3j4k5l6m7n8
+Revises: h2i3j4k5l6m7
+Create Date: 2026-10-16
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'i3j4k5l6m7n8'
+down_revision = 'h2i3j4k5l6m7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'upload_sessions',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('organization_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=False),
+        sa.Column('content_type', sa.String(length=255), nullable=True),
+        sa.Column('blob_name', sa.String(length=255), nullable=False),
+        sa.Column('total_size', sa.BigInteger(), nullable=False),
+        sa.Column('chunk_size', sa.Integer(), nullable=False),
+        sa.Column('received_bytes', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='pending'),
+        sa.Column('document_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['document_id'], ['documents.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_upload_sessions_user_status', 'upload_sessions', ['user_id', 'status'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_upload_sessions_user_status', table_name='upload_sessions')
+    op.drop_table('upload_sessions')
@@ -0,0 +1,51 @@
+"""document derived data (post-upload processing)
+
+Revision ID: j4k5l6m7n8o9
+Revises: i3j4k5l6m7n8
+Create Date: 2026-10-16
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'j4k5l6m7n8o9'
+down_revision = 'i3j4k5l6m7n8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'document_derived_data',
+        sa.Column('document_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+        sa.Column('claimed_at', sa.DateTime(), nullable=True),
+        sa.Column('text_content', sa.Text(), nullable=True),
+        sa.Column('page_count', sa.Integer(), nullable=True),
+        sa.Column('title', sa.String(length=255), nullable=True),
+        sa.Column('author', sa.String(length=255), nullable=True),
+        sa.Column('metadata_json', sa.Text(), nullable=True),
+        sa.Column('thumbnail', sa.LargeBinary(), nullable=True),
+        sa.Column('thumbnail_content_type', sa.String(length=50), nullable=True),
+        sa.Column('error', sa.String(length=500), nullable=True),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['document_id'], ['documents.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('document_id'),
+    )
+    op.create_index(
+        'ix_document_derived_data_status_next',
+        'document_derived_data',
+        ['status', 'next_attempt_at'],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_document_derived_data_status_next', table_name='document_derived_data')
+    op.drop_table('document_derived_data')
@@ -0,0 +1,61 @@
+"""document full-text search index
+
+Revision ID: k5l6m7n8o9p0
+Revises: j4k5l6m7n8o9
+Create Date: 2026-10-16
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'k5l6m7n8o9p0'
+down_revision = 'j4k5l6m7n8o9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS document_search_fts USING fts5("
+            "org, filename, body, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        op.execute(
+            "INSERT INTO document_search_fts (rowid, org, filename, body) "
+            "SELECT d.id, 'o' || d.organization_id, d.filename, "
+            "COALESCE(dd.title, '') || char(10) || COALESCE(dd.author, '') || char(10) || COALESCE(dd.text_content, '') "
+            "FROM documents d LEFT JOIN document_derived_data dd ON dd.document_id = d.id "
+            "WHERE d.is_active = 1 AND d.organization_id IS NOT NULL"
+        )
+    elif dialect == 'postgresql':
+        op.execute(
+            "CREATE TABLE IF NOT EXISTS document_search ("
+            "document_id INTEGER PRIMARY KEY REFERENCES documents(id) ON DELETE CASCADE, "
+            "organization_id INTEGER NOT NULL, "
+            "search_vector TSVECTOR NOT NULL)"
+        )
+        op.execute(
+            "INSERT INTO document_search (document_id, organization_id, search_vector) "
+            "SELECT d.id, d.organization_id, "
+            "to_tsvector('simple', 'o' || d.organization_id) "
+            "|| setweight(to_tsvector('english', d.filename), 'A') "
+            "|| setweight(to_tsvector('english', concat_ws(E'\\n', dd.title, dd.author, dd.text_content)), 'B') "
+            "FROM documents d LEFT JOIN document_derived_data dd ON dd.document_id = d.id "
+            "WHERE d.is_active AND d.organization_id IS NOT NULL "
+            "ON CONFLICT (document_id) DO NOTHING"
+        )
+        # Built after the backfill: one bulk GIN build is much faster than row-by-row.
+        op.execute("CREATE INDEX IF NOT EXISTS ix_document_search_vector ON document_search USING GIN (search_vector)")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS document_search_fts")
+    elif dialect == 'postgresql':
+        op.execute("DROP TABLE IF EXISTS document_search")
@@ -0,0 +1,48 @@
+"""extend documents listing index for keyset pagination; documents.uploaded_at NOT NULL
+
+Revision ID: l6m7n8o9p0q1
+Revises: k5l6m7n8o9p0
+Create Date: 2026-10-16
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'l6m7n8o9p0q1'
+down_revision = 'k5l6m7n8o9p0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # A NULL uploaded_at never satisfies the keyset predicate, so such rows would only
+    # ever show on the first page. Backfill them as the oldest documents.
+    op.execute("UPDATE documents SET uploaded_at = '1970-01-01 00:00:00' WHERE uploaded_at IS NULL")
+    with op.batch_alter_table('documents', schema=None) as batch_op:
+        batch_op.alter_column('uploaded_at', existing_type=sa.DateTime(), nullable=False)
+
+    # (uploaded_at, id) is the pagination key; with id in the index Postgres can seek
+    # and return rows in order without a sort step.
+    op.drop_index('ix_documents_org_active_uploaded_at', table_name='documents')
+    op.create_index(
+        'ix_documents_org_active_uploaded_at',
+        'documents',
+        ['organization_id', 'is_active', 'uploaded_at', 'id'],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_documents_org_active_uploaded_at', table_name='documents')
+    op.create_index(
+        'ix_documents_org_active_uploaded_at',
+        'documents',
+        ['organization_id', 'is_active', 'uploaded_at'],
+        unique=False,
+    )
+
+    with op.batch_alter_table('documents', schema=None) as batch_op:
+        batch_op.alter_column('uploaded_at', existing_type=sa.DateTime(), nullable=True)
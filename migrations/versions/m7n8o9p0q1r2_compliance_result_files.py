@@ -0,0 +1,55 @@
+"""compliance result files index
+
+Revision ID: m7n8o9p0q1r2
+Revises: l6m7n8o9p0q1
+Create Date: 2026-10-16
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'm7n8o9p0q1r2'
+down_revision = 'l6m7n8o9p0q1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'compliance_result_files',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('file_path', sa.String(length=1024), nullable=False),
+        sa.Column('file_name', sa.String(length=255), nullable=False),
+        sa.Column('framework', sa.String(length=100), nullable=True),
+        sa.Column('period', sa.String(length=7), nullable=True),
+        sa.Column('organization_id', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('etag', sa.String(length=255), nullable=True),
+        sa.Column('last_modified', sa.DateTime(), nullable=True),
+        sa.Column('file_size', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('total_requirements', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('complete_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('needs_review_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('missing_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('overall_status', sa.String(length=50), nullable=True),
+        sa.Column('compliancy_rate', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('weighted_score', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('frameworks_json', sa.Text(), nullable=True),
+        sa.Column('synced_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('file_path'),
+    )
+    op.create_index(
+        'ix_compliance_result_files_scope',
+        'compliance_result_files',
+        ['organization_id', 'user_id', 'period', 'last_modified'],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_compliance_result_files_scope', table_name='compliance_result_files')
+    op.drop_table('compliance_result_files')
@@ -0,0 +1,40 @@
+"""compliance monthly rollups
+
+Revision ID: n8o9p0q1r2s3
+Revises: m7n8o9p0q1r2
+Create Date: 2026-10-16
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'n8o9p0q1r2s3'
+down_revision = 'm7n8o9p0q1r2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'compliance_monthly_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('organization_id', sa.Integer(), nullable=False),
+        sa.Column('period', sa.String(length=7), nullable=False),
+        sa.Column('framework', sa.String(length=100), nullable=False),
+        sa.Column('sample_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('score_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('score_avg', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('complete_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('needs_review_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('missing_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('organization_id', 'period', 'framework', name='uq_compliance_rollups_org_period_framework'),
+    )
+
+
+def downgrade():
+    op.drop_table('compliance_monthly_rollups')
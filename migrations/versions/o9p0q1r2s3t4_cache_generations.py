@@ -0,0 +1,32 @@
+"""cache generations
+
+Revision ID: o9p0q1r2s3t4
+Revises: n8o9p0q1r2s3
+Create Date: 2026-10-16
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'o9p0q1r2s3t4'
+down_revision = 'n8o9p0q1r2s3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'cache_generations',
+        sa.Column('namespace', sa.String(length=64), nullable=False),
+        sa.Column('scope_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('generation', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('namespace', 'scope_id'),
+    )
+
+
+def downgrade():
+    op.drop_table('cache_generations')
@@ -0,0 +1,28 @@
+"""rbac role permission masks
+
+Revision ID: p0q1r2s3t4u5
+Revises: o9p0q1r2s3t4
+Create Date: 2026-10-16
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'p0q1r2s3t4u5'
+down_revision = 'o9p0q1r2s3t4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Left NULL for existing roles: masks are compiled on demand until a role in the org is edited.
+    with op.batch_alter_table('rbac_roles') as batch_op:
+        batch_op.add_column(sa.Column('permission_mask', sa.BigInteger(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('rbac_roles') as batch_op:
+        batch_op.drop_column('permission_mask')
@@ -0,0 +1,74 @@
+"""rbac role closure and effective permissions
+
+Revision ID: q1r2s3t4u5v6
+Revises: p0q1r2s3t4u5
+Create Date: 2026-10-16
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'q1r2s3t4u5v6'
+down_revision = 'p0q1r2s3t4u5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'rbac_role_closure',
+        sa.Column('role_id', sa.Integer(), nullable=False),
+        sa.Column('ancestor_role_id', sa.Integer(), nullable=False),
+        sa.Column('depth', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['role_id'], ['rbac_roles.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['ancestor_role_id'], ['rbac_roles.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('role_id', 'ancestor_role_id'),
+    )
+    op.create_index('ix_rbac_role_closure_ancestor', 'rbac_role_closure', ['ancestor_role_id'])
+
+    op.create_table(
+        'rbac_role_effective_permissions',
+        sa.Column('role_id', sa.Integer(), nullable=False),
+        sa.Column('permission_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['role_id'], ['rbac_roles.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['permission_id'], ['rbac_permissions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('role_id', 'permission_id'),
+    )
+    op.create_index(
+        'ix_rbac_role_effective_permissions_permission',
+        'rbac_role_effective_permissions',
+        ['permission_id', 'role_id'],
+    )
+
+    # Backfill every existing role; the app keeps both tables current from here on.
+    op.execute(
+        """
+        INSERT INTO rbac_role_closure (role_id, ancestor_role_id, depth)
+        WITH RECURSIVE closure(role_id, ancestor_role_id, depth) AS (
+            SELECT id, id, 0 FROM rbac_roles
+            UNION
+            SELECT c.role_id, i.inherited_role_id, c.depth + 1
+            FROM closure c JOIN rbac_role_inherits i ON i.role_id = c.ancestor_role_id
+            WHERE c.depth < 32
+        )
+        SELECT role_id, ancestor_role_id, MIN(depth) FROM closure GROUP BY role_id, ancestor_role_id
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO rbac_role_effective_permissions (role_id, permission_id)
+        SELECT DISTINCT c.role_id, rp.permission_id
+        FROM rbac_role_closure c
+        JOIN rbac_role_permissions rp ON rp.role_id = c.ancestor_role_id
+        """
+    )
+
+
+def downgrade():
+    op.drop_index('ix_rbac_role_effective_permissions_permission', table_name='rbac_role_effective_permissions')
+    op.drop_table('rbac_role_effective_permissions')
+    op.drop_index('ix_rbac_role_closure_ancestor', table_name='rbac_role_closure')
+    op.drop_table('rbac_role_closure')
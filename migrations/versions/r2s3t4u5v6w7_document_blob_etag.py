@@ -0,0 +1,28 @@
+"""document blob etag
+
+Revision ID: r2s3t4u5v6w7
+Revises: q1r2s3t4u5v6
+Create Date: 2026-10-16
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'r2s3t4u5v6w7'
+down_revision = 'q1r2s3t4u5v6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Left NULL for existing documents: their downloads are not pinned to a blob version.
+    with op.batch_alter_table('documents') as batch_op:
+        batch_op.add_column(sa.Column('blob_etag', sa.String(length=128), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('documents') as batch_op:
+        batch_op.drop_column('blob_etag')
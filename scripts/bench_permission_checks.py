@@ -0,0 +1,114 @@
+"""
+Benchmark RBAC permission checks: the uncompiled path (membership query + role
+permission lookup) versus the compiled principal snapshot kept in the session.
+
+Each simulated request runs the checks a typical page makes (org switcher flags plus
+a permission_required route), with a fresh request-scoped cache but a warm process.
+
+Usage:
+    python scripts/bench_permission_checks.py
+    python scripts/bench_permission_checks.py --requests 5000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+CHECKS = ('users.manage', 'users.invite', 'audits.export', 'org.manage', 'roles.manage', 'documents.upload')
+
+
+def seed(db):
+    from app.models import Organization, OrganizationMembership, RBACRole, User
+    from app.services.rbac import BUILTIN_ROLE_KEYS, ensure_rbac_seeded_for_org
+
+    org = Organization(name='Bench Org')
+    db.session.add(org)
+    db.session.flush()
+    user = User(email='bench@example.com', email_verified=True, is_active=True, organization_id=org.id)
+    db.session.add(user)
+    db.session.flush()
+    ensure_rbac_seeded_for_org(int(org.id))
+    admin = RBACRole.query.filter_by(organization_id=org.id, name=BUILTIN_ROLE_KEYS.ORG_ADMIN).one()
+    db.session.add(OrganizationMembership(organization_id=org.id, user_id=user.id, role_id=admin.id, is_active=True))
+    db.session.commit()
+    return user, int(org.id)
+
+
+def run(app, db, check, requests, snapshot=None):
+    """Seconds per request and queries per request for `requests` simulated requests."""
+    from flask import g, session
+    from sqlalchemy import event
+
+    from app.services.rbac import PRINCIPAL_SESSION_KEY
+
+    queries = []
+
+    def record(*_args):
+        queries.append(1)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    elapsed = 0.0
+    try:
+        for _ in range(requests):
+            with app.test_request_context():
+                # The bench shares one app context, so clear request-scoped state by hand.
+                for name in ('_rbac_principal', '_active_membership_cache', '_role_permission_codes_cache'):
+                    g.pop(name, None)
+                if snapshot is not None:
+                    session[PRINCIPAL_SESSION_KEY] = snapshot
+                started = time.perf_counter()
+                for code in CHECKS:
+                    assert check(code)
+                elapsed += time.perf_counter() - started
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    return elapsed / requests, len(queries) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000, help='Simulated requests per variant.')
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.sqlite')
+    os.environ['TEST_DATABASE_URL'] = f'sqlite:///{db_path}'
+
+    from flask import session
+
+    from app import create_app, db
+    from app.services.cache_generations import sync_generations
+    from app.services.rbac import PRINCIPAL_SESSION_KEY
+
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        user, org_id = seed(db)
+        sync_generations(force=True)
+        with app.test_request_context():
+            user.has_permission(CHECKS[0], org_id=org_id)
+            snapshot = dict(session[PRINCIPAL_SESSION_KEY])
+
+        variants = [
+            ('uncompiled', lambda code: user._has_permission_uncompiled(code, org_id=org_id), None),
+            ('session principal', lambda code: user.has_permission(code, org_id=org_id), snapshot),
+        ]
+        results = []
+        for name, check, snap in variants:
+            run(app, db, check, 50, snap)  # warm-up
+            results.append((name,) + run(app, db, check, args.requests, snap))
+
+    base = results[0][1]
+    print(f"{'variant':>18}  {'us/request':>10}  {'us/check':>8}  {'queries/req':>11}  {'speedup':>7}")
+    for name, per_request, queries in results:
+        print(
+            f'{name:>18}  {per_request * 1e6:>10.1f}  {per_request * 1e6 / len(CHECKS):>8.2f}  '
+            f'{queries:>11.1f}  {base / per_request:>6.1f}x'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark ML result CSV ingestion: row-by-row (csv.DictReader + process_adls_data)
+versus the vectorized pandas path (parse_result_csv + summarize_frame).
+
+The service only takes the vectorized path for files of at least
+result_ingest.VECTORIZE_MIN_BYTES.
+
+Usage:
+    python scripts/bench_result_ingest.py                 # 1k, 100k and 1M rows
+    python scripts/bench_result_ingest.py --rows 5000 --repeat 5
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.azure_data_service import AzureDataLakeService, parse_result_rows  # noqa: E402
+from app.services.result_ingest import PANDAS_AVAILABLE, parse_result_csv, summarize_frame  # noqa: E402
+
+STATUSES = ('Complete', 'Needs Review', 'Missing')
+
+
+def make_csv(rows, seed=7):
+    rng = random.Random(seed)
+    lines = ['Framework,Compliance_Score,Status']
+    for i in range(rows):
+        lines.append(f'Control {i % 500},{rng.uniform(0, 10):.2f},{STATUSES[rng.randrange(3)]}')
+    lines.append('Overall,7.25,')
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def best_of(repeat, fn):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, action='append', help='Row count to test (repeatable).')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per size; the best time is reported.')
+    args = parser.parse_args()
+
+    if not PANDAS_AVAILABLE:
+        sys.exit('pandas is not installed; nothing to compare.')
+
+    service = AzureDataLakeService()
+    sizes = args.rows or [1_000, 100_000, 1_000_000]
+
+    print(f"{'rows':>10}  {'MB':>6}  {'row-by-row':>11}  {'vectorized':>11}  {'speedup':>7}")
+    for rows in sizes:
+        data = make_csv(rows)
+        legacy_time, legacy = best_of(args.repeat, lambda: service.process_adls_data(parse_result_rows('r.csv', data)))
+        fast_time, fast = best_of(args.repeat, lambda: summarize_frame(parse_result_csv(data)))
+        for key in ('total_requirements', 'complete_count', 'needs_review_count', 'missing_count', 'compliancy_rate'):
+            assert legacy[key] == fast[key], (key, legacy[key], fast[key])
+        print(
+            f'{rows:>10,}  {len(data) / 1e6:>6.1f}  {legacy_time * 1000:>9.1f}ms  '
+            f'{fast_time * 1000:>9.1f}ms  {legacy_time / fast_time:>6.1f}x'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,374 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+
+class _SlowFileSystem:
+    def __init__(self, delay, files_by_prefix):
+        self.delay = delay
+        self.files_by_prefix = files_by_prefix
+        self.calls = []
+
+    def get_paths(self, path, timeout=None, max_results=None):
+        self.calls.append(path)
+        time.sleep(self.delay)
+        for prefix, names in self.files_by_prefix.items():
+            if f"/{prefix}/" in path + "/":
+                return [
+                    SimpleNamespace(name=f"{path}/{n}", is_directory=False, last_modified=None, content_length=1)
+                    for n in names
+                ]
+        return []
+
+
+def _service(monkeypatch, fs):
+    from app.services import azure_data_service as mod
+
+    mod._COMPLIANCE_FILES_CACHE.clear()
+    mod._COMPLIANCE_FILES_FAILURE_CACHE.clear()
+    client = SimpleNamespace(get_file_system_client=lambda name: fs)
+    monkeypatch.setattr(mod.AzureDataLakeService, "service_client", property(lambda self: client))
+    monkeypatch.setattr(mod.AzureDataLakeService, "blob_service_client", property(lambda self: None))
+    return mod.AzureDataLakeService()
+
+
+def test_compliance_paths_are_listed_concurrently_in_priority_order(monkeypatch):
+    fs = _SlowFileSystem(0.3, {"org_7": ["preferred.csv"], "user_3": ["legacy.csv"]})
+    service = _service(monkeypatch, fs)
+
+    started = time.monotonic()
+    files = service.get_compliance_files(user_id=3, organization_id=7)
+    elapsed = time.monotonic() - started
+
+    assert len(fs.calls) == 3
+    assert elapsed < 0.6  # serial listing would take ~0.9s
+    # The org-scoped path wins even though the legacy path also has files.
+    assert [f["file_name"] for f in files] == ["preferred.csv"]
+
+
+def test_compliance_listing_deadline_is_not_cached(monkeypatch):
+    from app.services import azure_data_service as mod
+
+    monkeypatch.setenv("AZURE_ADLS_LIST_DEADLINE_SECONDS", "1")
+    fs = _SlowFileSystem(1.5, {"org_7": ["late.csv"]})
+    service = _service(monkeypatch, fs)
+
+    started = time.monotonic()
+    assert service.get_compliance_files(user_id=3, organization_id=7) == []
+    assert time.monotonic() - started < 1.4
+    assert len(mod._COMPLIANCE_FILES_CACHE) == 0
+
+
+def _dashboard_service(monkeypatch, delays):
+    from app.services import azure_data_service as mod
+
+    mod._DASHBOARD_SUMMARY_CACHE.clear()
+    mod._FILE_SUMMARY_CACHE.clear()
+    service = _service(monkeypatch, _SlowFileSystem(0, {}))
+    files = [
+        {
+            "file_name": f"result_{i}.csv",
+            "file_path": f"r/result_{i}.csv",
+            "last_modified": datetime(2026, 1, 1),
+            "file_size": 100,
+        }
+        for i in range(len(delays))
+    ]
+    monkeypatch.setattr(service, "get_compliance_files", lambda *a, **k: files)
+
+    def summary(path):
+        time.sleep(delays[int(path.rsplit("_", 1)[1].split(".")[0])])
+        return {
+            "file_name": path.rsplit("/", 1)[1],
+            "total_requirements": 2,
+            "complete_count": 1,
+            "needs_review_count": 1,
+            "missing_count": 0,
+            "overall_status": "Good",
+            "compliancy_rate": 8.0,
+            "frameworks": [],
+        }
+
+    monkeypatch.setattr(service, "get_file_analysis_summary", summary)
+    return service
+
+
+def test_dashboard_files_are_fetched_concurrently(monkeypatch):
+    service = _dashboard_service(monkeypatch, [0.3, 0.3, 0.3, 0.3])
+
+    started = time.monotonic()
+    result = service.get_dashboard_summary(user_id=3, organization_id=7)
+    assert time.monotonic() - started < 0.6  # serial would take ~1.2s
+    assert [f["file_name"] for f in result["file_summaries"]] == [f"result_{i}.csv" for i in (3, 2, 1, 0)]
+    assert result["total_requirements"] == 8
+    assert result["partial"] is False
+
+
+def test_dashboard_returns_partial_result_on_timeout(monkeypatch):
+    from app.services import azure_data_service as mod
+
+    monkeypatch.setenv("AZURE_DASHBOARD_FILE_TIMEOUT_SECONDS", "1")
+    service = _dashboard_service(monkeypatch, [0.1, 2.0, 0.1])
+
+    result = service.get_dashboard_summary(user_id=3, organization_id=7)
+    assert result["partial"] is True and result["files_skipped"] == 1
+    assert len(result["file_summaries"]) == 2
+    # Partial results are retried on the next request rather than cached.
+    assert len(mod._DASHBOARD_SUMMARY_CACHE) == 0
+    assert len(mod._FILE_SUMMARY_CACHE) == 2
+
+
+def test_unreadable_file_summaries_are_not_cached(monkeypatch):
+    from app.services import azure_data_service as mod
+
+    service = _dashboard_service(monkeypatch, [0.0, 0.0])
+    # A download failure surfaces as an empty 'No Data' summary, not as 'Error'.
+    no_data = {
+        "file_name": "result_1.csv",
+        "total_requirements": 0,
+        "complete_count": 0,
+        "needs_review_count": 0,
+        "missing_count": 0,
+        "overall_status": "No Data",
+        "compliancy_rate": 0,
+        "frameworks": [],
+    }
+    real = service.get_file_analysis_summary
+    monkeypatch.setattr(
+        service, "get_file_analysis_summary", lambda path: no_data if path.endswith("_1.csv") else real(path)
+    )
+
+    service.get_dashboard_summary(user_id=3, organization_id=7)
+    assert len(mod._FILE_SUMMARY_CACHE) == 1
+    entry = next(iter(mod._FILE_SUMMARY_CACHE._entries.values()))
+    assert entry[1] is not None  # every cached summary expires
+
+
+def test_dashboard_stream_reports_files_as_they_finish(monkeypatch):
+    service = _dashboard_service(monkeypatch, [0.05, 0.4])
+
+    events = list(service.iter_dashboard_summary(user_id=3, organization_id=7))
+
+    assert [e for e, _ in events] == ["status", "file", "file", "summary"]
+    assert events[0][1]["total_files"] == 2
+    # The fast file is reported first; the summary keeps the selection order.
+    assert [d["file_name"] for e, d in events if e == "file"] == ["result_0.csv", "result_1.csv"]
+    assert [f["file_name"] for f in events[-1][1]["file_summaries"]] == ["result_1.csv", "result_0.csv"]
+    assert events[-1][1]["total_requirements"] == 4
+
+    # A cached summary is replayed in the same shape without a rebuild.
+    assert [e for e, _ in service.iter_dashboard_summary(user_id=3, organization_id=7)] == [e for e, _ in events]
+
+
+def test_concurrent_dashboard_streams_share_one_build(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    service = _dashboard_service(monkeypatch, [0.3])
+    listings = []
+    files = service.get_compliance_files()
+    monkeypatch.setattr(service, "get_compliance_files", lambda *a, **k: listings.append(1) or files)
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        streams = [pool.submit(lambda: list(service.iter_dashboard_summary(user_id=3, organization_id=8))) for _ in range(2)]
+        time.sleep(0.1)
+        summary = pool.submit(service.get_dashboard_summary, 3, 8)
+        results = [future.result() for future in streams]
+
+    assert len(listings) == 1
+    assert [e for e, _ in results[0]] == [e for e, _ in results[1]] == ["status", "file", "summary"]
+    assert summary.result()["total_requirements"] == 2
+
+
+def test_dashboard_stream_endpoint_sends_server_sent_events(client, app, db_session, seed_org_user):
+    from tests.conftest import login
+
+    assert login(client).status_code in {302, 303}
+    resp = client.get("/api/ml-summary/stream")
+
+    assert resp.mimetype == "text/event-stream"
+    names = [line.split(": ", 1)[1] for line in resp.get_data(as_text=True).splitlines() if line.startswith("event: ")]
+    assert names == ["status", "file", "file", "summary"]
+
+
+def test_byte_budget_bounds_in_flight_bytes():
+    from app.services.azure_data_service import _ByteBudget
+
+    budget = _ByteBudget(100)
+    assert budget.acquire(60, timeout=0) == 60
+    assert budget.acquire(60, timeout=0.05) == 0
+    assert budget.acquire(500, timeout=0.05) == 0  # capped at the limit, still waits
+    budget.release(60)
+    assert budget.acquire(500, timeout=0) == 100
+
+
+def _reset_swr_state():
+    from app.services import azure_data_service as mod
+
+    mod._DASHBOARD_SUMMARY_CACHE.clear()
+    mod._DASHBOARD_REFRESH_BACKOFF.clear()
+    mod._DASHBOARD_REFRESHING.clear()
+    for name in mod._DASHBOARD_METRICS:
+        mod._DASHBOARD_METRICS[name] = 0
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_stale_summary_is_served_and_refreshed_once_in_background(monkeypatch):
+    from app.services import azure_data_service as mod
+
+    _reset_swr_state()
+    service = _service(monkeypatch, _SlowFileSystem(0, {}))
+    calls = []
+
+    def build(user_id, organization_id, cache_key, cache_seconds, refresh=False):
+        calls.append(refresh)
+        time.sleep(0.2)
+        result = {"total_files": len(calls)}
+        mod._DASHBOARD_SUMMARY_CACHE.set(cache_key, (time.time(), result))
+        return result
+
+    monkeypatch.setattr(service, "_build_dashboard_summary", build)
+    mod._DASHBOARD_SUMMARY_CACHE.set((3, 7), (time.time() - 600, {"total_files": 0}))
+
+    started = time.monotonic()
+    for _ in range(5):
+        assert service.get_dashboard_summary(user_id=3, organization_id=7) == {"total_files": 0}
+    assert time.monotonic() - started < 0.1  # nobody waited on the rebuild
+
+    assert _wait_for(lambda: mod.dashboard_cache_metrics()["refresh_succeeded"] == 1)
+    assert calls == [True]
+    assert service.get_dashboard_summary(user_id=3, organization_id=7) == {"total_files": 1}
+
+    metrics = mod.dashboard_cache_metrics()
+    assert (metrics["stale"], metrics["hit"], metrics["miss"], metrics["refresh_started"]) == (5, 1, 0, 1)
+
+
+def test_failed_refresh_backs_off_and_keeps_stale_value(monkeypatch):
+    from app.services import azure_data_service as mod
+
+    _reset_swr_state()
+    service = _service(monkeypatch, _SlowFileSystem(0, {}))
+
+    def build(*args, **kwargs):
+        raise RuntimeError("ADLS unavailable")
+
+    monkeypatch.setattr(service, "_build_dashboard_summary", build)
+    mod._DASHBOARD_SUMMARY_CACHE.set((3, 7), (time.time() - 600, {"total_files": 2}))
+
+    assert service.get_dashboard_summary(user_id=3, organization_id=7) == {"total_files": 2}
+    assert _wait_for(lambda: mod.dashboard_cache_metrics()["refresh_failed"] == 1)
+
+    # Within the backoff window no new refresh is started.
+    assert service.get_dashboard_summary(user_id=3, organization_id=7) == {"total_files": 2}
+    metrics = mod.dashboard_cache_metrics()
+    assert metrics["refresh_started"] == 1 and metrics["refresh_deferred"] == 1
+    assert mod._DASHBOARD_REFRESH_BACKOFF[(3, 7)][0] == 1
+
+
+def test_concurrent_listing_misses_share_one_fetch(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    fs = _SlowFileSystem(0.3, {"org_7": ["preferred.csv"]})
+    service = _service(monkeypatch, fs)
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        results = list(pool.map(lambda _: service.get_compliance_files(user_id=3, organization_id=7), range(6)))
+
+    # One caller listed the three candidate paths; the rest waited for its result.
+    assert len(fs.calls) == 3
+    assert all([f["file_name"] for f in files] == ["preferred.csv"] for files in results)
+
+
+class _Pager:
+    """SDK-style ItemPaged: by_page() yields pages and exposes the next continuation_token."""
+
+    def __init__(self, items, page_size):
+        self.items = items
+        self.page_size = page_size or len(items) or 1
+
+    def by_page(self, continuation_token=None):
+        pager = self
+
+        class Pages:
+            continuation_token = None
+
+            def __iter__(self):
+                start = int(continuation_token or 0)
+                while start < len(pager.items):
+                    end = start + pager.page_size
+                    self.continuation_token = str(end) if end < len(pager.items) else None
+                    yield pager.items[start:end]
+                    start = end
+
+        return Pages()
+
+
+class _TreeFileSystem:
+    """Hierarchical ADLS file system over a list of (path, last_modified) files."""
+
+    def __init__(self, files):
+        self.files = files
+        self.listed = []
+
+    def get_paths(self, path, recursive=True, max_results=None, timeout=None):
+        self.listed.append((path, recursive))
+        entries, seen = [], set()
+        for name, modified in self.files:
+            if not name.startswith(path + "/"):
+                continue
+            rest = name[len(path) + 1:]
+            if recursive or "/" not in rest:
+                entries.append(SimpleNamespace(name=name, is_directory=False, last_modified=modified, content_length=1))
+            elif rest.split("/", 1)[0] not in seen:
+                seen.add(rest.split("/", 1)[0])
+                entries.append(SimpleNamespace(name=f"{path}/{rest.split('/', 1)[0]}", is_directory=True))
+        return _Pager(sorted(entries, key=lambda e: e.name), max_results)
+
+
+def test_result_listing_pages_resume_from_token(monkeypatch):
+    import pytest
+
+    from app.services.storage_listing import ListingTokenError
+
+    names = [f"compliance-results/2026/01/r{i:02d}.csv" for i in range(5)] + ["compliance-results/2026/01/notes.txt"]
+    service = _service(monkeypatch, _TreeFileSystem([(n, None) for n in names]))
+
+    pages = list(service.list_result_file_pages("compliance-results", page_size=2))
+    assert [len(p.items) for p in pages] == [1, 2, 2]  # notes.txt is filtered out of the first page
+    assert pages[-1].continuation_token is None
+
+    # A persisted token resumes after its page and is bound to the listed prefix.
+    resumed = next(service.list_result_file_pages("compliance-results", page_size=2,
+                                                  continuation_token=pages[0].continuation_token))
+    assert [f["file_name"] for f in resumed.items] == ["r01.csv", "r02.csv"]
+    with pytest.raises(ListingTokenError):
+        next(service.list_result_file_pages("other", continuation_token=pages[0].continuation_token))
+
+    # The complete listing is no longer capped.
+    monkeypatch.setenv("AZURE_ADLS_LIST_PAGE_SIZE", "2")
+    assert len(service.get_compliance_files()) == 5
+
+
+def test_newest_result_files_skip_older_month_folders(monkeypatch):
+    fs = _TreeFileSystem([
+        ("compliance-results/2025/12/org_1/a.csv", datetime(2025, 12, 5)),
+        ("compliance-results/2026/01/org_1/b.csv", datetime(2026, 1, 5)),
+        ("compliance-results/2026/02/org_1/c.csv", datetime(2026, 2, 5)),
+        ("compliance-results/2026/02/org_2/d.json", datetime(2026, 2, 6)),
+    ])
+    service = _service(monkeypatch, fs)
+
+    files = service.get_compliance_files(limit=3)
+
+    assert [f["file_name"] for f in files] == ["d.json", "c.csv", "b.csv"]
+    assert all(not recursive for _path, recursive in fs.listed)
+    assert "compliance-results/2025/12" not in [path for path, _recursive in fs.listed]
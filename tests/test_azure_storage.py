@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import io
+import threading
+
+
+class FakeBlobClient:
+    def __init__(self):
+        self.blob_name = "org_1/doc.pdf"
+        self.url = "https://example.blob.core.windows.net/docs/org_1/doc.pdf"
+        self.staged = {}
+        self.committed = None
+        self.commit_kwargs = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def stage_block(self, block_id, data, length=None):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            self.staged[block_id] = bytes(data)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def commit_block_list(self, block_list, **kwargs):
+        self.committed = [b.id for b in block_list]
+        self.commit_kwargs = kwargs
+
+    def get_blob_properties(self):
+        class Props:
+            size = sum(len(self.staged[b]) for b in self.committed)
+            last_modified = None
+            etag = '"0x1"'
+
+        return Props()
+
+
+class FakeBlobServiceClient:
+    def __init__(self, blob_client):
+        self.blob_client = blob_client
+
+    def get_blob_client(self, container, blob):
+        return self.blob_client
+
+
+def _configured_service(app, blob_client, **config):
+    from app.services.azure_storage import AzureBlobStorageService
+
+    app.config.update(config)
+    svc = AzureBlobStorageService()
+    svc.connection_string = "UseDevelopmentStorage=true"
+    svc.blob_service_client = FakeBlobServiceClient(blob_client)
+    svc.datalake_service_client = None
+    svc._container_checked = True
+    return svc
+
+
+def test_upload_file_stages_fixed_size_blocks_in_order(app):
+    blob_client = FakeBlobClient()
+    payload = bytes(range(256)) * 1100  # ~275 KB
+
+    with app.app_context():
+        svc = _configured_service(
+            app,
+            blob_client,
+            AZURE_UPLOAD_BLOCK_SIZE=64 * 1024,
+            AZURE_UPLOAD_MAX_CONCURRENCY=3,
+        )
+        result = svc.upload_file(
+            io.BytesIO(payload),
+            "org_1/doc.pdf",
+            content_type="application/pdf",
+            metadata={"uploaded_by": "1"},
+        )
+
+    assert result["success"] is True
+    assert result["size"] == len(payload)
+
+    # Blocks are committed in stream order and reassemble the original bytes.
+    assert len(blob_client.committed) == 5
+    assert b"".join(blob_client.staged[b] for b in blob_client.committed) == payload
+    assert all(len(blob_client.staged[b]) <= 64 * 1024 for b in blob_client.committed)
+
+    # Never more blocks in flight than the configured concurrency.
+    assert blob_client.max_in_flight <= 3
+
+    assert blob_client.commit_kwargs["metadata"] == {"uploaded_by": "1"}
+    assert blob_client.commit_kwargs["content_settings"].content_type == "application/pdf"
+
+
+def test_upload_file_block_failure_reports_error(app):
+    class FailingBlobClient(FakeBlobClient):
+        def stage_block(self, block_id, data, length=None):
+            raise RuntimeError("network down")
+
+    with app.app_context():
+        svc = _configured_service(app, FailingBlobClient(), AZURE_UPLOAD_BLOCK_SIZE=64 * 1024)
+        result = svc.upload_file(io.BytesIO(b"x" * 200_000), "org_1/doc.pdf")
+
+    assert result["success"] is False
+    assert result["error_code"] == "UPLOAD_ERROR"
+
+
+def test_storage_clients_are_shared_per_process(monkeypatch):
+    import app.services.storage_clients as storage_clients
+
+    created = []
+
+    class FakeServiceClient:
+        @classmethod
+        def from_connection_string(cls, conn_str, **kwargs):
+            created.append(kwargs)
+            return cls()
+
+    storage_clients.reset_clients()
+    monkeypatch.setattr(storage_clients, "BlobServiceClient", FakeServiceClient)
+    monkeypatch.setattr(storage_clients, "DataLakeServiceClient", FakeServiceClient)
+    try:
+        first = storage_clients.get_blob_service_client("conn", max_single_get_size=1024)
+        again = storage_clients.get_blob_service_client("conn", max_single_get_size=1024)
+        datalake = storage_clients.get_datalake_service_client("conn")
+
+        assert first is again
+        assert datalake is not first
+        assert len(created) == 2
+        # Blob and ADLS clients for one account share a single keep-alive session.
+        assert created[0]["transport"].session is created[1]["transport"].session
+
+        storage_clients.mark_container_checked("conn", "docs")
+        assert storage_clients.container_checked("conn", "docs")
+
+        # A forked child starts with an empty registry.
+        storage_clients._reset_after_fork()
+        assert not storage_clients.container_checked("conn", "docs")
+        assert storage_clients.get_blob_service_client("conn", max_single_get_size=1024) is not first
+    finally:
+        storage_clients.reset_clients()
+
+
+class FakeFileSystem:
+    def __init__(self, fail_append=False):
+        self.fail_append = fail_append
+        self.files = {}
+        self.deleted = []
+        self.renamed = []
+
+    def get_file_client(self, path):
+        return FakeFileClient(self, path)
+
+
+class FakeFileClient:
+    def __init__(self, fs, path):
+        self.fs = fs
+        self.path = path
+        self.url = f"https://example.dfs.core.windows.net/docs/{path}"
+
+    def create_file(self, **kwargs):
+        self.fs.files[self.path] = b""
+
+    def append_data(self, data, offset, length=None):
+        if self.fs.fail_append:
+            raise RuntimeError("network down")
+        self.fs.files[self.path] += bytes(data)
+
+    def flush_data(self, offset, **kwargs):
+        assert len(self.fs.files[self.path]) == offset
+
+    def rename_file(self, new_name):
+        self.fs.renamed.append(new_name)
+        path = new_name.split("/", 1)[1]
+        self.fs.files[path] = self.fs.files.pop(self.path)
+        return FakeFileClient(self.fs, path)
+
+    def delete_file(self):
+        self.fs.deleted.append(self.path)
+        self.fs.files.pop(self.path, None)
+
+    def get_file_properties(self):
+        class Props:
+            size = len(self.fs.files[self.path])
+            last_modified = None
+            etag = '"0x2"'
+
+        return Props()
+
+
+def _adls_service(app, fs):
+    svc = _configured_service(app, FakeBlobClient(), AZURE_UPLOAD_BLOCK_SIZE=64 * 1024)
+
+    class FakeDataLake:
+        def get_file_system_client(self, name):
+            return fs
+
+    svc.datalake_service_client = FakeDataLake()
+    return svc
+
+
+def test_adls_upload_is_renamed_into_place_after_flush(app):
+    fs = FakeFileSystem()
+    payload = b"y" * 150_000
+
+    with app.app_context():
+        svc = _adls_service(app, fs)
+        result = svc.upload_file(io.BytesIO(payload), "org_1/doc.pdf", content_type="application/pdf")
+
+    assert result["success"] is True and result["storage_type"] == "ADLS_Gen2"
+    assert result["size"] == len(payload)
+    assert fs.renamed == [f"{svc.container_name}/org_1/doc.pdf"]
+    assert list(fs.files) == ["org_1/doc.pdf"]
+
+
+def test_failed_adls_upload_leaves_no_partial_file(app):
+    fs = FakeFileSystem(fail_append=True)
+
+    with app.app_context():
+        svc = _adls_service(app, fs)
+        result = svc.upload_file(io.BytesIO(b"z" * 150_000), "org_1/doc.pdf")
+
+    # Falls back to Blob Storage; the ADLS attempt left nothing behind.
+    assert result["success"] is True and result["storage_type"] == "Blob_Storage"
+    assert fs.files == {}
+    assert len(fs.deleted) == 1 and fs.deleted[0].startswith("org_1/doc.pdf.uploading-")
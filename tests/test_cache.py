@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import time
+
+
+def test_lru_eviction_and_stats():
+    from app.services.cache import BoundedCache
+
+    cache = BoundedCache("t", max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert "b" not in cache and cache.get("a") == 1 and cache.get("c") == 3
+    stats = cache.stats()
+    assert (stats["entries"], stats["evictions"], stats["hits"], stats["misses"]) == (2, 1, 3, 1)
+
+
+def test_ttl_expiry_and_falsy_values():
+    from app.services.cache import BoundedCache
+
+    cache = BoundedCache("t", default_ttl=0.05)
+    cache.set("empty", [])
+    assert cache.get("empty") == []
+    time.sleep(0.08)
+    assert cache.get("empty", "gone") == "gone"
+    assert cache.stats()["expirations"] == 1
+    assert cache.set("x", 1, ttl=0) is False and len(cache) == 0
+
+
+def test_byte_budget_evicts_and_rejects_oversized_values():
+    from app.services.cache import BoundedCache
+
+    cache = BoundedCache("t", max_entries=100, max_bytes=1000, sizeof=len)
+    for i in range(4):
+        cache.set(i, b"x" * 300)
+
+    assert len(cache) == 3 and cache.stats()["bytes"] == 900
+    assert 0 not in cache
+    assert cache.set("big", b"x" * 1001) is False and "big" not in cache
+
+
+def test_prefix_invalidation_and_registry(monkeypatch):
+    from app.services import cache as mod
+
+    monkeypatch.setenv("CACHE_TEST_PREFIX_MAX_ENTRIES", "7")
+    cache = mod.get_cache("test_prefix", max_entries=100)
+    assert mod.get_cache("test_prefix") is cache and cache.max_entries == 7
+
+    cache.set((1, 10), "a")
+    cache.set((1, None), "b")
+    cache.set((2, 10), "c")
+    assert cache.delete_prefix((1,)) == 2
+    assert cache.get((2, 10)) == "c" and len(cache) == 1
+    assert "test_prefix" in mod.cache_stats()
+
+
+def test_shared_backend_spans_caches_and_invalidation(monkeypatch, tmp_path):
+    from app.services import shared_cache
+    from app.services.cache import BoundedCache
+
+    backend = shared_cache.configure_shared_cache(f"sqlite:///{tmp_path / 'cache.db'}")
+    try:
+        worker_a = BoundedCache("shared_t", shared=True)
+        worker_b = BoundedCache("shared_t", shared=True)
+        local_only = BoundedCache("shared_t")
+
+        worker_a.set((1, 10), {"total": 3}, ttl=60)
+        worker_a.set((2, 10), "other", ttl=60)
+        assert worker_b.get((1, 10)) == {"total": 3}
+        assert local_only.get((1, 10)) is None
+        assert worker_b.stats()["shared_hits"] == 1
+
+        worker_b.delete_prefix((1,))
+        worker_a._entries.clear()  # the in-process tier would expire after CACHE_LOCAL_TTL_SECONDS
+        assert worker_a.get((1, 10)) is None and worker_a.get((2, 10)) == "other"
+        assert backend.get(shared_cache.encode_key("shared_t", (2, 10)))[1] is not None
+
+        monkeypatch.setattr(backend, "get", lambda key: 1 / 0)
+        assert worker_b.get((3, 10), "fallback") == "fallback"
+        assert worker_b.stats()["shared_errors"] == 1
+    finally:
+        shared_cache.configure_shared_cache(None)
+
+
+def test_shared_clear_spares_namespaces_sharing_a_prefix(tmp_path):
+    from app.services import shared_cache
+    from app.services.cache import BoundedCache
+
+    backend = shared_cache.configure_shared_cache(f"sqlite:///{tmp_path / 'cache.db'}")
+    try:
+        files = BoundedCache("compliance_files", shared=True)
+        failures = BoundedCache("compliance_files_failure", shared=True)
+        files.set((1, 2), ["a.csv"], ttl=60)
+        files.set("latest", ["b.csv"], ttl=60)
+        failures.set((1, 2), "timeout", ttl=60)
+
+        files.clear()
+
+        assert backend.get(shared_cache.encode_key("compliance_files", (1, 2))) is None
+        assert backend.get(shared_cache.encode_key("compliance_files", "latest")) is None
+        assert backend.get(shared_cache.encode_key("compliance_files_failure", (1, 2)))[0] == "timeout"
+    finally:
+        shared_cache.configure_shared_cache(None)
+
+
+def test_generation_bump_reaches_other_workers(app, db_session, seed_org_user):
+    from app.models import CacheGeneration, RBACRole
+    from app.services import cache_generations as gens
+
+    org_id, _user_id, _membership_id = seed_org_user
+    dropped = []
+    gens.watch_generation("rbac", dropped.append)
+    try:
+        with app.app_context():
+            gens.sync_generations(force=True)  # baseline for this "worker"
+            dropped.clear()
+
+            role = RBACRole.query.filter_by(organization_id=org_id).first()
+            role.description = "edited"
+            db_session.session.commit()
+            assert dropped == [org_id]  # the writing worker drops immediately
+
+            # A worker that last checked before the commit sees exactly the bumped scope, once.
+            dropped.clear()
+            gens.sync_generations()  # rate-limited: no query yet
+            assert dropped == []
+            gens.sync_generations(force=True)
+            gens.sync_generations(force=True)
+            assert dropped == [org_id]
+
+            head = db_session.session.get(CacheGeneration, ("rbac", gens.HEAD_SCOPE)).generation
+            assert db_session.session.get(CacheGeneration, ("rbac", org_id)).generation == head
+    finally:
+        gens._WATCHERS["rbac"].remove(dropped.append)
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+CSV = "Framework,Compliance_Score,Status\nISO 27001,8.5,Complete\nSOC 2,6.0,Needs Review\nOverall,7.5,\n"
+
+
+class _FakeLake:
+    """Minimal ADLS client: files maps path -> (etag, csv text)."""
+
+    def __init__(self, files):
+        self.files = files
+        self.downloads = []
+        self.listings = 0
+
+    def get_file_system_client(self, name):
+        return self
+
+    def get_paths(self, path, timeout=None, max_results=None):
+        self.listings += 1
+        return [
+            SimpleNamespace(
+                name=p,
+                is_directory=False,
+                last_modified=datetime(2026, 1, 1, tzinfo=timezone.utc),
+                content_length=len(body),
+                etag=etag,
+            )
+            for p, (etag, body) in self.files.items()
+            if p.startswith(path + "/")
+        ]
+
+    def get_file_client(self, container, path):
+        def download_file(timeout=None):
+            self.downloads.append(path)
+            return SimpleNamespace(readall=lambda: self.files[path][1].encode("utf-8"))
+
+        return SimpleNamespace(download_file=download_file)
+
+
+def _service(monkeypatch, lake):
+    from app.services import azure_data_service as mod
+
+    monkeypatch.setattr(mod.AzureDataLakeService, "service_client", property(lambda self: lake))
+    monkeypatch.setattr(mod.AzureDataLakeService, "blob_service_client", property(lambda self: None))
+    return mod.AzureDataLakeService()
+
+
+def _month_prefix():
+    now = datetime.now()
+    return f"compliance-results/{now.year}/{now.month:02d}"
+
+
+def test_sync_downloads_only_changed_files(app, db_session, monkeypatch):
+    from app.models import ComplianceResultFile
+    from app.services.compliance_results import sync_compliance_results
+
+    prefix = _month_prefix()
+    lake = _FakeLake({
+        f"{prefix}/org_7/user_3/a.csv": ('"e1"', CSV),
+        f"{prefix}/user_3/legacy.csv": ('"e2"', CSV),
+    })
+    service = _service(monkeypatch, lake)
+
+    with app.app_context():
+        result = sync_compliance_results(months=1, service=service)
+        assert result["success"] and result["downloaded"] == 2
+        row = ComplianceResultFile.query.filter_by(file_name="a.csv").one()
+        assert (row.organization_id, row.user_id, row.period) == (7, 3, prefix.split("/", 1)[1].replace("/", "-"))
+        assert (row.total_requirements, row.complete_count, row.compliancy_rate) == (2, 1, 7.5)
+
+        # Nothing changed: listed again, nothing downloaded.
+        lake.downloads.clear()
+        result = sync_compliance_results(months=1, service=service)
+        assert (result["unchanged"], result["downloaded"], lake.downloads) == (2, 0, [])
+
+        # A new ETag is re-read; a file gone from ADLS is dropped.
+        lake.files[f"{prefix}/org_7/user_3/a.csv"] = ('"e3"', CSV.replace("8.5,Complete", "9.0,Missing"))
+        del lake.files[f"{prefix}/user_3/legacy.csv"]
+        result = sync_compliance_results(months=1, service=service)
+        assert (result["downloaded"], result["removed"]) == (1, 1)
+        assert lake.downloads == [f"{prefix}/org_7/user_3/a.csv"]
+        row = ComplianceResultFile.query.one()
+        assert (row.etag, row.missing_count) == ('"e3"', 1)
+
+
+def test_failed_listing_keeps_indexed_rows(app, db_session, monkeypatch):
+    from app.models import ComplianceResultFile
+    from app.services.compliance_results import sync_compliance_results
+
+    lake = _FakeLake({f"{_month_prefix()}/org_7/user_3/a.csv": ('"e1"', CSV)})
+    service = _service(monkeypatch, lake)
+    with app.app_context():
+        sync_compliance_results(months=1, service=service)
+
+        def broken(path, timeout=None):
+            raise RuntimeError("throttled")
+
+        lake.get_paths = broken
+        result = sync_compliance_results(months=1, service=service)
+        assert (result["failed"], result["removed"]) == (1, 0)
+        assert ComplianceResultFile.query.count() == 1
+
+
+def test_dashboard_reads_index_without_touching_adls(app, db_session, monkeypatch):
+    from app.services.compliance_results import sync_compliance_results
+
+    prefix = _month_prefix()
+    lake = _FakeLake({
+        f"{prefix}/org_7/user_3/a.csv": ('"e1"', CSV),
+        f"{prefix}/org_8/user_3/other_org.csv": ('"e2"', CSV),
+    })
+    service = _service(monkeypatch, lake)
+    app.config["ADLS_RESULT_INDEX_ENABLED"] = True
+    try:
+        with app.test_request_context():
+            sync_compliance_results(months=1, service=service)
+            listings, downloads = lake.listings, len(lake.downloads)
+
+            summary = service.get_dashboard_summary(user_id=3, organization_id=7)
+            assert summary["total_files"] == 1
+            assert [f["file_name"] for f in summary["file_summaries"]] == ["a.csv"]
+            assert [fw["name"] for fw in summary["file_summaries"][0]["frameworks"]] == ["ISO 27001", "SOC 2"]
+            assert summary["avg_compliancy_rate"] == 7.5
+            assert [f["file_name"] for f in service.get_compliance_files(user_id=3, organization_id=8)] == ["other_org.csv"]
+            assert service.get_dashboard_summary(user_id=4, organization_id=7)["total_files"] == 0
+            assert (lake.listings, len(lake.downloads)) == (listings, downloads)
+    finally:
+        app.config["ADLS_RESULT_INDEX_ENABLED"] = False
+
+
+def test_backfill_builds_monthly_rollups_and_trend_endpoint(client, app, db_session, seed_org_user, monkeypatch):
+    from app.services.compliance_results import _recent_periods, sync_compliance_results
+    from tests.conftest import login
+
+    org_id, user_id, _membership_id = seed_org_user
+    (y0, m0), (y1, m1), _ = _recent_periods(3)
+    lake = _FakeLake({
+        f"compliance-results/{y0}/{m0:02d}/org_{org_id}/user_{user_id}/a.csv": ('"e1"', CSV),
+        f"compliance-results/{y1}/{m1:02d}/org_{org_id}/user_{user_id}/a.csv": (
+            '"e2"', CSV.replace("8.5,Complete", "4.0,Missing").replace("Overall,7.5", "Overall,5.0"),
+        ),
+        f"compliance-results/{y1}/{m1:02d}/org_{org_id}/user_99/b.csv": ('"e3"', CSV.replace("Overall,7.5", "Overall,6.0")),
+    })
+    service = _service(monkeypatch, lake)
+
+    with app.app_context():
+        result = sync_compliance_results(months=3, service=service)
+        assert result["downloaded"] == 3 and lake.listings == 3
+
+    app.config["ML_SUMMARY_ENABLED"] = True
+    try:
+        assert login(client).status_code in {302, 303}
+        body = client.get("/api/compliance-trends?months=3").get_json()
+    finally:
+        app.config["ML_SUMMARY_ENABLED"] = False
+
+    assert body["periods"][-1] == f"{y0}-{m0:02d}" and len(body["periods"]) == 3
+    series = {s["framework"]: s["points"] for s in body["series"]}
+    assert body["series"][0]["framework"] == "Overall"
+    # Two files last month: averaged scores, summed status counts.
+    assert [(p["period"], p["score"], p["samples"]) for p in series["Overall"]] == [
+        (f"{y1}-{m1:02d}", 5.5, 2),
+        (f"{y0}-{m0:02d}", 7.5, 1),
+    ]
+    assert [(p["complete"], p["missing"]) for p in series["ISO 27001"]] == [(1, 1), (1, 0)]
+
+    # Changing one file rebuilds only its month.
+    lake.files[f"compliance-results/{y0}/{m0:02d}/org_{org_id}/user_{user_id}/a.csv"] = ('"e4"', CSV.replace("Overall,7.5", "Overall,9.0"))
+    with app.app_context():
+        sync_compliance_results(months=3, service=service)
+        from app.services.compliance_results import compliance_trends
+
+        overall = compliance_trends(org_id, months=3)["series"][0]["points"]
+        assert [p["score"] for p in overall] == [5.5, 9.0]
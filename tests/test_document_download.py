@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from tests.conftest import login
+
+
+PAYLOAD = bytes(range(256)) * 40  # 10 KB
+
+
+class FakeStorage:
+    calls = []
+
+    def open_download(self, blob_name, offset=None, length=None, etag=None):
+        FakeStorage.calls.append((blob_name, offset, length))
+        start = offset or 0
+        stop = len(PAYLOAD) if length is None else start + length
+        body = PAYLOAD[start:stop]
+        return {
+            "success": True,
+            "chunks": iter([body[:1000], body[1000:]]),
+            "size": len(body),
+            "total_size": len(PAYLOAD),
+            "content_type": "application/pdf",
+            "etag": '"0x8D"',
+            "last_modified": None,
+        }
+
+
+def _seed_document(app, db_session, org_id, user_id):
+    from app.models import Document
+
+    with app.app_context():
+        doc = Document(
+            filename="policy.pdf",
+            blob_name="org_1/policy.pdf",
+            file_size=len(PAYLOAD),
+            content_type="application/pdf",
+            uploaded_by=user_id,
+            organization_id=org_id,
+        )
+        db_session.session.add(doc)
+        db_session.session.commit()
+        return int(doc.id)
+
+
+def _setup(client, app, db_session, seed_org_user, monkeypatch):
+    import app.services.azure_storage as azure_storage
+
+    org_id, user_id, _membership_id = seed_org_user
+    doc_id = _seed_document(app, db_session, org_id, user_id)
+    FakeStorage.calls = []
+    monkeypatch.setattr(azure_storage, "AzureBlobStorageService", FakeStorage)
+    assert login(client).status_code in {302, 303}
+    return doc_id
+
+
+def test_download_streams_full_document(client, app, db_session, seed_org_user, monkeypatch):
+    doc_id = _setup(client, app, db_session, seed_org_user, monkeypatch)
+
+    resp = client.get(f"/document/{doc_id}/download")
+
+    assert resp.status_code == 200
+    assert resp.data == PAYLOAD
+    assert resp.headers["Accept-Ranges"] == "bytes"
+    assert resp.headers["Content-Length"] == str(len(PAYLOAD))
+    assert resp.headers["Content-Disposition"].startswith("attachment")
+    assert FakeStorage.calls == [("org_1/policy.pdf", None, None)]
+
+
+def test_download_honours_single_byte_range(client, app, db_session, seed_org_user, monkeypatch):
+    doc_id = _setup(client, app, db_session, seed_org_user, monkeypatch)
+
+    resp = client.get(f"/document/{doc_id}/download?inline=1", headers={"Range": "bytes=100-2099"})
+
+    assert resp.status_code == 206
+    assert resp.data == PAYLOAD[100:2100]
+    assert resp.headers["Content-Range"] == f"bytes 100-2099/{len(PAYLOAD)}"
+    assert resp.headers["Content-Disposition"].startswith("inline")
+    assert FakeStorage.calls == [("org_1/policy.pdf", 100, 2000)]
+
+
+def test_download_ignores_range_when_if_range_does_not_match(client, app, db_session, seed_org_user, monkeypatch):
+    doc_id = _setup(client, app, db_session, seed_org_user, monkeypatch)
+
+    resp = client.get(f"/document/{doc_id}/download", headers={"Range": "bytes=100-", "If-Range": '"0x8D"'})
+    assert resp.status_code == 206
+    assert resp.data == PAYLOAD[100:]
+
+    FakeStorage.calls = []
+    for validator in ('"0x8C-replaced"', 'W/"0x8D"', "Wed, 21 Oct 2015 07:28:00 GMT"):
+        resp = client.get(f"/document/{doc_id}/download", headers={"Range": "bytes=100-", "If-Range": validator})
+        assert resp.status_code == 200
+        assert resp.data == PAYLOAD
+        assert "Content-Range" not in resp.headers
+    assert FakeStorage.calls[-2:] == [("org_1/policy.pdf", 100, len(PAYLOAD) - 100), ("org_1/policy.pdf", None, None)]
+
+
+def test_download_rejects_unsatisfiable_range(client, app, db_session, seed_org_user, monkeypatch):
+    doc_id = _setup(client, app, db_session, seed_org_user, monkeypatch)
+
+    resp = client.get(f"/document/{doc_id}/download", headers={"Range": f"bytes={len(PAYLOAD) + 10}-"})
+
+    assert resp.status_code == 416
+    assert resp.headers["Content-Range"] == f"bytes */{len(PAYLOAD)}"
+    assert FakeStorage.calls == []
+
+
+def test_local_download_uses_full_content_type_for_docx(client, app, db_session, seed_org_user, tmp_path):
+    import io
+
+    from app.models import Document
+    from app.services.storage import get_document_storage
+
+    org_id, user_id, _membership_id = seed_org_user
+    app.config.update(STORAGE_BACKEND="local", LOCAL_STORAGE_ROOT=str(tmp_path / "storage"))
+    docx = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+    with app.app_context():
+        get_document_storage().upload_file(io.BytesIO(b"PK\x03\x04docx"), "org_1/policy.docx", content_type=docx)
+        doc = Document(
+            filename="policy.docx",
+            blob_name="org_1/policy.docx",
+            file_size=8,
+            content_type=docx[:50],  # documents.content_type is VARCHAR(50)
+            uploaded_by=user_id,
+            organization_id=org_id,
+        )
+        db_session.session.add(doc)
+        db_session.session.commit()
+        doc_id = int(doc.id)
+    assert login(client).status_code in {302, 303}
+
+    resp = client.get(f"/document/{doc_id}/download")
+
+    assert resp.status_code == 200
+    assert resp.mimetype == docx
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from tests.conftest import login
+
+
+def _seed_documents(db_session, org_id, user_id, count):
+    from app.models import Document
+    from app.services.pagination import invalidate_document_count
+
+    base = datetime(2026, 1, 1, 12, 0, 0)
+    for i in range(count):
+        db_session.session.add(
+            Document(
+                filename=f"doc_{i:02d}.pdf",
+                blob_name=f"org_{org_id}/doc_{i:02d}.pdf",
+                file_size=10,
+                content_type="application/pdf",
+                uploaded_by=user_id,
+                organization_id=org_id,
+                # Pairs share a timestamp so the id tie-breaker is exercised.
+                uploaded_at=base + timedelta(minutes=i // 2),
+            )
+        )
+    db_session.session.commit()
+    # Counts are cached per process and org ids repeat across tests.
+    invalidate_document_count(org_id)
+
+
+def test_keyset_pages_walk_forward_and_back(app, db_session, seed_org_user):
+    from app.services.pagination import CursorError, paginate_documents
+
+    org_id, user_id, _membership_id = seed_org_user
+    with app.app_context():
+        _seed_documents(db_session, org_id, user_id, 25)
+
+        seen = []
+        cursor = None
+        pages = []
+        while True:
+            page = paginate_documents(org_id, per_page=10, cursor=cursor, with_total=True)
+            pages.append(page)
+            seen.extend(d.filename for d in page.items)
+            assert page.total == 25
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+
+        assert seen == [f"doc_{i:02d}.pdf" for i in reversed(range(25))]
+        assert [len(p.items) for p in pages] == [10, 10, 5]
+        assert not pages[0].has_prev and pages[1].has_prev
+
+        back = paginate_documents(org_id, per_page=10, cursor=pages[2].prev_cursor)
+        assert [d.id for d in back.items] == [d.id for d in pages[1].items]
+        back = paginate_documents(org_id, per_page=10, cursor=back.prev_cursor)
+        assert [d.id for d in back.items] == [d.id for d in pages[0].items]
+        assert not back.has_prev and back.has_next
+
+        try:
+            paginate_documents(org_id, cursor="not-a-cursor")
+        except CursorError:
+            pass
+        else:
+            raise AssertionError("expected CursorError")
+
+
+def test_listing_routes_use_cursors(client, app, db_session, seed_org_user):
+    org_id, user_id, _membership_id = seed_org_user
+    with app.app_context():
+        _seed_documents(db_session, org_id, user_id, 12)
+
+    assert login(client).status_code in {302, 303}
+
+    body = client.get("/api/documents?per_page=10&total=1").get_json()
+    assert body["total"] == 12 and body["has_next"] is True
+    assert body["documents"][0]["filename"] == "doc_11.pdf"
+    assert body["documents"][0]["uploaded_by"] == "user@example.com"
+
+    body = client.get(f"/api/documents?per_page=10&cursor={body['next_cursor']}").get_json()
+    assert [d["filename"] for d in body["documents"]] == ["doc_01.pdf", "doc_00.pdf"]
+    assert body["has_next"] is False and body["has_prev"] is True
+    assert client.get("/api/documents?cursor=%%%").status_code == 400
+
+    resp = client.get("/evidence-repository?per_page=10")
+    assert resp.status_code == 200
+    assert b"Older" in resp.data and b"(12)" in resp.data
+    # A broken cursor falls back to the first page instead of erroring.
+    assert client.get("/evidence-repository?cursor=garbage").status_code == 200
+    assert client.get("/documents").status_code == 200
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import io
+import zipfile
+from pathlib import Path
+
+from tests.conftest import login
+
+
+def _docx_bytes(text="Access control policy", title="Access Policy", author="Jane Auditor"):
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w") as archive:
+        archive.writestr(
+            "word/document.xml",
+            f"<w:document><w:body><w:p><w:r><w:t>{text}</w:t></w:r></w:p>"
+            "<w:p><w:r><w:t>Second paragraph</w:t></w:r></w:p></w:body></w:document>",
+        )
+        archive.writestr(
+            "docProps/core.xml",
+            f"<cp:coreProperties><dc:title>{title}</dc:title><dc:creator>{author}</dc:creator></cp:coreProperties>",
+        )
+        archive.writestr("docProps/app.xml", "<Properties><Pages>3</Pages></Properties>")
+    return out.getvalue()
+
+
+def test_extract_document_docx_and_image():
+    from PIL import Image
+
+    from app.services.document_extraction import extract_document
+
+    result = extract_document(_docx_bytes(), "policy.docx")
+    assert result["text"] == "Access control policy\nSecond paragraph"
+    assert result["page_count"] == 3
+    assert (result["title"], result["author"]) == ("Access Policy", "Jane Auditor")
+
+    buf = io.BytesIO()
+    Image.new("RGB", (1200, 600), "white").save(buf, format="PNG")
+    result = extract_document(buf.getvalue(), "scan.png", thumb_size=100)
+    assert result["thumbnail_content_type"] == "image/jpeg"
+    assert Image.open(io.BytesIO(result["thumbnail"])).size == (100, 50)
+    assert result["metadata"]["width"] == 1200
+
+
+def test_upload_queues_processing_and_duplicates_reuse_results(client, app, db_session, seed_org_user, tmp_path):
+    from app.models import Document, DocumentDerivedData
+    from app.services.document_processing import process_pending_documents
+
+    org_id, _user_id, _membership_id = seed_org_user
+    app.config.update(STORAGE_BACKEND="local", LOCAL_STORAGE_ROOT=str(tmp_path / "storage"))
+    assert login(client).status_code in {302, 303}
+
+    test_pdf = Path("tests") / "test_files" / "test_doc.pdf"
+    with test_pdf.open("rb") as f:
+        resp = client.post("/upload", data={"file": (f, "test_doc.pdf")}, content_type="multipart/form-data")
+    assert resp.status_code in {302, 303}
+
+    with app.app_context():
+        assert DocumentDerivedData.query.one().status == "pending"
+        assert process_pending_documents(max_workers=0) == 1
+        assert process_pending_documents(max_workers=0) == 0
+        first = DocumentDerivedData.query.one()
+        assert first.status == "done" and first.attempts == 1
+        assert first.processed_at is not None
+
+    with test_pdf.open("rb") as f:
+        client.post("/upload", data={"file": (f, "test_doc.pdf")}, content_type="multipart/form-data")
+
+    with app.app_context():
+        assert process_pending_documents(max_workers=0) == 1
+        rows = DocumentDerivedData.query.order_by(DocumentDerivedData.document_id).all()
+        assert [r.status for r in rows] == ["done", "done"]
+        assert rows[1].attempts == 1 and rows[1].metadata_json == rows[0].metadata_json
+        doc_id = int(Document.query.filter_by(organization_id=int(org_id)).order_by(Document.id).first().id)
+
+    assert client.get(f"/document/{doc_id}/details").status_code == 200
+
+
+def test_unhashed_upload_is_hashed_and_moved_onto_shared_blob(client, app, db_session, seed_org_user, tmp_path):
+    from app.models import Document, DocumentBlob
+    from app.services.document_processing import enqueue_document, process_pending_documents
+    from app.services.storage import get_document_storage
+
+    org_id, user_id, _membership_id = seed_org_user
+    app.config.update(STORAGE_BACKEND="local", LOCAL_STORAGE_ROOT=str(tmp_path / "storage"))
+    assert login(client).status_code in {302, 303}
+
+    test_pdf = Path("tests") / "test_files" / "test_doc.pdf"
+    with test_pdf.open("rb") as f:
+        client.post("/upload", data={"file": (f, "test_doc.pdf")}, content_type="multipart/form-data")
+
+    with app.app_context():
+        storage = get_document_storage()
+        shared = Document.query.one()
+        # Stored the way a direct or resumable upload is: own blob, no content hash.
+        with test_pdf.open("rb") as f:
+            assert storage.upload_file(f, f"org_{org_id}/direct-copy.pdf")["success"]
+        doc = Document(
+            filename="direct-copy.pdf",
+            blob_name=f"org_{org_id}/direct-copy.pdf",
+            file_size=test_pdf.stat().st_size,
+            content_type="application/pdf",
+            uploaded_by=user_id,
+            organization_id=org_id,
+        )
+        db_session.session.add(doc)
+        db_session.session.commit()
+        enqueue_document(doc.id)
+
+        assert process_pending_documents(max_workers=0) == 2
+        doc = db_session.session.get(Document, int(doc.id))
+        assert doc.content_sha256 == shared.content_sha256
+        assert doc.blob_name == shared.blob_name
+        assert storage.get_local_path(f"org_{org_id}/direct-copy.pdf") is None
+        assert DocumentBlob.query.one().ref_count == 2
+
+
+def test_processing_failures_back_off_then_fail(app, db_session, seed_org_user, monkeypatch):
+    from app.models import Document, DocumentDerivedData
+    from app.services import document_processing
+
+    org_id, user_id, _membership_id = seed_org_user
+
+    class MissingStorage:
+        def get_local_path(self, blob_name):
+            return None
+
+        def open_download(self, blob_name, offset=None, length=None, etag=None):
+            return {"success": False, "error": "File not found", "error_code": "FILE_NOT_FOUND"}
+
+    monkeypatch.setattr("app.services.storage.get_document_storage", lambda: MissingStorage())
+    app.config["DOCUMENT_PROCESSING_MAX_ATTEMPTS"] = 2
+
+    with app.app_context():
+        doc = Document(
+            filename="gone.pdf",
+            blob_name="org_1/gone.pdf",
+            file_size=10,
+            content_type="application/pdf",
+            uploaded_by=user_id,
+            organization_id=org_id,
+        )
+        db_session.session.add(doc)
+        db_session.session.commit()
+        assert document_processing.enqueue_document(doc.id) is True
+        assert document_processing.enqueue_document(doc.id) is False
+
+        assert document_processing.process_pending_documents(max_workers=0) == 1
+        row = db_session.session.get(DocumentDerivedData, int(doc.id))
+        assert (row.status, row.attempts) == ("pending", 1)
+        # Backed off: not due yet.
+        assert document_processing.process_pending_documents(max_workers=0) == 0
+
+        row.next_attempt_at = None
+        db_session.session.commit()
+        assert document_processing.process_pending_documents(max_workers=0) == 1
+        row = db_session.session.get(DocumentDerivedData, int(doc.id))
+        assert (row.status, row.attempts) == ("failed", 2)
+        assert "File not found" in row.error
+
+
+def test_remote_blobs_are_streamed_to_a_temporary_file(app, db_session, seed_org_user, monkeypatch, tmp_path):
+    import tempfile
+
+    from app.models import Document, DocumentDerivedData
+    from app.services import document_processing
+
+    org_id, user_id, _membership_id = seed_org_user
+    data = _docx_bytes()
+    seen = []
+
+    class RemoteStorage:
+        def get_local_path(self, blob_name):
+            return None
+
+        def open_download(self, blob_name, offset=None, length=None, etag=None):
+            seen.append(etag)
+            return {"success": True, "chunks": iter([data[:100], data[100:]])}
+
+    monkeypatch.setattr("app.services.storage.get_document_storage", lambda: RemoteStorage())
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+
+    with app.app_context():
+        doc = Document(
+            filename="policy.docx",
+            blob_name="org_1/policy.docx",
+            file_size=len(data),
+            uploaded_by=user_id,
+            organization_id=org_id,
+            blob_etag='"0x8D1"',
+        )
+        db_session.session.add(doc)
+        db_session.session.commit()
+        document_processing.enqueue_document(doc.id)
+
+        assert document_processing.process_pending_documents(max_workers=0) == 1
+        row = db_session.session.get(DocumentDerivedData, int(doc.id))
+        assert row.status == "done" and "Access control" in row.text_content
+        assert seen == ['"0x8D1"']
+        assert list(tmp_path.iterdir()) == []
+
+
+def test_extract_pdf_falls_back_when_pypdf_cannot_parse():
+    import pytest
+
+    from app.services.document_extraction import extract_document
+
+    # No xref table: pypdf raises, the header and regex estimate still apply.
+    result = extract_document(b"%PDF-1.4\n1 0 obj << /Type /Page >> endobj\n%%EOF", "broken.pdf")
+    assert result["page_count"] == 1 and not result["text"]
+    assert result["metadata"]["pdf_version"] == "1.4"
+
+    with pytest.raises(ValueError):
+        extract_document(b"not a pdf at all", "fake.pdf")
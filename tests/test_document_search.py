@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import io
+
+from tests.conftest import login
+from tests.test_document_processing import _docx_bytes
+
+
+def _add_document(db_session, org_id, user_id, filename, text=None):
+    from app.models import Document, DocumentDerivedData
+    from app.services.document_search import index_document
+
+    doc = Document(
+        filename=filename,
+        blob_name=f"org_{org_id}/{filename}",
+        file_size=10,
+        content_type="application/pdf",
+        uploaded_by=user_id,
+        organization_id=org_id,
+    )
+    db_session.session.add(doc)
+    db_session.session.flush()
+    derived = None
+    if text is not None:
+        derived = DocumentDerivedData(document_id=doc.id, status="done", text_content=text)
+        db_session.session.add(derived)
+    index_document(doc, derived)
+    db_session.session.commit()
+    return int(doc.id)
+
+
+def test_search_is_ranked_prefix_matched_and_org_scoped(app, db_session, seed_org_user):
+    from app.models import Document, Organization
+    from app.services.document_search import remove_document, search_documents
+
+    org_id, user_id, _membership_id = seed_org_user
+    with app.app_context():
+        other_org = Organization(name="Org B")
+        db_session.session.add(other_org)
+        db_session.session.commit()
+
+        in_name = _add_document(db_session, org_id, user_id, "Incident response plan.pdf", "Contacts and escalation.")
+        in_text = _add_document(
+            db_session, org_id, user_id, "policy.pdf", "Staff must report every <b>incident</b> within 24 hours."
+        )
+        _add_document(db_session, org_id, user_id, "unrelated.pdf", "Nothing to see here.")
+        _add_document(db_session, int(other_org.id), user_id, "Incident log.pdf", "incident incident")
+
+        result = search_documents(org_id, "incid")
+        assert [r["document_id"] for r in result["results"]] == [in_name, in_text]
+        snippet = str(result["results"][1]["snippet"])
+        assert "<mark>incident</mark>" in snippet and "&lt;b&gt;" in snippet
+
+        # All terms must match; FTS operators in the input are treated as text.
+        assert [r["document_id"] for r in search_documents(org_id, "incident 24")["results"]] == [in_text]
+        assert search_documents(org_id, 'incident OR "nothing')["results"] == []
+
+        page = search_documents(org_id, "incident", per_page=1)
+        assert page["has_next"] is True and len(page["results"]) == 1
+        assert search_documents(org_id, "incident", page=2, per_page=1)["has_next"] is False
+
+        db_session.session.get(Document, in_name).is_active = False
+        remove_document(in_name)
+        db_session.session.commit()
+        assert [r["document_id"] for r in search_documents(org_id, "incident")["results"]] == [in_text]
+
+
+def test_uploaded_text_becomes_searchable(client, app, db_session, seed_org_user, tmp_path):
+    from app.services.document_processing import process_pending_documents
+
+    app.config.update(STORAGE_BACKEND="local", LOCAL_STORAGE_ROOT=str(tmp_path / "storage"))
+    assert login(client).status_code in {302, 303}
+
+    data = _docx_bytes(text="Quarterly firewall review")
+    resp = client.post("/upload", data={"file": (io.BytesIO(data), "review.docx")}, content_type="multipart/form-data")
+    assert resp.status_code in {302, 303}
+
+    # Filename is searchable straight away; text once processing has run.
+    assert [r["filename"] for r in client.get("/documents/search?q=review").get_json()["results"]] == ["review.docx"]
+    assert client.get("/documents/search?q=firewall").get_json()["results"] == []
+
+    with app.app_context():
+        assert process_pending_documents(max_workers=0) == 1
+
+    body = client.get("/documents/search?q=firewall").get_json()
+    assert [r["filename"] for r in body["results"]] == ["review.docx"]
+    assert "<mark>firewall</mark>" in body["results"][0]["snippet"]
+
+    resp = client.get("/evidence-repository?q=firewall")
+    assert resp.status_code == 200
+    assert b"review.docx" in resp.data
+
+    doc_id = body["results"][0]["id"]
+    client.post(f"/document/{doc_id}/delete")
+    assert client.get("/documents/search?q=firewall").get_json()["results"] == []
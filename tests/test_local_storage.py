@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import io
+import os
+
+from tests.conftest import login
+
+
+PAYLOAD = bytes(range(256)) * 40  # 10 KB
+
+
+def _local_app(app, tmp_path):
+    app.config.update(STORAGE_BACKEND="local", LOCAL_STORAGE_ROOT=str(tmp_path / "storage"))
+    return app
+
+
+def test_local_storage_round_trip(app, tmp_path):
+    from app.services.storage import get_document_storage
+
+    _local_app(app, tmp_path)
+    with app.app_context():
+        storage = get_document_storage()
+        result = storage.upload_file(io.BytesIO(PAYLOAD), "org_1/a.pdf", content_type="application/pdf")
+        assert result["success"] is True
+        assert result["size"] == len(PAYLOAD)
+
+        # Sharded layout: <root>/<container>/ab/cd/<hash>, with no temp files left behind.
+        path = storage.get_local_path("org_1/a.pdf")
+        rel = os.path.relpath(path, storage.base_dir).split(os.sep)
+        assert len(rel) == 3 and rel[2].startswith(rel[0] + rel[1])
+        assert not [n for n in os.listdir(os.path.dirname(path)) if n.startswith(".tmp-")]
+
+        ranged = storage.open_download("org_1/a.pdf", offset=100, length=50)
+        assert b"".join(ranged["chunks"]) == PAYLOAD[100:150]
+        assert ranged["total_size"] == len(PAYLOAD)
+
+        assert storage.download_file("org_1/a.pdf")["data"] == PAYLOAD
+        assert storage.inspect_file("org_1/a.pdf")["content_type"] == "application/pdf"
+        assert [f["name"] for f in storage.list_files(prefix="org_1/")["files"]] == ["org_1/a.pdf"]
+
+        storage.upload_file(io.BytesIO(b"x"), "org_1/b.pdf")
+        first = storage.list_files(prefix="org_1/", max_results=1)
+        assert [f["name"] for f in first["files"]] == ["org_1/a.pdf"] and first["continuation_token"]
+        rest = storage.list_files(prefix="org_1/", max_results=1, continuation_token=first["continuation_token"])
+        assert [f["name"] for f in rest["files"]] == ["org_1/b.pdf"] and rest["continuation_token"] is None
+        assert storage.list_files(prefix="org_2/", continuation_token=first["continuation_token"])["error_code"] == (
+            "INVALID_CONTINUATION_TOKEN"
+        )
+        storage.delete_file("org_1/b.pdf")
+
+        assert storage.delete_file("org_1/a.pdf")["success"] is True
+        assert storage.download_file("org_1/a.pdf")["error_code"] == "FILE_NOT_FOUND"
+
+
+def test_local_download_route_and_signed_url(client, app, db_session, seed_org_user, tmp_path):
+    from app.models import Document
+    from app.services.storage import get_document_storage
+
+    _local_app(app, tmp_path)
+    org_id, user_id, _membership_id = seed_org_user
+    with app.app_context():
+        get_document_storage().upload_file(io.BytesIO(PAYLOAD), "org_1/policy.pdf", content_type="application/pdf")
+        doc = Document(
+            filename="policy.pdf",
+            blob_name="org_1/policy.pdf",
+            file_size=len(PAYLOAD),
+            content_type="application/pdf",
+            uploaded_by=user_id,
+            organization_id=org_id,
+        )
+        db_session.session.add(doc)
+        db_session.session.commit()
+        doc_id = int(doc.id)
+
+    assert login(client).status_code in {302, 303}
+
+    resp = client.get(f"/document/{doc_id}/download", headers={"Range": "bytes=0-99"})
+    assert resp.status_code == 206
+    assert resp.data == PAYLOAD[:100]
+    assert resp.headers["Content-Disposition"].startswith("attachment")
+
+    with app.test_request_context():
+        url = get_document_storage().get_file_url("org_1/policy.pdf")["url"]
+    resp = client.get(url)
+    assert resp.status_code == 200
+    assert resp.data == PAYLOAD
+
+    from app.services.local_storage import verify_local_url
+
+    token = url.rsplit("/", 1)[1]
+    with app.app_context():
+        assert verify_local_url(token) == ("compliance-documents", "org_1/policy.pdf")
+        assert verify_local_url("x" + token) is None
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+
+
+@contextmanager
+def _count_queries(engine):
+    from sqlalchemy import event
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def test_role_masks_are_compiled_on_write(app, db_session, seed_org_user):
+    from app.models import RBACRole
+    from app.services.rbac import BUILTIN_ROLE_KEYS, PERMISSIONS, compile_permission_mask
+
+    org_id, _user_id, _membership_id = seed_org_user
+    with app.app_context():
+        admin = RBACRole.query.filter_by(organization_id=org_id, name=BUILTIN_ROLE_KEYS.ORG_ADMIN).one()
+        member = RBACRole.query.filter_by(organization_id=org_id, name=BUILTIN_ROLE_KEYS.MEMBER).one()
+        # Org Admin inherits everything through Compliance Manager -> Member.
+        assert admin.permission_mask == compile_permission_mask(PERMISSIONS)
+        assert member.permission_mask == compile_permission_mask(["documents.view", "documents.upload"])
+
+
+def test_session_principal_answers_checks_without_queries(app, db_session, seed_org_user):
+    from flask import g, session
+
+    from app.models import RBACRole, User
+    from app.services.cache_generations import sync_generations
+    from app.services.rbac import BUILTIN_ROLE_KEYS, PRINCIPAL_SESSION_KEY
+
+    org_id, user_id, _membership_id = seed_org_user
+    with app.app_context():
+        sync_generations(force=True)
+        user = db_session.session.get(User, user_id)
+        with app.test_request_context():
+            assert user.has_permission("users.manage", org_id=org_id)
+            snapshot = dict(session[PRINCIPAL_SESSION_KEY])
+
+        # Next request: same signed session and no queries at all. (Request contexts here
+        # share the test's app context, so drop the request-scoped memo by hand.)
+        with app.test_request_context(), _count_queries(db_session.engine) as statements:
+            g.pop("_rbac_principal", None)
+            session[PRINCIPAL_SESSION_KEY] = snapshot
+            assert user.has_permission("users.manage", org_id=org_id)
+            assert user.has_permission("documents.delete", org_id=org_id)
+        assert statements == []
+
+        # A role edit bumps the org's generation, so the old snapshot is rebuilt.
+        admin = RBACRole.query.filter_by(organization_id=org_id, name=BUILTIN_ROLE_KEYS.ORG_ADMIN).one()
+        admin.permissions = [p for p in admin.permissions if p.code != "users.manage"]
+        db_session.session.commit()
+        with app.test_request_context():
+            g.pop("_rbac_principal", None)
+            session[PRINCIPAL_SESSION_KEY] = snapshot
+            assert not user.has_permission("users.manage", org_id=org_id)
+            assert session[PRINCIPAL_SESSION_KEY]["gen"] != snapshot["gen"]
+
+
+def test_role_closure_tracks_inheritance_edits(app, db_session, seed_org_user):
+    from app.models import RBACRole, rbac_role_closure
+    from app.services.rbac import BUILTIN_ROLE_KEYS, memberships_with_permission, role_has_permission
+
+    org_id, _user_id, membership_id = seed_org_user
+    with app.app_context():
+        session = db_session.session
+        roles = {r.name: r for r in RBACRole.query.filter_by(organization_id=org_id)}
+        admin, member = roles[BUILTIN_ROLE_KEYS.ORG_ADMIN], roles[BUILTIN_ROLE_KEYS.MEMBER]
+        depth = session.execute(
+            db_session.select(rbac_role_closure.c.depth).where(
+                rbac_role_closure.c.role_id == admin.id, rbac_role_closure.c.ancestor_role_id == member.id
+            )
+        ).scalar_one()
+        assert depth == 2  # Org Admin -> Compliance Manager -> Member
+        assert role_has_permission(admin.id, "documents.upload")
+        assert [m.id for m in memberships_with_permission(org_id, "users.manage")] == [membership_id]
+
+        # A custom role inheriting Auditor, then a cycle back to it: both stay finite and current.
+        custom = RBACRole(organization_id=org_id, name="Reviewer")
+        custom.inherits.append(roles[BUILTIN_ROLE_KEYS.AUDITOR])
+        session.add(custom)
+        session.flush()
+        assert role_has_permission(custom.id, "audits.export") and role_has_permission(custom.id, "documents.view")
+        assert not role_has_permission(custom.id, "documents.delete")
+
+        member.inherits.append(custom)
+        session.commit()
+        assert role_has_permission(member.id, "audits.export")
+        assert member.effective_permission_codes() >= {"audits.export", "documents.view", "documents.upload"}
+
+        # Edits that roll back leave the materialized rows untouched.
+        admin.permissions = []
+        admin.inherits = []
+        session.flush()
+        assert not role_has_permission(admin.id, "users.manage")
+        session.rollback()
+        assert role_has_permission(admin.id, "users.manage")
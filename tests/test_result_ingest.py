@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+CSV = (
+    " Framework ,Compliance_Score,Status,Notes\n"
+    "ISO 27001,8.5, Complete ,x\n"
+    "SOC 2,,Needs Review,\n"
+    "  GDPR  ,3.25,missing,\n"
+    "HIPAA,7,Other,\n"
+    "Overall,6.4,,\n"
+)
+
+
+
+class _FakeDownload:
+    def __init__(self, data):
+        self.data = data
+        self.size = len(data)
+
+    def readall(self):
+        return self.data
+
+
+def test_vectorized_summary_matches_row_path():
+    from app.services.azure_data_service import AzureDataLakeService, parse_result_rows
+    from app.services.result_ingest import frame_to_rows, parse_result_csv, summarize_frame
+
+    service = AzureDataLakeService()
+    rows = parse_result_rows("r.csv", CSV.encode("utf-8"))
+    frame = parse_result_csv(CSV.encode("utf-8"))
+
+    assert frame_to_rows(frame) == rows
+    expected = service.process_adls_data(rows)
+    assert summarize_frame(frame) == expected
+    assert expected["complete_count"] == 1 and expected["missing_count"] == 1
+    assert expected["overall_status"] == "Needs Attention"
+    assert expected["score_stats"] == {"min": 0.0, "max": 8.5, "mean": 4.69}
+
+
+def test_vectorized_edge_cases():
+    from app.services.result_ingest import parse_result_csv, summarize_frame
+
+    empty = summarize_frame(parse_result_csv(b""))
+    assert (empty["total_requirements"], empty["overall_status"], empty["frameworks"]) == (0, "No Data", [])
+
+    # No known columns at all.
+    assert summarize_frame(parse_result_csv(b"a,b\n1,2\n"))["total_requirements"] == 0
+
+    # Unparseable scores count as 0 instead of failing the whole file.
+    summary = summarize_frame(parse_result_csv(b"Framework,Compliance_Score,Status\nA,n/a,Complete\nOverall,9.1,\n"))
+    assert summary["frameworks"] == [{"name": "A", "score": 0.0, "status": "Complete"}]
+    assert summary["overall_status"] == "Excellent"
+
+
+def test_service_uses_vectorized_path_for_large_csvs(monkeypatch):
+    from app.services import result_ingest
+    from app.services.azure_data_service import AzureDataLakeService
+
+    service = AzureDataLakeService()
+    monkeypatch.setattr(service, "_open_adls_download", lambda path: _FakeDownload(CSV.encode("utf-8")))
+    small_rows, small_summary = service._analyze_adls_file("r.csv", strict=True)
+
+    calls = []
+    real_parse = result_ingest.parse_result_csv
+    monkeypatch.setattr(result_ingest, "VECTORIZE_MIN_BYTES", 0)
+    monkeypatch.setattr(
+        "app.services.azure_data_service.parse_result_csv", lambda data: calls.append(len(data)) or real_parse(data)
+    )
+    rows, summary = service._analyze_adls_file("r.csv", strict=True)
+
+    assert calls == [len(CSV)]
+    assert (rows, summary) == (small_rows, small_summary)
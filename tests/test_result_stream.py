@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import json
+
+CSV = (
+    " Framework ,Compliance_Score,Status,Notes\n"
+    "ISO 27001,8.5, Complete ,x\n"
+    "SOC 2,,Needs Review,\"multi\nline\"\n"
+    "  GDPR  ,3.25,missing,\n"
+    "HIPAA,7,Other,\n"
+    "Overall,6.4,,\n"
+)
+
+
+def _chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def test_streamed_csv_matches_row_path():
+    from app.services.azure_data_service import AzureDataLakeService, parse_result_rows
+    from app.services.result_stream import stream_result
+
+    data = CSV.encode("utf-8")
+    rows = parse_result_rows("r.csv", data)
+    expected = AzureDataLakeService().process_adls_data(rows)
+
+    for size in (1, 3, 7, len(data)):
+        sample, summary = stream_result(_chunks(data, size), "r.csv")
+        assert sample == rows
+        assert summary == expected
+
+
+def test_streamed_json_array_matches_row_path():
+    from app.services.azure_data_service import AzureDataLakeService
+    from app.services.result_stream import stream_result
+
+    rows = [
+        {"Framework": "ISO 27001 – A.5", "Compliance_Score": 8.5, "Status": "Complete"},
+        {"Framework": "SOC 2", "Compliance_Score": 10, "Status": "Missing"},
+        {"Framework": "Overall", "Compliance_Score": 9.25},
+    ]
+    data = json.dumps(rows, indent=2).encode("utf-8")
+    expected = AzureDataLakeService().process_adls_data(rows)
+
+    for size in (1, 2, 5, len(data)):
+        assert stream_result(_chunks(data, size), "r.json") == (rows, expected)
+
+    # A top-level object is a single row.
+    sample, summary = stream_result(_chunks(json.dumps(rows[0]).encode("utf-8"), 4), "r.json")
+    assert sample == [rows[0]] and summary["total_requirements"] == 1
+
+
+def test_stream_keeps_bounded_sample():
+    from app.services.result_stream import stream_result
+
+    def generate():
+        yield b"Framework,Compliance_Score,Status\n"
+        for i in range(5000):
+            yield f"F{i},{i % 10},Complete\n".encode("utf-8")
+        yield b"Overall,4.5,\n"
+
+    sample, summary = stream_result(generate(), "big.csv", sample_rows=10)
+
+    assert len(sample) == 10 and len(summary["frameworks"]) == 10
+    assert summary["frameworks_truncated"] is True
+    assert summary["total_requirements"] == summary["complete_count"] == 5000
+    assert summary["score_stats"] == {"min": 0.0, "max": 9.0, "mean": 4.5}
+    assert summary["compliancy_rate"] == 4.5
+
+
+def test_stream_empty_and_truncated_input():
+    import pytest
+
+    from app.services.result_stream import stream_result
+
+    assert stream_result(iter([]), "r.csv")[1]["overall_status"] == "No Data"
+    assert stream_result(iter([b"[ ]"]), "r.json")[1]["overall_status"] == "No Data"
+    with pytest.raises(ValueError):
+        stream_result(iter([b'[{"Framework": "A"}, {"Fra']), "r.json")
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+
+def test_concurrent_callers_share_one_execution():
+    from app.services.singleflight import SingleFlight
+
+    flight = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(threading.get_ident())
+        time.sleep(0.2)
+        return {"value": 42}
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: flight.do("k", fetch, timeout=5), range(8)))
+
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert flight.stats() == {"leaders": 1, "coalesced": 7, "wait_timeouts": 0, "in_flight": 0}
+
+    # Once the call has finished the next caller runs it again.
+    flight.do("k", fetch)
+    assert len(calls) == 2
+
+
+def test_leader_error_reaches_waiters_and_key_is_released():
+    from app.services.singleflight import SingleFlight
+
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def fail():
+        started.set()
+        time.sleep(0.2)
+        raise RuntimeError("adls down")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "k", fail, 5)
+        started.wait(1)
+        waiter = pool.submit(flight.do, "k", lambda: "unused", 5)
+        for future in (leader, waiter):
+            with pytest.raises(RuntimeError, match="adls down"):
+                future.result()
+
+    assert flight.in_flight() == 0
+    assert flight.do("k", lambda: "ok") == "ok"
+
+
+def test_waiter_runs_the_call_itself_after_timeout():
+    from app.services.singleflight import SingleFlight
+
+    flight = SingleFlight()
+    release = threading.Event()
+    started = threading.Event()
+
+    def hung():
+        started.set()
+        release.wait(5)
+        return "leader"
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        leader = pool.submit(flight.do, "k", hung)
+        started.wait(1)
+        assert flight.do("k", lambda: "own", timeout=0.1) == "own"
+        release.set()
+        assert leader.result() == "leader"
+
+    assert flight.stats()["wait_timeouts"] == 1
+
+
+def test_stream_leader_feeds_waiters_and_do_callers():
+    from app.services.singleflight import SingleFlight
+
+    flight = SingleFlight()
+    started = threading.Event()
+    runs = []
+
+    def build():
+        runs.append(1)
+        started.set()
+        yield "file"
+        time.sleep(0.2)
+        yield "summary"
+        return {"total": 2}
+
+    def replay(result):
+        yield ("replayed", result["total"])
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        leader = pool.submit(lambda: list(flight.stream("k", build, replay, timeout=5)))
+        started.wait(1)
+        streamed = pool.submit(lambda: list(flight.stream("k", build, replay, timeout=5)))
+        joined = pool.submit(flight.do, "k", lambda: "unused", 5)
+        assert leader.result() == ["file", "summary"]
+        assert streamed.result() == [("replayed", 2)]
+        assert joined.result() == {"total": 2}
+
+    assert len(runs) == 1 and flight.in_flight() == 0
+
+
+def test_abandoned_stream_leader_lets_waiters_build():
+    from app.services.singleflight import SingleFlight
+
+    flight = SingleFlight()
+
+    def build():
+        yield "first"
+        yield "second"
+        return "done"
+
+    stream = flight.stream("k", build, lambda result: iter([result]))
+    assert next(stream) == "first"
+    stream.close()  # e.g. the client disconnected mid-stream
+
+    assert flight.in_flight() == 0
+    assert flight.do("k", lambda: "own") == "own"
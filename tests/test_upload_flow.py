@@ -43,9 +43,9 @@ def test_upload_allows_when_billing_incomplete(client, app, db_session, seed_org
         def delete_file(self, blob_name):
             return True
 
-    import app.upload.routes as upload_routes
+    import app.services.azure_storage as azure_storage
 
-    monkeypatch.setattr(upload_routes, "AzureBlobStorageService", FakeStorage)
+    monkeypatch.setattr(azure_storage, "AzureBlobStorageService", FakeStorage)
 
     test_pdf = Path("tests") / "test_files" / "test_doc.pdf"
     with test_pdf.open("rb") as f:
@@ -69,3 +69,377 @@ def test_upload_allows_when_billing_incomplete(client, app, db_session, seed_org
         )
         assert docs
         assert docs[0].filename == "test_doc.pdf"
+
+
+class FakeDirectStorage:
+    header = b"%PDF-1.7"
+    size = 2048
+    content_type = "application/pdf"
+    deleted = []
+
+    def is_configured(self):
+        return True
+
+    def generate_blob_name(self, original_filename, user_id, organization_id=None):
+        return f"organizations/{organization_id}/documents/user_{user_id}/{original_filename}"
+
+    def get_upload_url(self, blob_name, expiry_minutes=15):
+        return {
+            "success": True,
+            "url": f"https://example.blob.core.windows.net/docs/{blob_name}?sig=x",
+            "method": "PUT",
+            "headers": {"x-ms-blob-type": "BlockBlob"},
+            "expires_in_seconds": expiry_minutes * 60,
+        }
+
+    def inspect_file(self, blob_name, header_bytes=8):
+        return {
+            "success": True,
+            "header": self.header[:header_bytes],
+            "size": self.size,
+            "content_type": self.content_type,
+            "etag": '"0x8DCOMMITTED"',
+        }
+
+    def delete_file(self, blob_name):
+        FakeDirectStorage.deleted.append(blob_name)
+        return {"success": True}
+
+
+def _start_direct_upload(client, app, monkeypatch, storage_cls):
+    import app.services.azure_storage as azure_storage
+
+    app.config["DIRECT_UPLOAD_ENABLED"] = True
+    monkeypatch.setattr(azure_storage, "AzureBlobStorageService", storage_cls)
+    resp = client.post(
+        "/auth/login",
+        data={"email": "user@example.com", "password": "Passw0rd1", "remember_me": "y"},
+        environ_base={"REMOTE_ADDR": "127.0.0.1"},
+    )
+    assert resp.status_code in {302, 303}
+
+    start = client.post("/upload/direct", json={"filename": "evidence.pdf", "size": 2048})
+    assert start.status_code == 200
+    body = start.get_json()
+    assert body["success"] is True
+    assert body["headers"]["x-ms-blob-content-type"] == "application/pdf"
+    return body
+
+
+def test_direct_upload_commit_records_document(client, app, db_session, seed_org_user, monkeypatch):
+    from app.models import Document
+
+    org_id, _user_id, _membership_id = seed_org_user
+    start = _start_direct_upload(client, app, monkeypatch, FakeDirectStorage)
+
+    commit = client.post("/upload/direct/commit", json={"commit_token": start["commit_token"]})
+    assert commit.status_code == 200
+    assert commit.get_json()["success"] is True
+
+    # Retrying the commit is idempotent.
+    again = client.post("/upload/direct/commit", json={"commit_token": start["commit_token"]})
+    assert again.get_json()["document_id"] == commit.get_json()["document_id"]
+
+    with app.app_context():
+        docs = Document.query.filter_by(organization_id=int(org_id)).all()
+        assert len(docs) == 1
+        assert docs[0].filename == "evidence.pdf"
+        assert docs[0].file_size == 2048
+        assert docs[0].blob_etag == '"0x8DCOMMITTED"'
+
+
+def test_direct_upload_commit_rejects_bad_magic_bytes(client, app, db_session, seed_org_user, monkeypatch):
+    from app.models import Document
+
+    class NotAPdf(FakeDirectStorage):
+        header = b"MZ\x90\x00\x03\x00\x00\x00"
+
+    FakeDirectStorage.deleted = []
+    start = _start_direct_upload(client, app, monkeypatch, NotAPdf)
+
+    commit = client.post("/upload/direct/commit", json={"commit_token": start["commit_token"]})
+    assert commit.status_code == 400
+    assert commit.get_json()["error_code"] == "INVALID_PDF"
+    assert FakeDirectStorage.deleted  # rejected blob is removed
+
+    with app.app_context():
+        assert Document.query.count() == 0
+
+
+def test_uncommitted_direct_upload_is_swept(client, app, db_session, seed_org_user, monkeypatch):
+    from datetime import datetime, timedelta
+
+    from app.models import Document, UploadSession
+    from app.services.upload_sessions import sweep_expired_uploads
+
+    FakeDirectStorage.deleted = []
+    start = _start_direct_upload(client, app, monkeypatch, FakeDirectStorage)
+
+    with app.app_context():
+        session = UploadSession.query.one()
+        assert session.status == "direct"
+        session.expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db_session.session.commit()
+
+        assert sweep_expired_uploads() == 1
+        assert FakeDirectStorage.deleted == [session.blob_name]
+        assert db_session.session.get(UploadSession, session.id).status == "aborted"
+        assert sweep_expired_uploads() == 0
+
+    # A commit arriving after the sweep cannot resurrect the deleted blob.
+    commit = client.post("/upload/direct/commit", json={"commit_token": start["commit_token"]})
+    assert commit.status_code == 410
+    with app.app_context():
+        assert Document.query.count() == 0
+
+
+def test_document_worker_loop_sweeps_uploads(app, monkeypatch):
+    import time
+
+    from app.services import document_processing, upload_sessions
+
+    sweeps = []
+    monkeypatch.setattr(upload_sessions, "sweep_uploads", lambda: sweeps.append(1) or 0)
+    monkeypatch.setattr(document_processing, "process_pending_documents", lambda **_kwargs: 0)
+
+    def stop(_seconds):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(time, "sleep", stop)
+    app.config["UPLOAD_SWEEP_INTERVAL_SECONDS"] = 300
+
+    result = app.test_cli_runner().invoke(args=["process-documents", "--loop"])
+    assert result.exit_code == 0, result.output
+    assert sweeps == [1]
+
+    sweeps.clear()
+    app.config["UPLOAD_SWEEP_INTERVAL_SECONDS"] = 0
+    app.test_cli_runner().invoke(args=["process-documents", "--loop"])
+    assert sweeps == []
+
+
+def test_duplicate_upload_shares_blob_until_last_delete(client, app, db_session, seed_org_user, tmp_path):
+    from app.models import Document, DocumentBlob
+    from app.services.storage import get_document_storage
+
+    org_id, _user_id, _membership_id = seed_org_user
+    app.config.update(STORAGE_BACKEND="local", LOCAL_STORAGE_ROOT=str(tmp_path / "storage"))
+    resp = client.post(
+        "/auth/login",
+        data={"email": "user@example.com", "password": "Passw0rd1", "remember_me": "y"},
+        environ_base={"REMOTE_ADDR": "127.0.0.1"},
+    )
+    assert resp.status_code in {302, 303}
+
+    test_pdf = Path("tests") / "test_files" / "test_doc.pdf"
+    for _ in range(2):
+        with test_pdf.open("rb") as f:
+            resp = client.post("/upload", data={"file": (f, "test_doc.pdf")}, content_type="multipart/form-data")
+        assert resp.status_code in {302, 303}
+
+    with app.app_context():
+        docs = Document.query.filter_by(organization_id=int(org_id)).order_by(Document.id).all()
+        assert [d.filename for d in docs] == ["test_doc.pdf", "test_doc (1).pdf"]
+        assert docs[0].blob_name == docs[1].blob_name
+        assert docs[0].content_sha256 and docs[0].content_sha256 == docs[1].content_sha256
+        blob = DocumentBlob.query.filter_by(organization_id=int(org_id)).one()
+        assert blob.ref_count == 2
+        assert get_document_storage().list_files()["count"] == 1
+        doc_ids = [int(d.id) for d in docs]
+        blob_name = docs[0].blob_name
+
+    client.post(f"/document/{doc_ids[0]}/delete")
+    with app.app_context():
+        assert get_document_storage().get_local_path(blob_name) is not None
+        assert DocumentBlob.query.one().ref_count == 1
+
+    client.post(f"/document/{doc_ids[1]}/delete")
+    with app.app_context():
+        assert get_document_storage().get_local_path(blob_name) is None
+        assert DocumentBlob.query.count() == 0
+
+
+def test_blob_without_live_references_is_not_reused(app, db_session, seed_org_user):
+    from app.models import DocumentBlob
+    from app.services.document_blobs import acquire_blob_reference, reference_existing_blob
+
+    org_id, _user_id, _membership_id = seed_org_user
+    with app.app_context():
+        # A row at ref_count 0 belongs to a delete in progress: its file is about to go.
+        db_session.session.add(DocumentBlob(organization_id=int(org_id), sha256="a" * 64, blob_name="old.pdf", ref_count=0))
+        db_session.session.add(DocumentBlob(organization_id=int(org_id), sha256="b" * 64, blob_name="live.pdf", ref_count=1))
+        db_session.session.commit()
+
+        assert reference_existing_blob(int(org_id), "a" * 64) is None
+        blob = reference_existing_blob(int(org_id), "b" * 64)
+        assert blob.blob_name == "live.pdf" and blob.ref_count == 2
+
+        blob = acquire_blob_reference(int(org_id), "c" * 64, "new.pdf")
+        assert blob.blob_name == "new.pdf" and blob.ref_count == 1
+        db_session.session.rollback()
+
+
+def test_resumable_upload_chunks_resume_and_finalize(client, app, db_session, seed_org_user, tmp_path):
+    from app.models import Document
+    from app.services.storage import get_document_storage
+
+    org_id, _user_id, _membership_id = seed_org_user
+    app.config.update(
+        STORAGE_BACKEND="local",
+        LOCAL_STORAGE_ROOT=str(tmp_path / "storage"),
+        RESUMABLE_UPLOAD_ENABLED=True,
+        RESUMABLE_UPLOAD_CHUNK_SIZE=64 * 1024,
+    )
+    resp = client.post(
+        "/auth/login",
+        data={"email": "user@example.com", "password": "Passw0rd1", "remember_me": "y"},
+        environ_base={"REMOTE_ADDR": "127.0.0.1"},
+    )
+    assert resp.status_code in {302, 303}
+
+    payload = b"%PDF-1.7\n" + bytes(range(256)) * 600  # ~150 KB -> 3 chunks
+    created = client.post("/upload/sessions", json={"filename": "big.pdf", "size": len(payload)}).get_json()
+    assert created["success"] is True
+    chunk = created["chunk_size"]
+    chunk_url = created["chunk_url"]
+
+    def put(offset):
+        return client.put(f"{chunk_url}?offset={offset}", data=payload[offset:offset + chunk])
+
+    assert put(0).get_json()["received_bytes"] == chunk
+
+    # Skipping ahead is refused with the offset to resume from.
+    skipped = put(2 * chunk)
+    assert skipped.status_code == 409
+    assert skipped.get_json()["received_bytes"] == chunk
+
+    # A retransmitted chunk does not double-count.
+    assert put(0).get_json()["received_bytes"] == chunk
+
+    assert put(chunk).get_json()["received_bytes"] == 2 * chunk
+    assert put(2 * chunk).get_json()["received_bytes"] == len(payload)
+
+    progress = client.get(created["status_url"]).get_json()
+    assert progress["progress"] == 100
+    assert progress["status"] == "uploading"
+
+    done = client.post(created["finalize_url"]).get_json()
+    assert done["success"] is True
+    assert done["status"] == "completed"
+    assert client.post(created["finalize_url"]).get_json()["document_id"] == done["document_id"]
+
+    with app.app_context():
+        doc = db_session.session.get(Document, int(done["document_id"]))
+        assert doc.organization_id == int(org_id)
+        assert doc.file_size == len(payload)
+        assert get_document_storage().download_file(doc.blob_name)["data"] == payload
+
+
+def test_resumable_upload_rejects_bad_first_chunk(client, app, db_session, seed_org_user, tmp_path):
+    app.config.update(
+        STORAGE_BACKEND="local",
+        LOCAL_STORAGE_ROOT=str(tmp_path / "storage"),
+        RESUMABLE_UPLOAD_ENABLED=True,
+    )
+    client.post(
+        "/auth/login",
+        data={"email": "user@example.com", "password": "Passw0rd1", "remember_me": "y"},
+        environ_base={"REMOTE_ADDR": "127.0.0.1"},
+    )
+
+    created = client.post("/upload/sessions", json={"filename": "fake.pdf", "size": 16}).get_json()
+    resp = client.put(f"{created['chunk_url']}?offset=0", data=b"MZ" + b"\0" * 14)
+
+    assert resp.status_code == 400
+    assert client.get(created["status_url"]).get_json()["status"] == "aborted"
+
+
+def _start_resumable_upload(client, app, tmp_path, payload):
+    app.config.update(
+        STORAGE_BACKEND="local",
+        LOCAL_STORAGE_ROOT=str(tmp_path / "storage"),
+        RESUMABLE_UPLOAD_ENABLED=True,
+    )
+    client.post(
+        "/auth/login",
+        data={"email": "user@example.com", "password": "Passw0rd1", "remember_me": "y"},
+        environ_base={"REMOTE_ADDR": "127.0.0.1"},
+    )
+    created = client.post("/upload/sessions", json={"filename": "report.pdf", "size": len(payload)}).get_json()
+    assert client.put(f"{created['chunk_url']}?offset=0", data=payload).status_code == 200
+    return created
+
+
+def test_resumable_finalize_keeps_blob_after_database_error(client, app, db_session, seed_org_user, tmp_path, monkeypatch):
+    from app.models import Document
+    from app.services.storage import get_document_storage
+    from app.upload import routes
+
+    payload = b"%PDF-1.7\n" + b"x" * 100
+    created = _start_resumable_upload(client, app, tmp_path, payload)
+
+    real_create = routes._create_document_record
+
+    def failing_create(*args, **kwargs):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(routes, "_create_document_record", failing_create)
+    failed = client.post(created["finalize_url"])
+    assert failed.status_code == 500
+    state = client.get(created["status_url"]).get_json()
+    assert state["status"] == "assembled"
+
+    # The retry only records the document; the assembled blob was kept.
+    monkeypatch.setattr(routes, "_create_document_record", real_create)
+    done = client.post(created["finalize_url"]).get_json()
+    assert done["status"] == "completed"
+    with app.app_context():
+        doc = db_session.session.get(Document, int(done["document_id"]))
+        assert get_document_storage().download_file(doc.blob_name)["data"] == payload
+
+
+def test_finalize_claims_the_session_once(client, app, db_session, seed_org_user, tmp_path):
+    from app.models import UploadSession
+
+    created = _start_resumable_upload(client, app, tmp_path, b"%PDF-1.7\n" + b"y" * 100)
+    with app.app_context():
+        session = db_session.session.get(UploadSession, created["upload_id"])
+        session.status = "finalizing"  # another worker is assembling the chunks
+        db_session.session.commit()
+
+    resp = client.post(created["finalize_url"])
+    assert resp.status_code == 409
+    assert resp.get_json()["error_code"] == "UPLOAD_FINALIZING"
+
+
+def test_expired_resumable_session_and_orphan_staging_are_swept(client, app, db_session, seed_org_user, tmp_path):
+    import os
+    from datetime import datetime, timedelta
+
+    from app.models import UploadSession
+    from app.services.storage import get_document_storage
+    from app.services.upload_sessions import sweep_expired_uploads, sweep_stale_staging
+
+    payload = b"%PDF-1.7\n" + b"z" * (200 * 1024)
+    app.config["RESUMABLE_UPLOAD_CHUNK_SIZE"] = 64 * 1024
+    created = _start_resumable_upload(client, app, tmp_path, payload[:64 * 1024])
+
+    with app.app_context():
+        storage = get_document_storage()
+        staging_root = os.path.join(storage.base_dir, ".staging")
+        assert len(os.listdir(staging_root)) == 1
+
+        orphan = os.path.join(staging_root, "orphan")
+        os.makedirs(orphan)
+        old = datetime.utcnow().timestamp() - 48 * 3600
+        os.utime(orphan, (old, old))
+
+        session = db_session.session.get(UploadSession, created["upload_id"])
+        session.expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db_session.session.commit()
+
+        assert sweep_expired_uploads() == 1
+        assert db_session.session.get(UploadSession, created["upload_id"]).status == "aborted"
+        assert os.listdir(staging_root) == ["orphan"]
+        assert sweep_stale_staging() == 1
+        assert os.listdir(staging_root) == []